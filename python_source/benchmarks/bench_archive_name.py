@@ -0,0 +1,108 @@
+"""
+压缩文件名解析基准：先用各种命名方式的标准结果表核对 parse_archive_name，
+再测量大量文件名（大部分不是压缩文件，与真实目录相似）的解析速度。
+
+用法: python benchmarks/bench_archive_name.py [--names 1000000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+source_dir = os.path.dirname(current_dir)
+if source_dir not in sys.path:
+    sys.path.insert(0, source_dir)
+
+from utils.archive_name import parse_archive_name
+
+# 标准结果表: 文件名 -> (base, container, scheme, number, is_first)，不是压缩文件时为 None
+GOLDEN = [
+    ("movie.7z", ("movie", "7z", "single", None, True)),
+    ("movie.ZIP", ("movie", "zip", "single", None, True)),
+    ("movie.rar", ("movie", "rar", "single", None, True)),
+    ("movie.7z.001", ("movie", "7z", "split", 1, True)),
+    ("movie.7z.002", ("movie", "7z", "split", 2, False)),
+    ("movie.zip.010", ("movie", "zip", "split", 10, False)),
+    ("movie.rar.001", ("movie", "rar", "split", 1, True)),
+    ("movie.part1.rar", ("movie", "rar", "part", 1, True)),
+    ("movie.part01.rar", ("movie", "rar", "part", 1, True)),
+    ("movie.part001.rar", ("movie", "rar", "part", 1, True)),
+    ("movie.PART12.RAR", ("movie", "rar", "part", 12, False)),
+    ("movie.r00", ("movie", "rar", "rnn", 0, False)),
+    ("movie.r15", ("movie", "rar", "rnn", 15, False)),
+    ("movie.r100", ("movie", "rar", "rnn", 100, False)),
+    ("movie.z01", ("movie", "zip", "znn", 1, False)),
+    ("movie.z02", ("movie", "zip", "znn", 2, False)),
+    ("movie.001", ("movie", None, "bare", 1, True)),
+    ("movie.002", ("movie", None, "bare", 2, False)),
+    ("movie.mkv.001", ("movie.mkv", None, "bare", 1, True)),
+    ("Show.S01E02.part3.rar", ("Show.S01E02", "rar", "part", 3, False)),
+    ("a.b.c.7z", ("a.b.c", "7z", "single", None, True)),
+    ("v1.2.zip", ("v1.2", "zip", "single", None, True)),
+    ("notes.txt", None),
+    ("photo.jpg", None),
+    ("report.2023", None),
+    ("archive.tar.gz", None),
+    (".7z", None),
+    ("README", None),
+    ("movie.7z.bak", None),
+    ("movie.r0", None),
+]
+
+_FILLER_EXTS = ["jpg", "png", "txt", "nfo", "mkv", "mp4", "pdf", "docx", "srt", "iso"]
+_ARCHIVE_PATTERNS = ["{}.7z.{:03d}", "{}.part{}.rar", "{}.r{:02d}", "{}.z{:02d}", "{}.{:03d}", "{}.rar"]
+
+
+def check_golden():
+    failures = 0
+    for filename, expected in GOLDEN:
+        info = parse_archive_name(filename)
+        actual = None if info is None else (info.base, info.container, info.scheme, info.number, info.is_first)
+        if actual != expected:
+            failures += 1
+            print(f"不符: {filename!r}\n  预期 {expected}\n  实际 {actual}")
+    print(f"标准结果表: {len(GOLDEN) - failures}/{len(GOLDEN)} 通过")
+    return failures == 0
+
+
+def make_names(count, archive_ratio=0.2, seed=1):
+    rng = random.Random(seed)
+    names = []
+    for i in range(count):
+        if rng.random() < archive_ratio:
+            names.append(rng.choice(_ARCHIVE_PATTERNS).format(f"release{i}", rng.randint(0, 99)))
+        else:
+            names.append(f"file{i}.{rng.choice(_FILLER_EXTS)}")
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description="压缩文件名解析基准")
+    parser.add_argument("--names", type=int, default=1000000, help="文件名数量")
+    args = parser.parse_args()
+
+    if not check_golden():
+        return 1
+
+    names = make_names(args.names)
+    parse_archive_name.cache_clear()
+    start = time.perf_counter()
+    archives = sum(1 for name in names if parse_archive_name(name) is not None)
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    # 最近解析过的文件名仍在 LRU 缓存中
+    for name in names[-65536:]:
+        parse_archive_name(name)
+    warm = time.perf_counter() - start
+    warm_count = min(len(names), 65536)
+
+    print(f"首次解析: {args.names} 个文件名 {cold:.3f} s, {args.names / cold / 1e6:.2f} M 个/秒, 其中压缩文件 {archives} 个")
+    print(f"缓存命中: {warm_count} 个文件名 {warm * 1000:.1f} ms, {warm_count / warm / 1e6:.2f} M 个/秒")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
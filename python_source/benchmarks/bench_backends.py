@@ -0,0 +1,183 @@
+"""
+进程内后端与 7z 命令行的对比基准：生成不同大小的 zip（普通与 ZipCrypto 加密），
+分别测量密码校验和解压耗时，给出 BackendPolicy 的大小分界参考。
+
+用法: python benchmarks/bench_backends.py [--7z PATH] [--sizes 16K,256K,2M,16M]
+没有 7z 时只测量进程内后端。
+"""
+import os
+import sys
+import time
+import zlib
+import struct
+import shutil
+import argparse
+import tempfile
+import zipfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+source_dir = os.path.dirname(current_dir)
+if source_dir not in sys.path:
+    sys.path.insert(0, source_dir)
+
+from core.backends import ZipFileBackend
+from core.sevenzip_handler import SevenZipHandler
+from utils.config import config
+
+PASSWORD = "bench-password"
+_UNITS = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+
+def parse_size(text):
+    text = text.strip().upper()
+    if text[-1] in _UNITS:
+        return int(float(text[:-1]) * _UNITS[text[-1]])
+    return int(text)
+
+
+def make_payload(size):
+    """可压缩但不是全零的数据，与文档类文件相近"""
+    words = [b"archive", b"volume", b"password", b"extract", b"benchmark", b"7-zip"]
+    chunks = []
+    total = 0
+    i = 0
+    while total < size:
+        chunk = words[i % len(words)] + str(i * 7919 % 100003).encode() + b" "
+        chunks.append(chunk)
+        total += len(chunk)
+        i += 1
+    return b"".join(chunks)[:size]
+
+
+class _ZipCrypto:
+    """传统 PKWARE 加密（标准库 zipfile 只能解密，基准需要自己生成加密文件）"""
+
+    def __init__(self, password):
+        self.keys = [0x12345678, 0x23456789, 0x34567890]
+        for c in password:
+            self._update(c)
+
+    @staticmethod
+    def _crc(value, byte):
+        return zlib.crc32(bytes([byte]), value ^ 0xFFFFFFFF) ^ 0xFFFFFFFF
+
+    def _update(self, byte):
+        k0, k1, k2 = self.keys
+        k0 = self._crc(k0, byte)
+        k1 = ((k1 + (k0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        k2 = self._crc(k2, k1 >> 24)
+        self.keys = [k0, k1, k2]
+
+    def encrypt(self, data):
+        out = bytearray(len(data))
+        for i, byte in enumerate(data):
+            temp = (self.keys[2] | 2) & 0xFFFF
+            out[i] = byte ^ (((temp * (temp ^ 1)) >> 8) & 0xFF)
+            self._update(byte)
+        return bytes(out)
+
+
+def write_zip(path, name, data, password=None):
+    """写一个只含一个 deflate 条目的 zip，可选 ZipCrypto 加密"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    payload = compressor.compress(data) + compressor.flush()
+    crc = zlib.crc32(data)
+    flags = 0
+    if password is not None:
+        flags = 0x1
+        cipher = _ZipCrypto(password.encode("ascii"))
+        header = os.urandom(11) + bytes([crc >> 24])
+        payload = cipher.encrypt(header + payload)
+    name_bytes = name.encode("ascii")
+    local = struct.pack("<IHHHHHIIIHH", 0x04034B50, 20, flags, 8, 0, 0, crc, len(payload), len(data), len(name_bytes), 0)
+    central = struct.pack("<IHHHHHHIIIHHHHHII", 0x02014B50, 20, 20, flags, 8, 0, 0, crc, len(payload), len(data),
+                          len(name_bytes), 0, 0, 0, 0, 0, 0)
+    with open(path, 'wb') as f:
+        f.write(local + name_bytes + payload)
+        central_offset = f.tell()
+        f.write(central + name_bytes)
+        central_size = f.tell() - central_offset
+        f.write(struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, 1, 1, central_size, central_offset, 0))
+
+
+def timed(func, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_case(label, func, repeat):
+    elapsed, result = timed(func, repeat)
+    if not result:
+        print(f"  {label}: 结果异常 ({result})")
+        return None
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="进程内后端与 7z 命令行对比")
+    parser.add_argument("--7z", dest="sevenzip", default=None, help="7z 可执行文件路径，默认使用配置")
+    parser.add_argument("--sizes", default="16K,256K,2M,8M", help="解压后大小列表，逗号分隔")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    sevenzip_path = args.sevenzip or config.get("sevenzip_path")
+    handler = SevenZipHandler(sevenzip_path) if sevenzip_path and os.path.exists(sevenzip_path) else None
+    backend = ZipFileBackend()
+    work_dir = tempfile.mkdtemp(prefix="bench_backends_")
+    print(f"7z: {sevenzip_path if handler else '未找到，只测量进程内后端'}")
+    print(f"{'大小':>8} | {'操作':<10} | {'进程内 ms':>10} | {'7z ms':>10}")
+
+    crossover = {}
+    try:
+        for size_text in args.sizes.split(","):
+            size = parse_size(size_text)
+            data = make_payload(size)
+            plain_zip = os.path.join(work_dir, f"plain_{size}.zip")
+            crypt_zip = os.path.join(work_dir, f"crypt_{size}.zip")
+            write_zip(plain_zip, "data.txt", data)
+            write_zip(crypt_zip, "data.txt", data, PASSWORD)
+
+            if backend.verify_password(crypt_zip, PASSWORD + "x") is not False:
+                print("进程内后端没有拒绝错误密码!")
+                return 1
+            out_dir = os.path.join(work_dir, "out")
+
+            def extract_with(extract_func, archive, password):
+                def run():
+                    shutil.rmtree(out_dir, ignore_errors=True)
+                    return extract_func(archive, out_dir, password)
+                return run
+
+            cases = [
+                ("校验密码", lambda: backend.verify_password(crypt_zip, PASSWORD),
+                 (lambda: handler.test_password(crypt_zip, PASSWORD)) if handler else None),
+                ("解压", extract_with(backend.extract, plain_zip, None),
+                 extract_with(handler.extract, plain_zip, None) if handler else None),
+                ("加密解压", extract_with(backend.extract, crypt_zip, PASSWORD),
+                 extract_with(handler.extract, crypt_zip, PASSWORD) if handler else None),
+            ]
+            for label, inprocess, cli in cases:
+                inprocess_time = run_case(label, inprocess, args.repeat)
+                cli_time = run_case(label, cli, args.repeat) if cli else None
+                cli_text = f"{cli_time * 1000:10.1f}" if cli_time is not None else f"{'-':>10}"
+                inprocess_text = f"{inprocess_time * 1000:10.1f}" if inprocess_time is not None else f"{'-':>10}"
+                print(f"{size_text:>8} | {label:<10} | {inprocess_text} | {cli_text}")
+                if inprocess_time and cli_time and cli_time < inprocess_time and label not in crossover:
+                    crossover[label] = size_text
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if handler:
+        for label in ("校验密码", "解压", "加密解压"):
+            print(f"{label}: 7z 从 {crossover.get(label, '超过测试范围')} 开始更快")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+分卷组解析基准：在临时目录中生成合成的分卷文件，
+比较 VolumeResolver 一次扫描与逐个文件 VolumeSet.from_path 的耗时。
+
+用法: python benchmarks/bench_volume_resolver.py [--sets 500] [--volumes 20]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+source_dir = os.path.dirname(current_dir)
+if source_dir not in sys.path:
+    sys.path.insert(0, source_dir)
+
+from utils.file_utils import FileUtils
+from utils.volume_set import VolumeSet
+from utils.volume_resolver import VolumeResolver
+
+# 每种命名方式: 第 n 卷的文件名（n 从 0 开始）
+SCHEMES = {
+    "7z.NNN": lambda base, n: f"{base}.7z.{n + 1:03d}",
+    "partN.rar": lambda base, n: f"{base}.part{n + 1:02d}.rar",
+    "rar+rNN": lambda base, n: f"{base}.rar" if n == 0 else f"{base}.r{n - 1:02d}",
+    "zNN+zip": lambda base, n: f"{base}.z{n + 1:02d}",
+    "bare.NNN": lambda base, n: f"{base}.{n + 1:03d}",
+}
+
+
+def make_tree(root, sets, volumes, gap_every=10):
+    """生成 sets 个分卷组，每组 volumes 卷；每 gap_every 组删掉中间一卷制造缺卷"""
+    names = list(SCHEMES)
+    expected_gaps = 0
+    for i in range(sets):
+        scheme = names[i % len(names)]
+        base = f"set{i:05d}"
+        files = [SCHEMES[scheme](base, n) for n in range(volumes)]
+        if scheme == "zNN+zip":
+            files[-1] = f"{base}.zip"
+        if gap_every and i % gap_every == gap_every - 1 and volumes > 2:
+            del files[volumes // 2]
+            expected_gaps += 1
+        for name in files:
+            with open(os.path.join(root, name), 'wb') as f:
+                f.write(b"\0" * 16)
+        # 混入一些无关文件
+        with open(os.path.join(root, base + ".nfo"), 'wb') as f:
+            f.write(b"nfo")
+    return expected_gaps
+
+
+def legacy_resolve(root):
+    """旧做法：对每个压缩文件单独 glob / exists 找到它的分卷组"""
+    claimed = set()
+    volume_sets = []
+    for name in sorted(os.listdir(root)):
+        if not FileUtils.is_archive(name):
+            continue
+        path = os.path.join(root, name)
+        if path in claimed:
+            continue
+        volume_set = VolumeSet.from_path(path)
+        claimed.update(volume_set.volumes)
+        volume_sets.append(volume_set)
+    return volume_sets
+
+
+def timed(func, *args, repeat=3):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分卷组解析基准")
+    parser.add_argument("--sets", type=int, default=500, help="分卷组数量")
+    parser.add_argument("--volumes", type=int, default=20, help="每组分卷数")
+    parser.add_argument("--skip-legacy", action="store_true", help="不运行旧做法（文件很多时很慢）")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench_volumes_")
+    try:
+        expected_gaps = make_tree(root, args.sets, args.volumes)
+        file_count = len(os.listdir(root))
+        print(f"目录: {root}  文件数: {file_count}  分卷组: {args.sets}  每组: {args.volumes} 卷")
+
+        elapsed, volume_sets = timed(VolumeResolver.scan, root)
+        gaps = sum(1 for vs in volume_sets if vs.has_gaps)
+        print(f"VolumeResolver.scan: {elapsed * 1000:.1f} ms, {len(volume_sets)} 组, {gaps} 组缺卷 (预期 {expected_gaps})")
+        if len(volume_sets) != args.sets or gaps != expected_gaps:
+            print("结果与预期不符!")
+            return 1
+
+        if not args.skip_legacy:
+            elapsed_legacy, legacy_sets = timed(legacy_resolve, root, repeat=1)
+            print(f"逐个文件 from_path: {elapsed_legacy * 1000:.1f} ms, {len(legacy_sets)} 组")
+            if elapsed:
+                print(f"加速: {elapsed_legacy / elapsed:.1f}x")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
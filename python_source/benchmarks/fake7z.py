@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+基准测试用的 7z 替身程序：不需要安装 7-Zip，任何装有 Python 的 Linux 机器上都能运行。
+“压缩包”是一个 JSON 文件（分卷时为第一卷，后续分卷只是填充数据），格式见 synthetic.make_archive：
+    {"fake7z": 1, "password": "...", "header_encrypted": false,
+     "entries": [{"path": "a.txt", "size": 1024}, ...],
+     "error": null, "latency": 0.0, "check_latency": 0.0, "mbps": 0, "progress_interval": 0.05}
+
+模拟的行为：
+- i / 不带参数: 版本、格式和开关列表（供 SevenZipProbe 探测）
+- l [-slt]: 目录列表；文件头加密且密码不对时报 "Can not open encrypted archive. Wrong password?"
+- t: 校验密码（每次额外等待 check_latency 秒），可只测试指定条目
+- x: 按条目大小写出文件，-bsp1 时输出与 7z 相同格式的进度（退格覆盖）
+- e -so: 把条目内容写到 stdout
+- error 不为空时 t/x/e 以 "ERROR: <error>" 失败（如 "CRC Failed : a.txt"）
+
+环境变量（压缩包中的同名字段优先）：
+    FAKE7Z_LATENCY            每次调用的启动延迟（秒）
+    FAKE7Z_CHECK_LATENCY      每次密码校验的额外耗时（秒）
+    FAKE7Z_MBPS               解压吞吐上限（MB/s），0 表示不限
+    FAKE7Z_PROGRESS_INTERVAL  进度输出的最短间隔（秒）
+    FAKE7Z_LOG                追加记录每次调用的命令行
+"""
+import os
+import sys
+import json
+import time
+
+VERSION_TEXT = "7-Zip (a) 23.01 (x64) : Copyright (c) 1999-2023 Igor Pavlov : 2023-06-20"
+
+HELP_TEXT = VERSION_TEXT + """
+
+Usage: 7z <command> [<switches>...] <archive_name> [<file_names>...] [@listfile]
+
+<Commands>
+  e : Extract files from archive (without using directory names)
+  i : Show information about supported formats
+  l : List contents of archive
+  t : Test integrity of archive
+  x : eXtract files with full paths
+
+<Switches>
+  -- : Stop switches and @listfile parsing
+  -bd : disable progress indicator
+  -bs{o|e|p}{0|1|2} : set output stream for output/error/progress line
+  -o{Directory} : set Output directory
+  -p{Password} : set Password
+  -scc{UTF-8|WIN|DOS} : set charset for console input/output
+  -scs{UTF-8|UTF-16LE|UTF-16BE|WIN|DOS|{id}} : set charset for list files
+  -slt : show technical information for l (List) command
+  -so : write data to stdout
+  -spd : disable wildcard matching for file names
+  -y : assume Yes on all queries
+"""
+
+INFO_TEXT = VERSION_TEXT + """
+
+Formats:
+ ...........   7z       7z
+ ...........   zip      zip
+ ...........   Split    001
+
+Codecs:
+ 0    ED  40301 7zAES
+ 0    ED  21    LZMA2
+"""
+
+BLOCK = b"x" * (1 << 20)
+
+
+def _option(archive, key, env, default):
+    if archive.get(key) is not None:
+        return archive[key]
+    value = os.environ.get(env)
+    return float(value) if value else default
+
+
+def parse_args(args):
+    """返回 (命令, 开关字典, 位置参数)"""
+    command = args[0] if args else None
+    switches = {}
+    positional = []
+    stop = False
+    for arg in args[1:]:
+        if not stop and arg == "--":
+            stop = True
+        elif not stop and arg.startswith("-") and len(arg) > 1:
+            for name in ("p", "o", "bsp", "bso", "bse", "scc", "scs"):
+                if arg.startswith("-" + name) and name not in switches:
+                    switches[name] = arg[len(name) + 1:]
+                    break
+            else:
+                switches[arg[1:]] = ""
+        else:
+            positional.append(arg)
+    return command, switches, positional
+
+
+def selected_entries(archive, names):
+    """按命令行中的条目名和 @listfile 筛选（-spd 字面匹配，包含目录下的文件）"""
+    wanted = []
+    for name in names:
+        if name.startswith("@"):
+            with open(name[1:], 'r', encoding='utf-8-sig') as f:
+                wanted.extend(line.strip() for line in f if line.strip())
+        else:
+            wanted.append(name)
+    if not wanted:
+        return archive["entries"]
+    wanted = {w.replace("\\", "/").strip("/") for w in wanted}
+    selected = []
+    for entry in archive["entries"]:
+        parts = entry["path"].split("/")
+        if any("/".join(parts[:i]) in wanted for i in range(1, len(parts) + 1)):
+            selected.append(entry)
+    return selected
+
+
+def error(message, switches, code=2):
+    """错误信息：有 -bse1 时写到 stdout，否则写到 stderr"""
+    stream = sys.stdout if switches.get("bse") == "1" else sys.stderr
+    stream.write(message + "\n")
+    stream.flush()
+    return code
+
+
+def list_archive(path, archive, password_ok, switches):
+    if archive.get("header_encrypted") and not password_ok:
+        sys.stdout.write(f"\nERROR: {path}\nCan not open encrypted archive. Wrong password?\n")
+        return 2
+    encrypted = archive.get("password") is not None
+    method = "LZMA2:24 7zAES:19" if encrypted else "LZMA2:24"
+    lines = ["", "--", f"Path = {path}", "Type = 7z", f"Physical Size = {os.path.getsize(path)}", "", "----------"]
+    for entry in archive["entries"]:
+        lines += [
+            f"Path = {entry['path']}",
+            f"Size = {entry['size']}",
+            f"Packed Size = {entry['size']}",
+            "CRC = 1234ABCD",
+            f"Encrypted = {'+' if encrypted else '-'}",
+            f"Method = {method}",
+            "Attributes = A",
+            ""
+        ]
+    sys.stdout.write("\n".join(lines) + "\n")
+    return 0
+
+
+class _Progress:
+    """按 7z -bsp1 的格式输出进度：" 45% 12M 3 - name"，用退格覆盖上一次的输出"""
+
+    def __init__(self, total, enabled, interval):
+        self.total = max(1, total)
+        self.enabled = enabled
+        self.interval = interval
+        self._last = 0.0
+        self._width = 0
+
+    def update(self, done, files, name, force=False):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if not force and now - self._last < self.interval:
+            return
+        self._last = now
+        text = f"{done * 100 // self.total:3d}% {done >> 20}M {files} - {name}"
+        sys.stdout.write("\b" * self._width + text)
+        sys.stdout.flush()
+        self._width = len(text)
+
+
+def write_entries(archive, entries, command, switches):
+    """写出条目内容（x 写文件，e -so 写 stdout），按 mbps 限速并输出进度"""
+    mbps = _option(archive, "mbps", "FAKE7Z_MBPS", 0.0)
+    interval = _option(archive, "progress_interval", "FAKE7Z_PROGRESS_INTERVAL", 0.05)
+    to_stdout = command == "e" and "so" in switches
+    output_dir = switches.get("o") or "."
+    total = sum(entry["size"] for entry in entries)
+    progress = _Progress(total, switches.get("bsp") == "1" and not to_stdout, interval)
+    started = time.monotonic()
+    done = 0
+    for files, entry in enumerate(entries):
+        if to_stdout:
+            target = sys.stdout.buffer
+        else:
+            path = os.path.join(output_dir, entry["path"])
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            target = open(path, 'wb')
+        try:
+            remaining = entry["size"]
+            while remaining > 0:
+                chunk = BLOCK[:min(remaining, len(BLOCK))]
+                target.write(chunk)
+                remaining -= len(chunk)
+                done += len(chunk)
+                if mbps:
+                    # 超前于限速时等待
+                    ahead = done / (mbps * 1024 * 1024) - (time.monotonic() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+                progress.update(done, files, entry["path"])
+        finally:
+            if not to_stdout:
+                target.close()
+        progress.update(done, files + 1, entry["path"], force=files == len(entries) - 1)
+    if to_stdout:
+        sys.stdout.buffer.flush()
+    elif switches.get("bso") != "0":
+        sys.stdout.write("\nEverything is Ok\n")
+    return 0
+
+
+def main(args):
+    log_file = os.environ.get("FAKE7Z_LOG")
+    if log_file:
+        with open(log_file, 'a', encoding='utf-8') as f:
+            f.write(" ".join(args) + "\n")
+
+    command, switches, positional = parse_args(args)
+    if command is None:
+        sys.stdout.write(HELP_TEXT)
+        return 0
+    if command == "i":
+        sys.stdout.write(INFO_TEXT)
+        return 0
+    if command not in ("l", "t", "x", "e") or not positional:
+        return error("Command Line Error: Unsupported command", switches, 7)
+
+    path = positional[0]
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            archive = json.load(f)
+        if archive.get("fake7z") != 1:
+            raise ValueError(path)
+    except Exception:
+        return error(f"ERROR: {path}\nCan not open the file as archive", switches)
+
+    time.sleep(_option(archive, "latency", "FAKE7Z_LATENCY", 0.0))
+    expected = archive.get("password")
+    password_ok = expected is None or switches.get("p") == expected
+
+    if command == "l":
+        return list_archive(path, archive, password_ok, switches)
+
+    entries = selected_entries(archive, positional[1:])
+    if expected is not None:
+        time.sleep(_option(archive, "check_latency", "FAKE7Z_CHECK_LATENCY", 0.0))
+    if archive.get("header_encrypted") and not password_ok:
+        return error("Can not open encrypted archive. Wrong password?", switches)
+    if archive.get("error"):
+        return error(f"ERROR: {archive['error']}", switches)
+    if not entries:
+        return error("No files to process", switches, 1)
+    if not password_ok:
+        return error(f"ERROR: Data Error in encrypted file. Wrong password? : {entries[0]['path']}", switches)
+    if command == "t":
+        sys.stdout.write("Everything is Ok\n")
+        return 0
+    return write_entries(archive, entries, command, switches)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
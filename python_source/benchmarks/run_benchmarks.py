@@ -0,0 +1,366 @@
+"""
+可复现的基准套件：用合成数据和 fake7z 替身程序（不需要安装 7-Zip）测量
+- password_entry / password_header: extract_with_passwords 的密码尝试速度（candidates/s）
+- batch: JobQueue 批量解压的速度（archives/s），以及界面回调频率（callbacks/s、每个压缩包的回调数、每个节拍合并后的界面更新数）
+- extract: 解压吞吐（MB/s，替身程序不限速时主要是流程与写盘开销）
+- progress: ProgressReader 解析 7z 进度输出的速度（MB/s）
+- volumes: VolumeResolver 扫描大量分卷组的速度（sets/s）
+结果与 baseline.json 对比，任一指标比基线差 --tolerance 以上时退出码为 1。
+fake7z 的启动延迟和密码校验耗时可以用 --latency / --check-latency 调整，模拟较慢的 7z 或磁盘。
+基线与机器相关，应在同一台机器上用 --update-baseline 记录后再比较。
+
+用法: python benchmarks/run_benchmarks.py [--cases password_entry,batch] [--update-baseline] [--output result.json]
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import threading
+from contextlib import redirect_stdout
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+source_dir = os.path.dirname(current_dir)
+for path in (source_dir, current_dir):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from core.extractor import ExtractorEngine
+from core.job_queue import JobQueue, JOB_DONE
+from core.metrics import PHASE_PASSWORD, PHASE_EXTRACT
+from core.process_slots import process_slots
+from core.progress_reader import ProgressReader
+from core.simple_password_manager import SimplePasswordManager
+from gui.ui_event_queue import UIEventQueue
+from utils.volume_resolver import VolumeResolver
+from synthetic import Workspace, install_fake7z, make_archive, make_entries, make_password_book, make_batch, make_volume_tree
+
+DEFAULT_BASELINE = os.path.join(current_dir, "baseline.json")
+CASES = ("password_entry", "password_header", "batch", "extract", "progress", "volumes")
+PASSWORD = "bench-password"
+# 与 gui.main_window.UI_TICK_MS 相同的界面节拍
+UI_TICK_SECONDS = 0.05
+
+
+class Quiet:
+    """屏蔽被测代码的 print（工作线程中的输出同样屏蔽），--verbose 时不屏蔽"""
+
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+        self._redirect = None
+
+    def __enter__(self):
+        if not self.verbose:
+            self._redirect = redirect_stdout(io.StringIO())
+            self._redirect.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._redirect is not None:
+            self._redirect.__exit__(exc_type, exc, tb)
+        return False
+
+
+def make_engine(sevenzip, passwords_file, args):
+    return ExtractorEngine(sevenzip, SimplePasswordManager(passwords_file), max_workers=args.workers)
+
+
+def bench_password(args, header_encrypted):
+    """密码本中正确密码排在最后，测量每秒尝试的候选密码数"""
+    with Workspace("bench_password_") as ws:
+        sevenzip = install_fake7z(ws.path)
+        archive = os.path.join(ws.path, "encrypted.7z")
+        make_archive(archive, make_entries(4, 4096), password=PASSWORD, header_encrypted=header_encrypted)
+        passwords_file = make_password_book(os.path.join(ws.path, "passwords.txt"), args.book_size, PASSWORD)
+        engine = make_engine(sevenzip, passwords_file, args)
+        with Quiet(args.verbose):
+            start = time.perf_counter()
+            result, password = engine.extract_with_passwords(archive, ws.subdir("out"))
+            elapsed = time.perf_counter() - start
+        if not result or password != PASSWORD:
+            raise RuntimeError(f"没有找到密码: {result!r}")
+        tried = engine.metrics.aggregate()["phases"][PHASE_PASSWORD]["count"]
+        return {
+            "candidates_per_s": tried / elapsed,
+            "candidates": tried,
+            "seconds": elapsed
+        }
+
+
+def bench_batch(args):
+    """一批未加密的压缩包（含分卷组）交给 JobQueue，按界面的方式把事件放入 UIEventQueue 并定时取出"""
+    with Workspace("bench_batch_") as ws:
+        sevenzip = install_fake7z(ws.path)
+        source = ws.subdir("archives")
+        archives, total_bytes = make_batch(source, args.archives)
+        engine = make_engine(sevenzip, make_password_book(os.path.join(ws.path, "passwords.txt"), 10), args)
+
+        ui_events = UIEventQueue()
+        counters = {"callbacks": 0, "drains": 0, "updates": 0}
+        counter_lock = threading.Lock()
+
+        def on_event(job, event_type, message):
+            with counter_lock:
+                counters["callbacks"] += 1
+            if event_type == "state":
+                ui_events.put_state(job, message)
+            elif event_type == "progress":
+                ui_events.put_progress(job, message)
+            elif event_type == "status":
+                ui_events.put_status(message)
+            else:
+                ui_events.put_log(f"[{job.job_id}] {message}")
+
+        def drain():
+            states, progress, status, logs, _ = ui_events.drain()
+            counters["drains"] += 1
+            counters["updates"] += len(states) + len(progress) + (status is not None) + len(logs)
+
+        stop = threading.Event()
+
+        def ui_loop():
+            while not stop.wait(UI_TICK_SECONDS):
+                drain()
+
+        job_queue = JobQueue(engine, args.parallel, on_event, ws.subdir("out"))
+        ui_thread = threading.Thread(target=ui_loop, daemon=True)
+        with Quiet(args.verbose):
+            ui_thread.start()
+            start = time.perf_counter()
+            jobs = job_queue.add_paths([source])
+            job_queue.wait()
+            elapsed = time.perf_counter() - start
+            stop.set()
+            ui_thread.join()
+            drain()
+            job_queue.shutdown()
+        done = sum(1 for job in jobs if job.state == JOB_DONE)
+        if done != archives:
+            raise RuntimeError(f"只完成了 {done}/{archives} 个任务")
+        return {
+            "archives_per_s": done / elapsed,
+            "mb_per_s": total_bytes / (1024 * 1024) / elapsed,
+            "callbacks_per_s": counters["callbacks"] / elapsed,
+            "callbacks_per_archive": counters["callbacks"] / done,
+            "ui_updates_per_tick": counters["updates"] / max(1, counters["drains"]),
+            "archives": done,
+            "seconds": elapsed
+        }
+
+
+def bench_extract(args):
+    """一个较大的未加密压缩包，测量解压阶段的吞吐和进度事件数"""
+    with Workspace("bench_extract_") as ws:
+        sevenzip = install_fake7z(ws.path)
+        archive = os.path.join(ws.path, "big.7z")
+        total_bytes = args.extract_mb * 1024 * 1024
+        make_archive(archive, make_entries(8, total_bytes))
+        engine = make_engine(sevenzip, make_password_book(os.path.join(ws.path, "passwords.txt"), 10), args)
+        events = []
+
+        def status_callback(event_type, message):
+            if event_type == "progress":
+                events.append(message)
+
+        with Quiet(args.verbose):
+            result, _ = engine.extract_with_passwords(archive, ws.subdir("out"), status_callback)
+        if not result:
+            raise RuntimeError(f"解压失败: {result!r}")
+        seconds = engine.metrics.aggregate()["phases"][PHASE_EXTRACT]["seconds"]
+        return {
+            "mb_per_s": total_bytes / (1024 * 1024) / seconds,
+            "progress_events": len(events),
+            "seconds": seconds
+        }
+
+
+def make_progress_output(lines):
+    """与 7z -bsp1 相同格式的输出：退格覆盖的进度行，夹杂少量普通文本"""
+    chunks = []
+    previous = 0
+    for i in range(lines):
+        text = f"{i * 100 // lines:3d}% {i >> 4}M {i // 50} - dir{i // 500:03d}/file{i // 50:05d}.bin".encode()
+        chunks.append(b"\b" * previous + text)
+        previous = len(text)
+        if i % 1000 == 999:
+            chunks.append(b"\nWARNING: synthetic warning line\n")
+    return b"".join(chunks)
+
+
+def bench_progress(args):
+    data = make_progress_output(args.progress_lines)
+    chunk_size = 64 * 1024
+    best = None
+    events = 0
+    for _ in range(3):
+        emitted = []
+        reader = ProgressReader(emitted.append, min_interval=0)
+        start = time.perf_counter()
+        for offset in range(0, len(data), chunk_size):
+            reader.feed(data[offset:offset + chunk_size])
+        reader.close()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best, events = elapsed, len(emitted)
+    return {
+        "mb_per_s": len(data) / (1024 * 1024) / best,
+        "lines_per_s": args.progress_lines / best,
+        "events": events
+    }
+
+
+def bench_volumes(args):
+    with Workspace("bench_volumes_") as ws:
+        expected_gaps = make_volume_tree(ws.path, args.sets, args.volumes)
+        best = None
+        volume_sets = []
+        for _ in range(3):
+            start = time.perf_counter()
+            volume_sets = VolumeResolver.scan(ws.path)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        gaps = sum(1 for vs in volume_sets if vs.has_gaps)
+        if len(volume_sets) != args.sets or gaps != expected_gaps:
+            raise RuntimeError(f"分卷组解析结果不符: {len(volume_sets)} 组, {gaps} 组缺卷")
+        return {
+            "sets_per_s": args.sets / best,
+            "files": args.sets * args.volumes,
+            "seconds": best
+        }
+
+
+RUNNERS = {
+    "password_entry": lambda args: bench_password(args, header_encrypted=False),
+    "password_header": lambda args: bench_password(args, header_encrypted=True),
+    "batch": bench_batch,
+    "extract": bench_extract,
+    "progress": bench_progress,
+    "volumes": bench_volumes,
+}
+
+# 参与基线对比的指标: (名称, 是否越大越好)，其余字段只作参考。
+# 界面回调按每个压缩包计算，与解压速度无关，越少界面越轻松
+COMPARED = {
+    "password_entry": (("candidates_per_s", True),),
+    "password_header": (("candidates_per_s", True),),
+    "batch": (("archives_per_s", True), ("callbacks_per_archive", False)),
+    "extract": (("mb_per_s", True),),
+    "progress": (("mb_per_s", True),),
+    "volumes": (("sets_per_s", True),),
+}
+
+
+def compare(results, baseline, tolerance):
+    """返回 [(指标, 当前值, 基线值, 变化比例, 是否退化)]"""
+    rows = []
+    for case, metrics in results.items():
+        for name, higher_is_better in COMPARED.get(case, ()):
+            key = f"{case}.{name}"
+            current = metrics[name]
+            reference = baseline.get(key)
+            if not reference:
+                rows.append((key, current, None, None, False))
+                continue
+            change = current / reference - 1
+            regressed = change < -tolerance if higher_is_better else change > tolerance
+            rows.append((key, current, reference, change, regressed))
+    return rows
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}, {}
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data.get("metrics", {}), data.get("params", {})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="可复现的基准套件（使用 fake7z 替身程序）")
+    parser.add_argument("--cases", default=",".join(CASES), help=f"要运行的项目，逗号分隔: {','.join(CASES)}")
+    parser.add_argument("--book-size", type=int, default=200, help="密码本行数（正确密码在最后）")
+    parser.add_argument("--workers", type=int, default=4, help="并行校验密码的 7z 进程数")
+    parser.add_argument("--archives", type=int, default=40, help="批量解压的压缩包数")
+    parser.add_argument("--parallel", type=int, default=2, help="同时解压的任务数")
+    parser.add_argument("--extract-mb", type=int, default=256, help="解压吞吐测试的数据量（MB）")
+    parser.add_argument("--progress-lines", type=int, default=200000, help="进度解析测试的进度行数")
+    parser.add_argument("--sets", type=int, default=2000, help="分卷组数量")
+    parser.add_argument("--volumes", type=int, default=5, help="每组分卷数")
+    parser.add_argument("--latency", type=float, default=0.0, help="替身 7z 每次调用的启动延迟（秒）")
+    parser.add_argument("--check-latency", type=float, default=0.0, help="替身 7z 每次密码校验的额外耗时（秒）")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线文件")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的退化比例")
+    parser.add_argument("--update-baseline", action="store_true", help="把本次结果写入基线文件")
+    parser.add_argument("--output", help="把本次结果写入 JSON 文件")
+    parser.add_argument("--verbose", action="store_true", help="显示被测代码的输出")
+    args = parser.parse_args()
+
+    if os.name == "nt":
+        print("fake7z 替身程序需要 POSIX shell，请在 Linux/macOS 上运行")
+        return 1
+    cases = [c.strip() for c in args.cases.split(",") if c.strip()]
+    unknown = [c for c in cases if c not in RUNNERS]
+    if unknown:
+        print(f"未知的项目: {', '.join(unknown)}")
+        return 1
+
+    os.environ["FAKE7Z_LATENCY"] = str(args.latency)
+    os.environ["FAKE7Z_CHECK_LATENCY"] = str(args.check_latency)
+    # 进程名额默认按 CPU 核数，不同机器结果不可比；这里固定为密码校验的并行数
+    process_slots.set_limit(max(args.workers, args.parallel))
+    params = {key: value for key, value in vars(args).items()
+              if key not in ("cases", "baseline", "tolerance", "update_baseline", "output", "verbose")}
+
+    results = {}
+    for case in cases:
+        print(f"运行 {case} ...", flush=True)
+        try:
+            results[case] = RUNNERS[case](args)
+        except Exception as e:
+            print(f"{case} 失败: {e}")
+            return 1
+        details = ", ".join(f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}" for k, v in results[case].items())
+        print(f"  {details}")
+
+    baseline, baseline_params = load_baseline(args.baseline)
+    if baseline_params and baseline_params != params:
+        changed = sorted(k for k in set(params) | set(baseline_params) if params.get(k) != baseline_params.get(k))
+        print(f"注意: 参数与基线不同（{', '.join(changed)}），对比仅供参考")
+
+    regressions = 0
+    print(f"\n{'指标':<34}{'本次':>10}{'基线':>10}{'变化':>8}")
+    for key, current, reference, change, regressed in compare(results, baseline, args.tolerance):
+        reference_text = f"{reference:.2f}" if reference else "-"
+        change_text = f"{change:+.1%}" if change is not None else "-"
+        print(f"{key:<36}{current:>12.2f}{reference_text:>12}{change_text:>10}{'  退化!' if regressed else ''}")
+        regressions += regressed
+
+    report = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "machine": f"{platform.system()} {platform.machine()} Python {platform.python_version()} ({os.cpu_count()} CPU)",
+        "params": params,
+        "metrics": {f"{case}.{name}": round(metrics[name], 3) for case, metrics in results.items() for name, _ in COMPARED[case]},
+        "results": results
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if args.update_baseline:
+        if baseline:
+            # 只运行了部分项目时保留其他项目的基线
+            report["metrics"] = {**baseline, **report["metrics"]}
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({key: report[key] for key in ("created", "machine", "params", "metrics")}, f, indent=2, ensure_ascii=False)
+        print(f"\n基线已更新: {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"\n{regressions} 项指标比基线差 {args.tolerance:.0%} 以上")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
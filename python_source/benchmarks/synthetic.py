@@ -0,0 +1,131 @@
+"""
+基准测试的合成数据：fake7z 可读取的“压缩包”（单个文件或分卷组）、密码本和大量分卷组的目录。
+所有函数只写入调用方给出的目录。
+"""
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from bench_volume_resolver import make_tree
+
+FAKE7Z_SCRIPT = os.path.join(current_dir, "fake7z.py")
+
+
+def install_fake7z(directory):
+    """
+    在 directory 中生成可执行的 7z 包装脚本（用当前解释器运行 fake7z.py），返回其路径。
+    不直接使用 fake7z.py：检出后可能没有执行权限，shebang 中的 python3 也可能不是当前解释器
+    """
+    path = os.path.join(directory, "7z")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE7Z_SCRIPT}" "$@"\n')
+    os.chmod(path, 0o755)
+    return path
+
+
+def make_entries(count, total_size, prefix="file"):
+    """count 个条目，总大小约为 total_size 字节，每 10 个放在一个子目录中"""
+    size = total_size // max(1, count)
+    return [{"path": f"dir{i // 10:03d}/{prefix}{i:05d}.bin", "size": size} for i in range(count)]
+
+
+def make_archive(path, entries, password=None, header_encrypted=False, error=None, volumes=1, volume_size=4096, **options):
+    """
+    写入一个 fake7z 压缩包，返回所有分卷的路径
+    Args:
+        entries: [{"path", "size"}]
+        volumes: 大于 1 时 path 应以 .001 结尾，按 7z 的命名生成 .002、.003 ...
+        volume_size: 分卷大小（第一卷的 JSON 用空格补齐到该大小，最后一卷小一些）
+        options: latency / check_latency / mbps / progress_interval，覆盖环境变量
+    """
+    archive = {
+        "fake7z": 1,
+        "password": password,
+        "header_encrypted": header_encrypted,
+        "entries": entries,
+        "error": error
+    }
+    archive.update({key: value for key, value in options.items() if value is not None})
+    data = json.dumps(archive, ensure_ascii=False).encode("utf-8")
+    if volumes <= 1:
+        with open(path, 'wb') as f:
+            f.write(data)
+        return [path]
+
+    if len(data) > volume_size:
+        volume_size = len(data)
+    base = path[:-4]
+    paths = []
+    for n in range(1, volumes + 1):
+        volume_path = f"{base}.{n:03d}"
+        with open(volume_path, 'wb') as f:
+            if n == 1:
+                f.write(data + b" " * (volume_size - len(data)))
+            else:
+                f.write(b"\0" * (volume_size if n < volumes else volume_size // 2))
+        paths.append(volume_path)
+    return paths
+
+
+def make_password_book(path, size, password=None, position=None):
+    """
+    生成 size 行的密码本；password 放在第 position 个（从 0 开始，默认最后一个），
+    password 为 None 时不包含正确密码
+    """
+    position = size - 1 if position is None else min(position, size - 1)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(size):
+            f.write((password if password is not None and i == position else f"candidate-{i:07d}") + "\n")
+    return path
+
+
+def make_batch(root, archives, volume_every=4, volumes=3, entries=4, entry_size=64 * 1024):
+    """
+    批量解压用的目录：archives 个未加密压缩包，每 volume_every 个中有一个是分卷组
+    返回 (压缩包数, 总字节数)
+    """
+    total = 0
+    for i in range(archives):
+        items = make_entries(entries, entries * entry_size)
+        if volume_every and i % volume_every == volume_every - 1:
+            make_archive(os.path.join(root, f"batch{i:05d}.7z.001"), items, volumes=volumes)
+        else:
+            make_archive(os.path.join(root, f"batch{i:05d}.7z"), items)
+        total += sum(item["size"] for item in items)
+    return archives, total
+
+
+def make_volume_tree(root, sets, volumes, gap_every=10):
+    """大量分卷组（多种命名方式，部分缺卷）的目录，返回预期的缺卷组数"""
+    return make_tree(root, sets, volumes, gap_every)
+
+
+class Workspace:
+    """
+    临时工作目录，退出时删除：
+    with Workspace() as ws:
+        sevenzip = install_fake7z(ws.path)
+    """
+
+    def __init__(self, prefix="bench_"):
+        self.prefix = prefix
+        self.path = None
+
+    def __enter__(self):
+        self.path = tempfile.mkdtemp(prefix=self.prefix)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        shutil.rmtree(self.path, ignore_errors=True)
+        return False
+
+    def subdir(self, name):
+        path = os.path.join(self.path, name)
+        os.makedirs(path, exist_ok=True)
+        return path
@@ -0,0 +1,331 @@
+"""
+命令行批量解压入口（无界面，适合服务器和定时任务）
+
+用法示例:
+    python cli.py D:/downloads "E:/inbox/*.rar" -p passwords.txt -j 4 -o E:/extracted
+    python cli.py --watch E:/inbox -o E:/extracted      # 监视文件夹，自动解压下载完成的压缩包
+    python cli.py D:/big.7z --include "*.nfo" --exclude "samples/"    # 只解压部分文件
+    python cli.py D:/big.7z --stream docs/manifest.json | jq .        # 单个文件直接输出到标准输出
+    python cli.py D:/downloads --metrics --metrics-prom /var/lib/node_exporter/extractor.prom   # 各阶段耗时
+    python cli.py D:/big.rar --wordlist rockyou.txt --mask "?d?d?d?d" --rules capitalize,years   # 更多候选密码
+
+进度以 JSON Lines 的形式输出到标准输出，每行一个事件（--stream 时改为输出到标准错误）；
+其余调试输出重定向到标准错误。本模块不导入 tkinter / tkinterdnd2。
+Ctrl+C 取消所有任务并终止正在运行的 7z（监视模式下第一次 Ctrl+C 只停止监视）。
+
+退出码:
+    0  全部解压成功
+    1  部分或全部压缩包解压失败或被取消
+    2  参数错误或没有找到压缩包
+    3  未找到 7-Zip
+"""
+import sys
+import os
+import glob
+import json
+import time
+import argparse
+import threading
+
+# 处理路径问题，确保可以从子目录导入
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from utils.config import config
+from core.simple_password_manager import SimplePasswordManager
+from core.extractor import ExtractorEngine
+from core.archive_index import ArchiveIndex
+from core.process_slots import process_slots
+from core.sevenzip_probe import sevenzip_probe
+from core.backends import BackendPolicy
+from core.job_queue import JobQueue, JOB_DONE, JOB_FAILED, JOB_CANCELLED
+from core.watcher import FolderWatcher
+from core.entry_selection import EntrySelection
+from core.candidates import MaskSource, RULES
+from core.watchdog import CancelToken
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_NO_SEVENZIP = 3
+
+
+class JsonLinesWriter:
+    """线程安全的 JSON Lines 事件输出"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        record = {"event": event, "time": round(time.time(), 3)}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="基于 7-Zip 的批量解压工具（命令行版）")
+    parser.add_argument("paths", nargs="+", help="压缩文件、通配符或目录（目录会递归查找压缩包）")
+    parser.add_argument("-p", "--passwords", help="密码本文件（.txt，每行一个密码），默认使用配置中的密码本")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="同时解压的压缩包数量")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="每个压缩包并行校验密码的 7z 进程数")
+    parser.add_argument("-o", "--output", help="输出根目录，默认解压到压缩包所在目录的同名文件夹")
+    parser.add_argument("--7z", dest="sevenzip", help="7z 可执行文件路径")
+    parser.add_argument("--inprocess-max-mb", type=float, default=None, help="不超过该大小（MB）的 zip/7z 在进程内处理，0 表示总是使用 7z")
+    parser.add_argument("--watch", action="store_true", help="监视给定的目录，持续解压新到达的压缩包（Ctrl+C 停止）")
+    parser.add_argument("--settle", type=float, default=None, help="监视模式下文件大小多少秒不变才开始解压")
+    parser.add_argument("--include", action="append", default=[], metavar="PATTERN",
+                        help="只解压匹配的文件或目录（通配符，可多次指定），如 *.nfo、docs/")
+    parser.add_argument("--exclude", action="append", default=[], metavar="PATTERN", help="不解压匹配的文件或目录（可多次指定）")
+    parser.add_argument("--entries", metavar="LIST_FILE", help="只解压列表文件中的条目（UTF-8，每行一个压缩包内路径）")
+    parser.add_argument("--stream", metavar="ENTRY", help="把单个压缩包中的一个条目输出到标准输出，不写入磁盘")
+    parser.add_argument("--metrics", action="store_true", help="输出每个压缩包和总体的分阶段耗时统计")
+    parser.add_argument("--metrics-jsonl", metavar="PATH", help="结束时把每个阶段的计时记录写入 JSON Lines 文件")
+    parser.add_argument("--metrics-prom", metavar="PATH", help="把按阶段汇总的指标写入 Prometheus 文本文件（每个任务结束时更新）")
+    parser.add_argument("--wordlist", action="append", default=[], metavar="PATH", help="在密码本之后逐行尝试的字典文件（可多次指定）")
+    parser.add_argument("--mask", action="append", default=[], metavar="MASK",
+                        help="在最后尝试的掩码，如 ?d?d?d?d（?l 小写 ?u 大写 ?d 数字 ?s 符号 ?a 全部，可多次指定）")
+    parser.add_argument("--rules", metavar="LIST", help=f"应用到密码本的变形规则，逗号分隔: {','.join(RULES)}")
+    parser.add_argument("--no-name-candidates", action="store_true", help="不尝试由压缩包文件名推测的密码")
+    return parser
+
+
+def build_candidates(args):
+    """命令行指定的候选来源追加在配置之后；规则以命令行为准"""
+    rules = [r.strip() for r in args.rules.split(",") if r.strip()] if args.rules is not None else config.get("candidate_rules")
+    return {
+        "wordlists": list(config.get("candidate_wordlists") or []) + args.wordlist,
+        "masks": list(config.get("candidate_masks") or []) + args.mask,
+        "rules": rules or [],
+        "archive_names": config.get("candidate_archive_names") and not args.no_name_candidates
+    }
+
+
+def build_selection(args):
+    """由 --include/--exclude/--entries 构造条目筛选，未指定时返回 None"""
+    if args.entries:
+        selection = EntrySelection.from_list_file(args.entries, args.include, args.exclude)
+    else:
+        selection = EntrySelection(args.include, args.exclude)
+    return None if selection.selects_all else selection
+
+
+def expand_paths(patterns):
+    """展开通配符（Windows 的 cmd 不会替我们展开）"""
+    paths = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            paths.extend(sorted(glob.glob(pattern)))
+        else:
+            paths.append(pattern)
+    return paths
+
+
+def resolve_sevenzip_path(explicit_path):
+    """命令行参数优先，其次配置文件，最后自动查找"""
+    for path in (explicit_path, config.get("sevenzip_path"), config.default_config.get("sevenzip_path")):
+        if path and os.path.exists(path):
+            return path
+    return explicit_path or config.get("sevenzip_path")
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    # JSON 事件独占标准输出，核心模块中的 print 改到标准错误；--stream 时标准输出只写条目内容
+    raw_output = sys.stdout.buffer if args.stream else None
+    writer = JsonLinesWriter(sys.stderr if args.stream else sys.stdout)
+    sys.stdout = sys.stderr
+
+    if args.entries and not os.path.exists(args.entries):
+        writer.emit("error", message=f"条目列表不存在: {args.entries}")
+        return EXIT_USAGE
+    selection = build_selection(args)
+
+    passwords_file = args.passwords or config.get("passwords_file")
+    if args.passwords and not os.path.exists(args.passwords):
+        writer.emit("error", message=f"密码本不存在: {args.passwords}")
+        return EXIT_USAGE
+
+    # 全局的 7z 进程数上限与程序探测缓存
+    process_slots.set_limit(config.get("max_sevenzip_processes"))
+    sevenzip_probe.cache_file = config.get_data_path("sevenzip_probe_file", "sevenzip_probe.json")
+
+    candidates = build_candidates(args)
+    for path in candidates["wordlists"]:
+        if not os.path.exists(path):
+            writer.emit("error", message=f"字典文件不存在: {path}")
+            return EXIT_USAGE
+    for mask in candidates["masks"]:
+        try:
+            MaskSource.parse(mask)
+        except ValueError as e:
+            writer.emit("error", message=str(e))
+            return EXIT_USAGE
+    unknown_rules = [rule for rule in candidates["rules"] if rule not in RULES]
+    if unknown_rules:
+        writer.emit("error", message=f"未知的变形规则: {', '.join(unknown_rules)}")
+        return EXIT_USAGE
+
+    pwd_manager = SimplePasswordManager(passwords_file if passwords_file and os.path.exists(passwords_file) else None)
+    inprocess_size = args.inprocess_max_mb if args.inprocess_max_mb is not None else config.get("inprocess_max_size_mb")
+    workers = args.workers if args.workers is not None else config.get("password_workers")
+    engine = ExtractorEngine(
+        resolve_sevenzip_path(args.sevenzip),
+        pwd_manager,
+        max_workers=workers,
+        cache_size=config.get("password_cache_size"),
+        index=ArchiveIndex(config.get_data_path("archive_index_dir", "archive_index"), config.get("archive_index_size")),
+        backend_policy=BackendPolicy(inprocess_size * 1024 * 1024) if inprocess_size else None,
+        stall_timeout=config.get("stall_timeout_seconds"),
+        candidates=candidates
+    )
+    if not engine.handler.check_sevenzip_installed():
+        writer.emit("error", message="未找到 7-Zip，请使用 --7z 指定或检查 config.json")
+        return EXIT_NO_SEVENZIP
+
+    def on_job_event(job, event_type, message):
+        if event_type == "state":
+            fields = job.to_dict()
+            fields.pop("job_id")
+            writer.emit("job", job_id=job.job_id, **fields)
+            if job.finished:
+                report_job_metrics(engine.metrics, job, args, writer)
+        elif event_type == "progress":
+            # 解压阶段的进度是 ProgressEvent（含字节数和当前文件），密码搜索阶段只有百分比
+            fields = message.to_dict() if hasattr(message, "to_dict") else {"percent": job.progress}
+            writer.emit("progress", job_id=job.job_id, **fields)
+        else:
+            writer.emit(event_type, job_id=job.job_id, message=str(message))
+
+    jobs_limit = args.jobs if args.jobs is not None else config.get("max_parallel_jobs")
+    job_queue = JobQueue(engine, max_parallel=jobs_limit, event_callback=on_job_event, output_root=args.output, selection=selection)
+
+    paths = expand_paths(args.paths)
+    capabilities = engine.handler.capabilities
+    writer.emit(
+        "start",
+        paths=paths,
+        passwords=pwd_manager.count_passwords(),
+        jobs=job_queue.max_parallel,
+        sevenzip=capabilities.version_text if capabilities else None,
+        selection=str(selection) if selection else None
+    )
+    if args.stream:
+        exit_code = run_stream(paths, engine, writer, args.stream, raw_output)
+    elif args.watch:
+        settle_seconds = args.settle if args.settle is not None else config.get("watch_settle_seconds")
+        exit_code = run_watch(paths, job_queue, writer, settle_seconds)
+    else:
+        jobs = job_queue.add_paths(paths)
+        if not jobs:
+            writer.emit("error", message="没有找到可解压的压缩包")
+            return EXIT_USAGE
+        wait_or_cancel(job_queue, writer)
+        job_queue.shutdown()
+        exit_code = emit_summary(jobs, writer)
+
+    export_metrics(engine.metrics, args, writer)
+    engine.flush()
+    return exit_code
+
+
+def report_job_metrics(metrics, job, args, writer):
+    """任务结束时输出该压缩包的分阶段统计，并更新 Prometheus 文件"""
+    if args.metrics:
+        summary = metrics.archive_summary(job.archive_path)
+        if summary:
+            writer.emit("metrics", job_id=job.job_id, **summary)
+    if args.metrics_prom:
+        try:
+            metrics.write_prometheus(args.metrics_prom)
+        except OSError as e:
+            writer.emit("error", message=f"无法写入指标文件: {e}")
+
+
+def export_metrics(metrics, args, writer):
+    """结束时输出总体统计并导出计时记录"""
+    if args.metrics:
+        writer.emit("metrics_summary", **metrics.aggregate())
+    try:
+        if args.metrics_jsonl:
+            metrics.write_jsonl(args.metrics_jsonl)
+        if args.metrics_prom:
+            metrics.write_prometheus(args.metrics_prom)
+    except OSError as e:
+        writer.emit("error", message=f"无法写入指标文件: {e}")
+
+
+def run_stream(paths, engine, writer, entry_path, output):
+    """把一个压缩包中的单个条目写到标准输出（查找密码的过程与普通解压相同）"""
+    archives = [path for path in paths if os.path.isfile(path)]
+    if len(archives) != 1:
+        writer.emit("error", message="--stream 需要且只接受一个压缩文件")
+        return EXIT_USAGE
+
+    def status_callback(event_type, message):
+        if event_type != "progress":
+            writer.emit(event_type, message=str(message))
+
+    cancel_token = CancelToken()
+    try:
+        result, password = engine.stream_entry(archives[0], entry_path, output, status_callback, cancel_token)
+    except KeyboardInterrupt:
+        cancel_token.cancel()
+        writer.emit("cancel", message="已取消")
+        return EXIT_FAILED
+    output.flush()
+    writer.emit("stream", entry=entry_path, password_found=password is not None, **result.to_dict())
+    return EXIT_OK if result else EXIT_FAILED
+
+
+def wait_or_cancel(job_queue, writer):
+    """等待所有任务结束；期间按 Ctrl+C 取消全部任务（终止 7z 进程组）后再等待它们退出"""
+    try:
+        job_queue.wait()
+    except KeyboardInterrupt:
+        writer.emit("cancel", message="正在取消所有任务")
+        job_queue.cancel_all()
+        job_queue.wait()
+
+
+def emit_summary(jobs, writer):
+    done = sum(1 for job in jobs if job.state == JOB_DONE)
+    failed = sum(1 for job in jobs if job.state == JOB_FAILED)
+    cancelled = sum(1 for job in jobs if job.state == JOB_CANCELLED)
+    writer.emit("summary", total=len(jobs), done=done, failed=failed, cancelled=cancelled)
+    return EXIT_OK if failed == 0 and cancelled == 0 else EXIT_FAILED
+
+
+def run_watch(directories, job_queue, writer, settle_seconds):
+    """监视模式：一直运行到 Ctrl+C，然后等待正在进行的任务结束"""
+    not_dirs = [d for d in directories if not os.path.isdir(d)]
+    if not_dirs:
+        writer.emit("error", message=f"监视模式只接受目录: {', '.join(not_dirs)}")
+        return EXIT_USAGE
+
+    watcher = FolderWatcher(
+        job_queue,
+        directories,
+        state_file=config.get_data_path("watch_state_file", "watch_state.json"),
+        settle_seconds=settle_seconds,
+        poll_interval=config.get("watch_poll_interval"),
+        status_callback=lambda event_type, message: writer.emit("watch", message=str(message))
+    )
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    writer.emit("watch", message="已停止监视，等待正在进行的任务结束（再次按 Ctrl+C 取消）")
+    wait_or_cancel(job_queue, writer)
+    job_queue.shutdown()
+    watcher.record_finished()
+    return emit_summary(job_queue.jobs(), writer)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
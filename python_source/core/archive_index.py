@@ -0,0 +1,267 @@
+import os
+import re
+import json
+import threading
+from collections import OrderedDict
+
+_HEADER_ENCRYPTED_RE = re.compile(r'can ?not open encrypted archive', re.IGNORECASE)
+_ERROR_LINE_RE = re.compile(r'^(?:ERROR|Open ERROR):\s*(.*)$', re.MULTILINE)
+
+# 加密类型
+ENCRYPTION_PLAIN = "plain"      # 未加密
+ENCRYPTION_ENTRY = "entry"      # 条目加密（目录可见）
+ENCRYPTION_HEADER = "header"    # 文件头加密（没有密码无法列出目录）
+ENCRYPTION_UNKNOWN = "unknown"  # 无法判断（打开失败、超时等）
+
+
+class ArchiveEntry:
+    """压缩包中的一个条目（来自 7z l -slt）"""
+
+    __slots__ = ("path", "size", "packed_size", "crc", "encrypted", "method", "is_dir", "block")
+
+    def __init__(self, path, size=0, packed_size=0, crc=None, encrypted=False, method=None, is_dir=False, block=None):
+        self.path = path
+        self.size = size
+        self.packed_size = packed_size
+        self.crc = crc
+        self.encrypted = encrypted
+        self.method = method
+        self.is_dir = is_dir
+        self.block = block
+
+    def to_row(self):
+        """紧凑的列表形式，用于持久化"""
+        return [self.path, self.size, self.packed_size, self.crc, int(self.encrypted), self.method, int(self.is_dir), self.block]
+
+    @classmethod
+    def from_row(cls, row):
+        path, size, packed_size, crc, encrypted, method, is_dir, block = row
+        return cls(path, size, packed_size, crc, bool(encrypted), method, bool(is_dir), block)
+
+
+class ArchiveListing:
+    """
+    一次 7z l -slt 的解析结果
+    - header_encrypted: 文件头加密，未提供正确密码时无法列出条目
+    - error: 7z 报告的打开错误（没有错误时为 None）
+    - solid: 压缩包级的 "Solid = +"（固实压缩），旧版索引中没有记录时为 None
+    """
+
+    def __init__(self, archive_type=None, physical_size=None, entries=None, header_encrypted=False, error=None, solid=False):
+        self.archive_type = archive_type
+        self.physical_size = physical_size
+        self.entries = entries or []
+        self.header_encrypted = header_encrypted
+        self.error = error
+        self.solid = solid
+
+    @property
+    def ok(self):
+        return self.error is None and not self.header_encrypted
+
+    @property
+    def total_size(self):
+        """解压后的总大小"""
+        return sum(entry.size for entry in self.entries)
+
+    @property
+    def file_count(self):
+        return sum(1 for entry in self.entries if not entry.is_dir)
+
+    @property
+    def has_encrypted_entries(self):
+        return any(entry.encrypted for entry in self.entries)
+
+    @property
+    def encryption(self):
+        """按每个条目的 Encrypted 字段和文件头加密错误判断加密类型"""
+        if self.header_encrypted:
+            return ENCRYPTION_HEADER
+        if self.has_encrypted_entries:
+            return ENCRYPTION_ENTRY
+        if self.error is not None:
+            return ENCRYPTION_UNKNOWN
+        return ENCRYPTION_PLAIN
+
+    def cheapest_encrypted_entry(self):
+        """
+        挑选测试代价最小的加密条目：
+        只考虑每个固实块 (Block) 的第一个条目，避免解码前面的数据，再取其中最小的。
+        固实（或无法确认不是固实）但没有 Block 信息的压缩包（如固实 RAR）整体是一个数据流，
+        测试某个条目要先解码它前面的所有数据，因此取按压缩包顺序的第一个加密条目。
+        """
+        files = [entry for entry in self.entries if entry.encrypted and not entry.is_dir and entry.size > 0]
+        if self.solid is not False and files and all(entry.block is None for entry in files):
+            return files[0]
+        best = None
+        seen_blocks = set()
+        for entry in files:
+            if entry.block is not None:
+                if entry.block in seen_blocks:
+                    continue
+                seen_blocks.add(entry.block)
+            if best is None or entry.size < best.size:
+                best = entry
+        return best
+
+    def to_dict(self):
+        return {
+            "type": self.archive_type,
+            "physical_size": self.physical_size,
+            "header_encrypted": self.header_encrypted,
+            "error": self.error,
+            "solid": self.solid,
+            "entries": [entry.to_row() for entry in self.entries]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data.get("type"),
+            data.get("physical_size"),
+            [ArchiveEntry.from_row(row) for row in data.get("entries", [])],
+            data.get("header_encrypted", False),
+            data.get("error"),
+            data.get("solid")
+        )
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def parse_slt_output(output, returncode=0):
+    """解析 7z l -slt 的输出"""
+    output = output.replace("\r\n", "\n")
+    if _HEADER_ENCRYPTED_RE.search(output):
+        return ArchiveListing(header_encrypted=True)
+
+    header, sep, body = output.partition("\n----------")
+    error = None
+    errors = _ERROR_LINE_RE.findall(output)
+    if errors:
+        error = errors[-1].strip() or "error"
+    elif returncode != 0 and not sep:
+        error = f"7z exit code {returncode}"
+
+    # 分卷时会有多个 "--" 段（Split + 真正的格式），取最后出现的 Type、第一个 Physical Size
+    archive_type = None
+    physical_size = None
+    solid = False
+    for line in header.splitlines():
+        key, eq, value = line.partition(" = ")
+        if not eq:
+            continue
+        if key == "Type":
+            archive_type = value.strip()
+        elif key == "Physical Size" and physical_size is None:
+            physical_size = _to_int(value)
+        elif key == "Solid" and value.strip() == "+":
+            solid = True
+
+    entries = []
+    for chunk in body.split("\n\n"):
+        props = {}
+        for line in chunk.splitlines():
+            key, eq, value = line.partition(" = ")
+            if eq:
+                props[key.strip()] = value
+        path = props.get("Path")
+        if path is None:
+            continue
+        attributes = props.get("Attributes", "")
+        entries.append(ArchiveEntry(
+            path,
+            _to_int(props.get("Size")),
+            _to_int(props.get("Packed Size")),
+            props.get("CRC") or None,
+            props.get("Encrypted") == "+",
+            props.get("Method") or None,
+            props.get("Folder") == "+" or attributes.startswith("D"),
+            props.get("Block")
+        ))
+
+    return ArchiveListing(archive_type, physical_size, entries, False, error, solid)
+
+
+class ArchiveIndex:
+    """
+    按压缩包指纹保存解析后的目录列表，每个压缩包一个 JSON 文件。
+    访问时更新文件修改时间，超过 max_entries 个时删除最久未访问的。
+    内存中另有一个小的 LRU，避免重复读盘。
+    """
+
+    def __init__(self, index_dir=None, max_entries=500, memory_entries=64):
+        self.index_dir = index_dir
+        self.max_entries = max(1, max_entries)
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry_file(self, fingerprint):
+        return os.path.join(self.index_dir, fingerprint + ".json")
+
+    def get(self, fingerprint):
+        """查找指纹对应的目录列表，没有时返回 None"""
+        if not fingerprint:
+            return None
+        with self._lock:
+            if fingerprint in self._memory:
+                self._memory.move_to_end(fingerprint)
+                return self._memory[fingerprint]
+        if not self.index_dir:
+            return None
+
+        entry_file = self._entry_file(fingerprint)
+        try:
+            with open(entry_file, 'r', encoding='utf-8') as f:
+                listing = ArchiveListing.from_dict(json.load(f))
+            os.utime(entry_file)
+        except (OSError, ValueError, TypeError):
+            return None
+        self._remember(fingerprint, listing)
+        return listing
+
+    def put(self, fingerprint, listing):
+        """保存目录列表"""
+        if not fingerprint:
+            return
+        self._remember(fingerprint, listing)
+        if not self.index_dir:
+            return
+        try:
+            if not os.path.exists(self.index_dir):
+                os.makedirs(self.index_dir)
+            entry_file = self._entry_file(fingerprint)
+            temp_file = entry_file + ".tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(listing.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(temp_file, entry_file)
+            self._evict()
+        except Exception as e:
+            print(f"Failed to save archive index: {e}")
+
+    def _remember(self, fingerprint, listing):
+        with self._lock:
+            self._memory[fingerprint] = listing
+            self._memory.move_to_end(fingerprint)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _evict(self):
+        files = []
+        with os.scandir(self.index_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".json"):
+                    files.append((entry.stat().st_mtime, entry.path))
+        if len(files) <= self.max_entries:
+            return
+        files.sort()
+        for _, path in files[:len(files) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
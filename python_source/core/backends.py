@@ -0,0 +1,242 @@
+import os
+import zipfile
+
+from core.progress_reader import ProgressEvent
+from core.archive_index import ENCRYPTION_PLAIN, ENCRYPTION_ENTRY, ENCRYPTION_HEADER
+from utils.archive_name import parse_archive_name, SCHEME_SINGLE
+from utils.file_utils import FileUtils
+
+# py7zr 是可选依赖，未安装时 7z 格式只走 7z 命令行
+try:
+    import py7zr
+    HAS_PY7ZR = True
+except ImportError:
+    py7zr = None
+    HAS_PY7ZR = False
+
+# zipfile 能解压的压缩方法（AES 加密的条目为 99，不支持）
+_ZIP_METHODS = {zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED, zipfile.ZIP_BZIP2, zipfile.ZIP_LZMA}
+# zip 通用标志位
+_ZIP_FLAG_ENCRYPTED = 0x1
+_ZIP_FLAG_UTF8 = 0x800
+
+
+class ArchiveBackend:
+    """
+    在进程内处理压缩包的后端接口。
+    每个方法返回 None 表示“该后端无法处理这个压缩包”，调用方应退回 7z 命令行。
+    """
+
+    name = "base"
+    containers = ()
+
+    def available(self):
+        return True
+
+    def classify_encryption(self, archive_path):
+        """返回 ENCRYPTION_* 或 None"""
+        return None
+
+    def verify_password(self, archive_path, password, max_verify_size=None):
+        """返回 True / False 或 None"""
+        return None
+
+    def extract(self, archive_path, destination, password=None, progress_callback=None):
+        """返回 True / False 或 None"""
+        return None
+
+
+class ZipFileBackend(ArchiveBackend):
+    """
+    基于标准库 zipfile 的后端：传统 ZipCrypto 加密的 zip 在内存中校验密码、直接解压小文件。
+    AES 加密、不支持的压缩方法、非 UTF-8 标记的非 ASCII 文件名（如 GBK）交给 7z 处理。
+    """
+
+    name = "zipfile"
+    containers = ("zip",)
+
+    def _open(self, archive_path):
+        """打开 zip 并检查是否能完整处理，不能时返回 None"""
+        try:
+            archive = zipfile.ZipFile(archive_path)
+        except (OSError, zipfile.BadZipFile):
+            return None
+        for info in archive.infolist():
+            if info.compress_type not in _ZIP_METHODS:
+                archive.close()
+                return None
+            if not info.flag_bits & _ZIP_FLAG_UTF8 and not info.filename.isascii():
+                # zipfile 会按 cp437 解码，中文文件名会变成乱码
+                archive.close()
+                return None
+        return archive
+
+    @staticmethod
+    def _structural_error(error):
+        """
+        压缩包结构错误（如分卷 zip 的最后一卷、文件头损坏、文件被截断），与密码错误区分：
+        密码错误表现为 RuntimeError (Bad password)、zlib.error 或 CRC 校验失败
+        """
+        if isinstance(error, zipfile.BadZipFile):
+            return not str(error).startswith("Bad CRC-32")
+        return isinstance(error, (EOFError, OSError))
+
+    @staticmethod
+    def _password_bytes(password):
+        # 非 ASCII 密码在 zip 中的编码因压缩软件而异，交给 7z 处理
+        if password is None or not password.isascii():
+            return None
+        return password.encode("ascii")
+
+    def classify_encryption(self, archive_path):
+        archive = self._open(archive_path)
+        if archive is None:
+            return None
+        with archive:
+            if any(info.flag_bits & _ZIP_FLAG_ENCRYPTED for info in archive.infolist()):
+                return ENCRYPTION_ENTRY
+            return ENCRYPTION_PLAIN
+
+    def verify_password(self, archive_path, password, max_verify_size=None):
+        archive = self._open(archive_path)
+        if archive is None:
+            return None
+        with archive:
+            encrypted = [info for info in archive.infolist() if info.flag_bits & _ZIP_FLAG_ENCRYPTED and not info.is_dir()]
+            if not encrypted:
+                return True
+            if password is None:
+                return False
+            pwd = self._password_bytes(password)
+            if pwd is None:
+                return None
+            # 只完整读取（并校验 CRC）最小的一个加密条目；仅检查头部的校验字节会有 1/256 的误判
+            entry = min(encrypted, key=lambda info: info.compress_size)
+            if max_verify_size is not None and entry.compress_size > max_verify_size:
+                return None
+            try:
+                with archive.open(entry, pwd=pwd) as f:
+                    while f.read(1024 * 1024):
+                        pass
+                return True
+            except NotImplementedError:
+                return None
+            except Exception as e:
+                if self._structural_error(e):
+                    # zipfile 读不了这个压缩包，交给 7z 判断，不能当作密码错误
+                    print(f"zipfile cannot read archive, falling back to 7z: {e}")
+                    return None
+                # 密码错误: RuntimeError (Bad password)、zlib.error、BadZipFile (Bad CRC-32)
+                return False
+
+    def extract(self, archive_path, destination, password=None, progress_callback=None):
+        archive = self._open(archive_path)
+        if archive is None:
+            return None
+        with archive:
+            pwd = None
+            if password is not None:
+                pwd = self._password_bytes(password)
+                if pwd is None:
+                    return None
+            infos = archive.infolist()
+            total_bytes = sum(info.file_size for info in infos) or 1
+            bytes_done = 0
+            try:
+                for index, info in enumerate(infos, 1):
+                    archive.extract(info, destination, pwd=pwd)
+                    bytes_done += info.file_size
+                    if progress_callback:
+                        progress_callback(ProgressEvent(bytes_done * 100 // total_bytes, bytes_done, index, info.filename))
+            except NotImplementedError:
+                return None
+            except Exception as e:
+                print(f"zipfile extraction error: {e}")
+                # 结构错误时退回 7z（已写出的部分文件由 7z 覆盖）
+                return None if self._structural_error(e) else False
+        return True
+
+
+class Py7zrBackend(ArchiveBackend):
+    """基于 py7zr 的 7z 后端（可选，需安装 py7zr）"""
+
+    name = "py7zr"
+    containers = ("7z",)
+
+    def available(self):
+        return HAS_PY7ZR
+
+    def classify_encryption(self, archive_path):
+        try:
+            with py7zr.SevenZipFile(archive_path, mode="r") as archive:
+                return ENCRYPTION_ENTRY if archive.needs_password() else ENCRYPTION_PLAIN
+        except py7zr.exceptions.PasswordRequired:
+            return ENCRYPTION_HEADER
+        except Exception:
+            return None
+
+    def verify_password(self, archive_path, password, max_verify_size=None):
+        try:
+            with py7zr.SevenZipFile(archive_path, mode="r", password=password) as archive:
+                if not archive.needs_password():
+                    return True
+                if password is None:
+                    return False
+                if max_verify_size is not None and os.path.getsize(archive_path) > max_verify_size:
+                    return None
+                # testzip() 返回第一个 CRC 错误的文件名，全部正确时返回 None
+                return archive.testzip() is None
+        except py7zr.exceptions.UnsupportedCompressionMethodError:
+            return None
+        except Exception:
+            return False
+
+    def extract(self, archive_path, destination, password=None, progress_callback=None):
+        try:
+            with py7zr.SevenZipFile(archive_path, mode="r", password=password) as archive:
+                archive.extractall(path=destination)
+        except py7zr.exceptions.UnsupportedCompressionMethodError:
+            return None
+        except Exception as e:
+            print(f"py7zr extraction error: {e}")
+            return False
+        if progress_callback:
+            progress_callback(ProgressEvent(100))
+        return True
+
+
+class BackendPolicy:
+    """
+    按格式和大小选择后端：单卷、不超过 max_size 的 zip（以及安装了 py7zr 时的 7z）在进程内处理，
+    省去启动 7z 进程的开销；RAR、分卷和大文件仍使用 7z 命令行（此时返回 None）。
+    zipfile 的 ZipCrypto 解密是纯 Python 实现（约 2 MB/s），因此带密码解压的上限 max_encrypted_size 小得多；
+    密码校验只读取最小的加密条目，上限为 max_verify_size。
+    分界点可用 benchmarks/bench_backends.py 在目标机器上测量。
+    """
+
+    def __init__(self, max_size=32 * 1024 * 1024, max_encrypted_size=256 * 1024,
+                 max_verify_size=64 * 1024, backends=None):
+        self.max_size = max_size
+        self.max_encrypted_size = max_encrypted_size
+        self.max_verify_size = max_verify_size
+        candidates = backends if backends is not None else [ZipFileBackend(), Py7zrBackend()]
+        self.backends = [backend for backend in candidates if backend.available()]
+
+    def select(self, archive_path, encrypted=False):
+        """返回适用的进程内后端，没有时返回 None；encrypted 表示要带密码解压"""
+        info = parse_archive_name(os.path.basename(archive_path))
+        if info is None or info.scheme != SCHEME_SINGLE:
+            return None
+        # .z01/.z02 + .zip 的分卷 zip 中，.zip 按文件名是单卷，实际是最后一卷，zipfile 无法处理
+        if len(FileUtils.get_volume_files(archive_path)) > 1:
+            return None
+        try:
+            if os.path.getsize(archive_path) > (self.max_encrypted_size if encrypted else self.max_size):
+                return None
+        except OSError:
+            return None
+        for backend in self.backends:
+            if info.container in backend.containers:
+                return backend
+        return None
+
@@ -0,0 +1,330 @@
+import os
+import re
+import math
+import hashlib
+import itertools
+from abc import ABC, abstractmethod
+from datetime import date
+
+from core.password_store import PasswordStore
+from utils.archive_name import parse_archive_name
+
+# 掩码中的字符集（与 hashcat 相同）：?l 小写 ?u 大写 ?d 数字 ?h 十六进制 ?s 符号 ?a 全部，?? 表示问号本身
+MASK_CHARSETS = {
+    "l": "abcdefghijklmnopqrstuvwxyz",
+    "u": "ABCDEFGHIJKLMNOPQRSTUVWXYZ",
+    "d": "0123456789",
+    "h": "0123456789abcdef",
+    "s": " !\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~",
+}
+MASK_CHARSETS["a"] = MASK_CHARSETS["l"] + MASK_CHARSETS["u"] + MASK_CHARSETS["d"] + MASK_CHARSETS["s"]
+
+_LEET = str.maketrans({"a": "@", "e": "3", "i": "1", "o": "0", "s": "$", "t": "7"})
+_COMMON_SUFFIXES = ("1", "12", "123", "1234", "!", "666", "888")
+
+# 变形规则：名称 -> 函数(单词) -> 变形结果序列
+RULES = {
+    "lower": lambda word: (word.lower(),),
+    "upper": lambda word: (word.upper(),),
+    "capitalize": lambda word: (word.capitalize(),),
+    "swapcase": lambda word: (word.swapcase(),),
+    "reverse": lambda word: (word[::-1],),
+    "double": lambda word: (word + word,),
+    "leet": lambda word: (word.lower().translate(_LEET),),
+    "suffix": lambda word: tuple(word + suffix for suffix in _COMMON_SUFFIXES),
+    # 追加 1990 年到今年的年份
+    "years": lambda word: tuple(f"{word}{year}" for year in range(1990, date.today().year + 1)),
+}
+DEFAULT_RULES = ("capitalize", "upper", "years", "leet")
+
+# 文件名中的分词：方括号/书名号中的内容，以及以空白、点、下划线、连字符分隔的词
+_BRACKET_RE = re.compile(r'[\[【(（]([^\]】)）]+)[\]】)）]')
+_TOKEN_RE = re.compile(r'[^\s._\-\[\]()【】（）]+')
+_DOMAIN_RE = re.compile(r'(?:www\.)?([a-z0-9\-]+)\.(?:com|net|org|cc|me|info|xyz|top|club|vip)\b', re.IGNORECASE)
+
+
+class CandidateSource(ABC):
+    """
+    候选密码来源：可以重复遍历、惰性生成的密码序列，子类必须实现 __iter__。
+    - name: 来源名称（记录到计时和日志中）
+    - estimate(): 预计的候选数量，无法预先知道时返回 None
+    - distinct: 来源自身不会产生重复（如掩码），去重时只检查、不记录，避免撑大去重过滤器
+    """
+
+    name = "source"
+    distinct = False
+
+    @abstractmethod
+    def __iter__(self):
+        """每次调用返回一个新的迭代器，从头产生候选密码"""
+
+    def estimate(self):
+        return None
+
+    def describe(self):
+        count = self.estimate()
+        return f"{self.name} {count} 个" if count is not None else self.name
+
+
+class ListSource(CandidateSource):
+    """内存中的密码序列（如密码本的快照）"""
+
+    def __init__(self, passwords, name="book"):
+        self.passwords = passwords
+        self.name = name
+
+    def __iter__(self):
+        return iter(self.passwords)
+
+    def estimate(self):
+        try:
+            return len(self.passwords)
+        except TypeError:
+            return None
+
+
+class WordlistSource(CandidateSource):
+    """从磁盘逐行读取的字典文件，不整体载入内存"""
+
+    def __init__(self, path):
+        self.path = path
+        self.name = f"wordlist:{os.path.basename(path)}"
+
+    def __iter__(self):
+        if not os.path.exists(self.path):
+            print(f"Wordlist does not exist: {self.path}")
+            return iter(())
+        return PasswordStore.iter_file(self.path)
+
+
+class MaskSource(CandidateSource):
+    """
+    掩码，例如 ?d?d?d?d（4 位数字）、abc?d?d、?u?l?l?l?d?d；
+    自定义字符集用 ?1 ~ ?4，由 charsets 给出（如 {"1": "abc"}）
+    """
+
+    distinct = True
+
+    def __init__(self, mask, charsets=None):
+        self.mask = mask
+        self.name = f"mask:{mask}"
+        self.positions = self.parse(mask, charsets)
+
+    @staticmethod
+    def parse(mask, charsets=None):
+        """返回每个位置的候选字符串列表；格式错误时抛出 ValueError"""
+        positions = []
+        i = 0
+        while i < len(mask):
+            char = mask[i]
+            if char != "?":
+                positions.append(char)
+                i += 1
+                continue
+            if i + 1 >= len(mask):
+                raise ValueError(f"掩码以 ? 结尾: {mask}")
+            key = mask[i + 1]
+            if key == "?":
+                positions.append("?")
+            elif key in MASK_CHARSETS:
+                positions.append(MASK_CHARSETS[key])
+            elif charsets and key in charsets:
+                positions.append(charsets[key])
+            else:
+                raise ValueError(f"未知的掩码字符集 ?{key}: {mask}")
+            i += 2
+        return positions
+
+    def __iter__(self):
+        return ("".join(chars) for chars in itertools.product(*self.positions))
+
+    def estimate(self):
+        return math.prod(len(chars) for chars in self.positions)
+
+
+class RuleSource(CandidateSource):
+    """把变形规则应用到另一个来源的每个词上（逐词生成，不保存结果）"""
+
+    def __init__(self, base, rules=DEFAULT_RULES):
+        unknown = [rule for rule in rules if rule not in RULES]
+        if unknown:
+            raise ValueError(f"未知的变形规则: {', '.join(unknown)}")
+        self.base = base
+        self.rules = tuple(rules)
+        self.name = f"rules:{','.join(self.rules)}"
+
+    def __iter__(self):
+        functions = [RULES[rule] for rule in self.rules]
+        for word in self.base:
+            for function in functions:
+                for candidate in function(word):
+                    if candidate != word:
+                        yield candidate
+
+    def estimate(self):
+        count = self.base.estimate()
+        if count is None:
+            return None
+        sample = "password"
+        return count * sum(len(RULES[rule](sample)) for rule in self.rules)
+
+
+class ArchiveNameSource(CandidateSource):
+    """
+    从压缩包文件名推测的密码：完整名称、去掉方括号的名称、括号中的内容（常见为发布站点名）、
+    域名、各个分词及其组合，例如 "[sijishe.com]Movie_2023.part1.rar" ->
+    "[sijishe.com]Movie_2023", "sijishe.com", "sijishe", "Movie_2023", "Movie", "2023" ...
+    """
+
+    name = "archive_name"
+
+    def __init__(self, archive_path):
+        self.archive_path = archive_path
+        self._names = None
+
+    def names(self):
+        if self._names is None:
+            filename = os.path.basename(self.archive_path)
+            parsed = parse_archive_name(filename)
+            base = parsed.base if parsed else os.path.splitext(filename)[0]
+            names = [base]
+            brackets = _BRACKET_RE.findall(base)
+            names.extend(part.strip() for part in brackets)
+            names.append(_BRACKET_RE.sub("", base).strip())
+            names.extend(match.group(1) for match in _DOMAIN_RE.finditer(base))
+            tokens = _TOKEN_RE.findall(base)
+            names.extend(tokens)
+            names.append("".join(tokens))
+            # 保持顺序去重，并补充小写形式
+            seen = set()
+            result = []
+            for name in names + [name.lower() for name in names]:
+                if name and name not in seen:
+                    seen.add(name)
+                    result.append(name)
+            self._names = result
+        return self._names
+
+    def __iter__(self):
+        return iter(self.names())
+
+    def estimate(self):
+        return len(self.names())
+
+
+class BloomFilter:
+    """
+    布隆过滤器：固定内存的集合，可能误报（把没见过的当作见过），不会漏报。
+    capacity 个元素时误报率约为 error_rate，超过容量后误报率逐渐升高
+    """
+
+    def __init__(self, capacity=10000000, error_rate=1e-6):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8", errors="surrogatepass"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]
+
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item):
+        """加入元素；之前（可能）已存在时返回 False"""
+        bits = self.bits
+        new = False
+        for p in self._positions(item):
+            mask = 1 << (p & 7)
+            if not bits[p >> 3] & mask:
+                bits[p >> 3] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+
+class CandidatePipeline:
+    """
+    候选密码流水线：按顺序串联多个来源，边生成边去重，供 PasswordSearcher 逐个取用。
+    去重先用精确集合，超过 exact_limit 个后新的候选记入布隆过滤器，内存不随候选数量增长；
+    布隆过滤器的误报会让极少数候选被跳过（约 error_rate），换取可以搜索上千万个候选。
+    """
+
+    def __init__(self, sources, exact_limit=200000, bloom_capacity=10000000, error_rate=1e-6):
+        self.sources = [source for source in sources if source is not None]
+        self.exact_limit = exact_limit
+        self.bloom_capacity = bloom_capacity
+        self.error_rate = error_rate
+        # 最近一次遍历的统计: 产生的候选数、跳过的重复数
+        self.generated = 0
+        self.skipped = 0
+
+    def estimate(self):
+        """候选数量的上限估计（未去重），有来源无法估计时返回 None"""
+        total = 0
+        for source in self.sources:
+            count = source.estimate()
+            if count is None:
+                return None
+            total += count
+        return total
+
+    def describe(self):
+        return ", ".join(source.describe() for source in self.sources) or "无"
+
+    def __iter__(self):
+        return (password for _, password in self.items())
+
+    def items(self):
+        """逐个产生 (来源名称, 密码)"""
+        self.generated = 0
+        self.skipped = 0
+        exact = set()
+        bloom = None
+        for source in self.sources:
+            for password in source:
+                if not password:
+                    continue
+                if password in exact or (bloom is not None and password in bloom):
+                    self.skipped += 1
+                    continue
+                if not source.distinct:
+                    if len(exact) < self.exact_limit:
+                        exact.add(password)
+                    else:
+                        if bloom is None:
+                            bloom = BloomFilter(self.bloom_capacity, self.error_rate)
+                        bloom.add(password)
+                self.generated += 1
+                yield source.name, password
+
+
+def build_pipeline(book, archive_path=None, wordlists=(), masks=(), rules=(), archive_names=True):
+    """
+    按常用顺序组装流水线：密码本 -> 文件名推测 -> 密码本变形 -> 字典文件 -> 掩码
+    Args:
+        book: 密码本（已按历史成功情况排序的序列）
+        wordlists: 字典文件路径列表；masks: 掩码列表；rules: 应用到密码本的变形规则名称
+        archive_names: 是否加入从压缩包文件名推测的候选
+    """
+    book_source = ListSource(book)
+    sources = [book_source]
+    if archive_names and archive_path:
+        sources.append(ArchiveNameSource(archive_path))
+    if rules:
+        sources.append(RuleSource(book_source, rules))
+    sources.extend(WordlistSource(path) for path in wordlists)
+    for mask in masks:
+        try:
+            sources.append(MaskSource(mask))
+        except ValueError as e:
+            print(f"Invalid mask: {e}")
+    return CandidatePipeline(sources)
@@ -0,0 +1,86 @@
+from fnmatch import fnmatchcase
+
+
+def _normalize(path):
+    """统一为小写、以 / 分隔、没有首尾斜杠的路径（7z 在 Windows 下列出的是反斜杠，且不区分大小写）"""
+    return path.replace("\\", "/").strip("/").lower()
+
+
+class EntrySelection:
+    """
+    选择压缩包中要解压的条目：
+    - include: 包含的通配符；不含 / 的模式匹配任意一级名称（如 *.txt、docs），含 / 的模式从根目录匹配（如 docs/*.md）
+    - exclude: 排除的通配符，规则同上，优先于包含
+    - entries: 明确指定的条目路径
+    匹配到目录时包含其下的所有文件。include 与 entries 都为空时表示全部文件（再去掉 exclude）。
+    """
+
+    def __init__(self, include=None, exclude=None, entries=None):
+        self.include = [p for p in (include or []) if p]
+        self.exclude = [p for p in (exclude or []) if p]
+        self.entries = [p for p in (entries or []) if p]
+        self._include = [_normalize(p) for p in self.include]
+        self._exclude = [_normalize(p) for p in self.exclude]
+        self._entries = {_normalize(p) for p in self.entries}
+
+    @classmethod
+    def parse(cls, text):
+        """
+        解析界面中的筛选文本：分号分隔，以 ! 开头的为排除，例如 "*.nfo; docs/; !*.tmp"
+        文本为空时返回 None（解压全部）
+        """
+        include = []
+        exclude = []
+        for part in (text or "").split(";"):
+            part = part.strip()
+            if part.startswith("!"):
+                exclude.append(part[1:].strip())
+            elif part:
+                include.append(part)
+        selection = cls(include, exclude)
+        return None if selection.selects_all else selection
+
+    @classmethod
+    def from_list_file(cls, list_file, include=None, exclude=None):
+        """从文本文件读取条目列表（每行一个路径，UTF-8）"""
+        with open(list_file, 'r', encoding='utf-8-sig') as f:
+            entries = [line.strip() for line in f if line.strip()]
+        return cls(include, exclude, entries)
+
+    @property
+    def selects_all(self):
+        return not (self.include or self.exclude or self.entries)
+
+    def __str__(self):
+        parts = list(self.include) + list(self.entries) + [f"!{p}" for p in self.exclude]
+        return "; ".join(parts) if parts else "*"
+
+    @staticmethod
+    def _match(patterns, path):
+        """path 本身或它的任一上级目录与模式匹配"""
+        parts = path.split("/")
+        prefixes = ["/".join(parts[:i]) for i in range(1, len(parts) + 1)]
+        for pattern in patterns:
+            if "/" in pattern:
+                if any(fnmatchcase(prefix, pattern) for prefix in prefixes):
+                    return True
+            elif any(fnmatchcase(part, pattern) for part in parts):
+                return True
+        return False
+
+    def matches(self, path):
+        """条目路径是否被选中"""
+        path = _normalize(path)
+        if self._exclude and self._match(self._exclude, path):
+            return False
+        if not self._include and not self._entries:
+            return True
+        if self._entries:
+            parts = path.split("/")
+            if any("/".join(parts[:i]) in self._entries for i in range(1, len(parts) + 1)):
+                return True
+        return bool(self._include) and self._match(self._include, path)
+
+    def select(self, listing):
+        """从目录列表（ArchiveListing）中选出要解压的文件条目（不含目录，目录由 7z 按需创建）"""
+        return [entry for entry in listing.entries if not entry.is_dir and self.matches(entry.path)]
@@ -0,0 +1,182 @@
+import re
+
+# 解压结束的原因
+REASON_COMPLETED = "completed"            # 解压成功
+REASON_STALLED = "stalled"                # 长时间没有进度，被看门狗终止
+REASON_CANCELLED = "cancelled"            # 用户取消
+REASON_WRONG_PASSWORD = "wrong_password"  # 没有可用的密码
+REASON_FAILED = "failed"                  # 其他错误
+
+REASON_TEXT = {
+    REASON_COMPLETED: "解压完成",
+    REASON_STALLED: "长时间没有进度，已终止",
+    REASON_CANCELLED: "已取消",
+    REASON_WRONG_PASSWORD: "密码不正确",
+    REASON_FAILED: "解压失败"
+}
+
+# 失败的具体类别（由 7z 退出码和错误输出判断）
+ERROR_WRONG_PASSWORD = "wrong_password"
+ERROR_MISSING_VOLUME = "missing_volume"
+ERROR_TRUNCATED = "truncated"
+ERROR_CRC = "crc"
+ERROR_DATA = "data"
+ERROR_NOT_ARCHIVE = "not_archive"
+ERROR_UNSUPPORTED = "unsupported"
+ERROR_DISK_FULL = "disk_full"
+ERROR_ACCESS_DENIED = "access_denied"
+ERROR_OUT_OF_MEMORY = "out_of_memory"
+ERROR_CRASH = "crash"
+ERROR_NO_MATCH = "no_match"
+ERROR_UNKNOWN = "unknown"
+
+ERROR_TEXT = {
+    ERROR_WRONG_PASSWORD: "密码不正确",
+    ERROR_MISSING_VOLUME: "缺少分卷",
+    ERROR_TRUNCATED: "压缩包不完整",
+    ERROR_CRC: "CRC 校验失败，文件已损坏",
+    ERROR_DATA: "数据错误，文件已损坏",
+    ERROR_NOT_ARCHIVE: "无法识别的压缩包",
+    ERROR_UNSUPPORTED: "不支持的压缩方法",
+    ERROR_DISK_FULL: "磁盘空间不足",
+    ERROR_ACCESS_DENIED: "没有访问权限",
+    ERROR_OUT_OF_MEMORY: "内存不足",
+    ERROR_CRASH: "7-Zip 异常退出",
+    ERROR_NO_MATCH: "没有匹配的文件",
+    ERROR_UNKNOWN: "解压失败"
+}
+
+# 与密码无关、换密码也不会成功的错误：出现时立即停止尝试密码
+FATAL_ERRORS = frozenset({
+    ERROR_MISSING_VOLUME, ERROR_TRUNCATED, ERROR_CRC, ERROR_DATA, ERROR_NOT_ARCHIVE,
+    ERROR_UNSUPPORTED, ERROR_DISK_FULL, ERROR_ACCESS_DENIED, ERROR_OUT_OF_MEMORY, ERROR_CRASH, ERROR_NO_MATCH
+})
+
+# 按优先级排列的 (类别, 正则)，对 7z 输出的每一行匹配（忽略大小写）。
+# 加密条目的 CRC/数据错误会带上 "Wrong password?"，因此密码规则排在 CRC/数据错误之前；
+# 缺卷、截断、磁盘空间等与密码无关的问题排在最前。
+_ERROR_RULES = [
+    (ERROR_DISK_FULL, re.compile(r"not enough space|no space left|disk full|disk is full")),
+    (ERROR_MISSING_VOLUME, re.compile(r"missing volume")),
+    (ERROR_TRUNCATED, re.compile(r"unexpected end of (?:archive|data|input)")),
+    (ERROR_OUT_OF_MEMORY, re.compile(r"can't allocate|cannot allocate|not enough memory|out of memory")),
+    (ERROR_ACCESS_DENIED, re.compile(r"access is denied|permission denied")),
+    (ERROR_WRONG_PASSWORD, re.compile(r"wrong password")),
+    (ERROR_UNSUPPORTED, re.compile(r"unsupported (?:method|feature|compression)")),
+    (ERROR_CRC, re.compile(r"crc failed|crc error")),
+    (ERROR_DATA, re.compile(r"data error|headers error")),
+    (ERROR_NOT_ARCHIVE, re.compile(r"can ?not open (?:the )?file as archive|is not archive")),
+]
+_RULE_PRIORITY = {error_class: i for i, (error_class, _) in enumerate(_ERROR_RULES)}
+# "ERROR: CRC Failed : dir/file.txt" 中的文件名
+_AFFECTED_FILE_RE = re.compile(r"^(?:error:\s*)?[^:]+?\s+:\s+(.+)$", re.IGNORECASE)
+
+# 7z 的退出码（见 7-Zip 文档）
+EXIT_WARNING = 1
+EXIT_FATAL = 2
+EXIT_COMMAND_LINE = 7
+EXIT_NO_MEMORY = 8
+EXIT_USER_BREAK = 255
+# Windows 的异常退出码（如 0xC0000005 访问冲突）
+_WINDOWS_EXCEPTION_CODE = 0xC0000000
+
+
+def classify_sevenzip_error(exit_code, messages):
+    """
+    根据 7z 的退出码和错误输出判断失败类别
+    Args:
+        exit_code: 7z 进程的退出码（POSIX 下被信号终止时为负数）
+        messages: 7z 输出中的非进度文本行
+    Returns:
+        (类别 ERROR_*, 受影响的文件列表)；退出码为 0 时类别为 None
+    """
+    error_class = None
+    affected = []
+    for line in messages:
+        lowered = line.lower()
+        for candidate, pattern in _ERROR_RULES:
+            if pattern.search(lowered):
+                if error_class is None or _RULE_PRIORITY[candidate] < _RULE_PRIORITY[error_class]:
+                    error_class = candidate
+                match = _AFFECTED_FILE_RE.match(line)
+                if match and match.group(1) not in affected:
+                    affected.append(match.group(1).strip())
+                break
+
+    if exit_code == 0:
+        return None, affected
+    if error_class is None:
+        if exit_code is not None and (exit_code < 0 or exit_code >= _WINDOWS_EXCEPTION_CODE):
+            error_class = ERROR_CRASH
+        elif exit_code == EXIT_NO_MEMORY:
+            error_class = ERROR_OUT_OF_MEMORY
+        else:
+            error_class = ERROR_UNKNOWN
+    return error_class, affected
+
+
+class ExtractionResult:
+    """
+    一次解压（或密码校验）的结果。可以直接当作 bool 使用（成功为 True），兼容原来返回 bool 的调用方。
+    - reason: 结束原因 REASON_*
+    - error_class: 失败类别 ERROR_*（成功、取消或卡住时为 None）
+    - exit_code: 7z 的退出码（进程内后端处理时为 None）
+    - bytes_written: 已解压的字节数（估算，未知时为 None）
+    - duration: 耗时（秒）
+    - files: 出错的文件
+    """
+
+    def __init__(self, reason, message=None, exit_code=None, error_class=None, bytes_written=None, duration=None, files=None):
+        self.reason = reason
+        self.message = message
+        self.exit_code = exit_code
+        self.error_class = error_class
+        self.bytes_written = bytes_written
+        self.duration = duration
+        self.files = files or []
+
+    @classmethod
+    def from_sevenzip(cls, exit_code, messages, **kwargs):
+        """由 7z 的退出码和错误输出构造结果"""
+        messages = list(messages)
+        error_class, files = classify_sevenzip_error(exit_code, messages)
+        if error_class is None:
+            return cls(REASON_COMPLETED, exit_code=exit_code, files=files, **kwargs)
+        reason = REASON_WRONG_PASSWORD if error_class == ERROR_WRONG_PASSWORD else REASON_FAILED
+        return cls(reason, messages[-1] if messages else None, exit_code, error_class, files=files, **kwargs)
+
+    @property
+    def success(self):
+        return self.reason == REASON_COMPLETED
+
+    @property
+    def is_fatal(self):
+        """是否是与密码无关的错误（换密码也不会成功）"""
+        return self.error_class in FATAL_ERRORS
+
+    def __bool__(self):
+        return self.success
+
+    def __repr__(self):
+        return f"ExtractionResult({self.reason!r}, {self.message!r}, error_class={self.error_class!r}, exit_code={self.exit_code!r})"
+
+    @property
+    def text(self):
+        """用于界面显示的说明文字"""
+        text = ERROR_TEXT.get(self.error_class) or REASON_TEXT.get(self.reason, self.reason)
+        if self.files:
+            text += f"（{self.files[0]}" + (f" 等 {len(self.files)} 个文件）" if len(self.files) > 1 else "）")
+        elif self.message and self.error_class in (None, ERROR_UNKNOWN):
+            text += f": {self.message}"
+        return text
+
+    def to_dict(self):
+        return {
+            "reason": self.reason,
+            "message": self.message,
+            "exit_code": self.exit_code,
+            "error_class": self.error_class,
+            "bytes_written": self.bytes_written,
+            "duration": self.duration,
+            "files": self.files
+        }
@@ -1,75 +1,325 @@
 from core.sevenzip_handler import SevenZipHandler
 from core.password_manager import PasswordManager
+from core.password_search import PasswordSearcher
+from core.password_cache import PasswordHitCache
+from core.candidates import build_pipeline
+from core.staging import StagingArea
+from core.backends import BackendPolicy
+from core.metrics import MetricsRecorder, PHASE_VOLUMES, PHASE_PROBE, PHASE_PASSWORD, PHASE_EXTRACT, PHASE_POST
+from core.extraction_result import ExtractionResult, REASON_STALLED, REASON_CANCELLED, REASON_WRONG_PASSWORD, REASON_FAILED
+from core.archive_index import ArchiveIndex, ENCRYPTION_PLAIN, ENCRYPTION_ENTRY, ENCRYPTION_HEADER, ENCRYPTION_UNKNOWN
 from utils.file_utils import FileUtils
+from utils.volume_set import VolumeSet
 import os
+import threading
+
+# 加密类型的日志文字
+ENCRYPTION_TEXT = {
+    ENCRYPTION_PLAIN: "未加密",
+    ENCRYPTION_ENTRY: "文件内容加密",
+    ENCRYPTION_HEADER: "文件头加密",
+    ENCRYPTION_UNKNOWN: "无法判断"
+}
 
 class ExtractorEngine:
-    def __init__(self, sevenzip_path, password_manager: PasswordManager):
-        self.handler = SevenZipHandler(sevenzip_path)
+    def __init__(self, sevenzip_path, password_manager: PasswordManager, max_workers=None, cache_size=1000, index: ArchiveIndex = None,
+                 backend_policy: BackendPolicy = None, stall_timeout=120, metrics: MetricsRecorder = None, candidates=None):
+        # index: 压缩包目录列表索引，加密检测、校验策略和大小估算共用，避免重复执行 7z l
+        # backend_policy: 小的 zip/7z 在进程内处理的策略，为 None 时全部使用 7z 命令行
+        # stall_timeout: 解压时允许的最长无进度时间（秒），超过后终止 7z
+        # metrics: 各阶段（分卷检查、加密检测、密码校验、解压、后处理）的计时记录
+        # candidates: 密码本之外的候选来源 {"wordlists": [...], "masks": [...], "rules": [...], "archive_names": bool}
+        self.handler = SevenZipHandler(sevenzip_path, index, policy=backend_policy, stall_timeout=stall_timeout)
         self.password_manager = password_manager
+        self.metrics = metrics if metrics is not None else MetricsRecorder()
+        # 并行校验密码的 7z 进程数，None 或 0 表示按 CPU 核数
+        self.searcher = PasswordSearcher(self.handler, max_workers, self.metrics)
+        self.candidates = dict(candidates or {})
+        # 成功密码缓存，与密码本放在同一目录，密码本切换时重新加载
+        self.cache_size = cache_size or 1000
+        self.hit_cache = None
+        self._hit_cache_source = None
+        self._cache_lock = threading.Lock()
+
+    def _get_hit_cache(self):
+        """获取与当前密码本同目录的成功密码缓存"""
+        passwords_file = getattr(self.password_manager, "passwords_file", None) or getattr(self.password_manager, "storage_path", None)
+        with self._cache_lock:
+            if self.hit_cache is None or self._hit_cache_source != passwords_file:
+                if self.hit_cache is not None:
+                    self.hit_cache.flush()
+                self.hit_cache = PasswordHitCache.for_passwords_file(passwords_file, self.cache_size)
+                self._hit_cache_source = passwords_file
+            return self.hit_cache
+
+    def flush(self):
+        """保存尚未写入磁盘的状态（成功密码缓存的命中统计），程序退出前调用"""
+        with self._cache_lock:
+            if self.hit_cache is not None:
+                self.hit_cache.flush()
+
+    def _extract_staged(self, archive_path, destination, password, status_callback=None, cancel_token=None, selection=None,
+                        metrics_key=None):
+        """
+        先解压到目标目录同级的暂存目录，成功后用重命名提交到目标目录；
+        失败、卡住或取消时直接删除暂存目录，不在目标目录留下半截文件
+        selection 不为空时只解压选中的条目（提交时与目标目录中已有的文件合并）
+        metrics_key: 计时记录中的压缩包名，默认为 archive_path
+        返回 ExtractionResult
+        """
+        metrics_key = metrics_key or archive_path
+        progress_callback = (lambda p: status_callback("progress", p)) if status_callback else None
+        with StagingArea(destination) as staging:
+            with self.metrics.span(PHASE_EXTRACT, metrics_key, partial=selection is not None) as span:
+                result = self.handler.extract(archive_path, staging.path, password=password, progress_callback=progress_callback,
+                                              cancel_token=cancel_token, selection=selection)
+                span.bytes = result.bytes_written
+                span.status = result.reason
+            if not result:
+                return result
+            with self.metrics.span(PHASE_POST, metrics_key) as span:
+                staging.commit()
+                span.status = "ok"
+        return result
+
+    @staticmethod
+    def _should_stop(result):
+        """卡住、取消或与密码无关的错误（缺卷、CRC 错误、磁盘已满等）时不再尝试其他密码"""
+        return result.reason in (REASON_STALLED, REASON_CANCELLED) or result.is_fatal
+
+    @staticmethod
+    def _report_failure(result, archive_path, status_callback=None):
+        """输出失败的类别、退出码和受影响的文件"""
+        detail = result.text if result.exit_code is None else f"{result.text}，7z 退出码 {result.exit_code}"
+        log_message = f"解压失败（{detail}）: {archive_path}"
+        print(log_message)
+        if status_callback:
+            status_callback("status", result.text)
+            status_callback("log", log_message)
+
+    def _timed_verify(self, archive_path, password, cancel_token, metrics_key, source):
+        """记录一次密码校验的耗时（source: 密码来源，none / cache / book）"""
+        with self.metrics.span(PHASE_PASSWORD, metrics_key, source=source) as span:
+            verified = self.handler.verify_password(archive_path, password, cancel_event=cancel_token)
+            span.status = verified.reason
+        return verified
+
+    def _get_candidate_passwords(self, archive_path):
+        """
+        获取候选密码流水线（惰性生成并去重）：密码本（支持学习排序的密码管理器按历史成功情况排序，
+        否则按密码本顺序）之后依次是文件名推测、密码本变形、字典文件和掩码
+        """
+        if hasattr(self.password_manager, "get_ordered_passwords"):
+            book = self.password_manager.get_ordered_passwords(archive_path)
+        else:
+            book = self.password_manager.get_all_passwords()
+        options = self.candidates
+        return build_pipeline(
+            book,
+            archive_path,
+            wordlists=options.get("wordlists") or (),
+            masks=options.get("masks") or (),
+            rules=options.get("rules") or (),
+            archive_names=options.get("archive_names", True)
+        )
+
+    def extract_with_passwords(self, archive_path, destination, status_callback=None, cancel_token=None, selection=None):
+        """
+        核心解压逻辑：按加密类型决定是否需要密码，再依次尝试缓存和密码本
+        selection: EntrySelection，只解压匹配的条目（为 None 时解压全部）
+        返回 (ExtractionResult, 使用的密码)；cancel_token 置位时尽快停止并返回取消
+        """
+        def extract(path, password):
+            return self._extract_staged(path, destination, password, status_callback, cancel_token, selection, archive_path)
 
+        return self._run_with_passwords(archive_path, extract, status_callback, cancel_token)
 
+    def stream_entry(self, archive_path, entry_path, output, status_callback=None, cancel_token=None):
+        """
+        把单个条目的内容写入二进制文件对象 output（7z e -so），不在磁盘上生成文件；
+        密码的查找与 extract_with_passwords 相同。返回 (ExtractionResult, 使用的密码)
+        """
+        def stream(path, password):
+            with self.metrics.span(PHASE_EXTRACT, archive_path, stream=True) as span:
+                result = self.handler.stream_entry(path, entry_path, output, password, cancel_token)
+                span.bytes = result.bytes_written
+                span.status = result.reason
+            return result
 
-    def extract_with_passwords(self, archive_path, destination, status_callback=None):
-        """核心解压逻辑：先尝试无密码，再尝试密码本"""
+        return self._run_with_passwords(archive_path, stream, status_callback, cancel_token)
+
+    def _run_with_passwords(self, archive_path, action, status_callback=None, cancel_token=None):
+        """
+        检查分卷、判断加密类型并找到密码后执行 action(压缩包路径, 密码) -> ExtractionResult
+        未加密或校验通过的密码只执行一次 action
+        """
         
         # 对于分卷文件，7z会自动处理，无需拼接
         # 直接使用原始路径
         
+        # 计时记录按调用方给出的路径归类（分卷时可能不是第一卷）
+        metrics_key = archive_path
         try:
-            # 直接尝试解压流程，避免耗时的加密检测
+            if cancel_token is not None and cancel_token.is_set():
+                return ExtractionResult(REASON_CANCELLED), None
             log_message = f"开始解压流程: {archive_path}"
             print(log_message)
             if status_callback:
                 status_callback("status", "开始解压流程...")
                 status_callback("log", log_message)
-            
-            # 1. 首先尝试无密码解压
-            log_message = f"正在尝试无密码解压: {archive_path}"
+
+            # 解压前先检查分卷是否齐全，缺卷/截断时直接报告，不必尝试任何密码
+            with self.metrics.span(PHASE_VOLUMES, metrics_key) as span:
+                volume_set = VolumeSet.from_path(archive_path)
+                problems = volume_set.check()
+                span.status = "incomplete" if problems else "ok"
+                span.attributes["volumes"] = len(volume_set.volumes)
+                span.attributes["archive_bytes"] = volume_set.total_size
+            if problems:
+                for problem in problems:
+                    print(problem)
+                    if status_callback:
+                        status_callback("error", problem)
+                if status_callback:
+                    status_callback("status", "分卷不完整，无法解压")
+                return ExtractionResult(REASON_FAILED, problems[0]), None
+            if volume_set.is_multi_volume:
+                # 7z 只需要第一卷，会自动读取后续分卷
+                archive_path = volume_set.first_volume
+                log_message = f"分卷检查通过: 共 {len(volume_set.volumes)} 卷，{volume_set.total_size} 字节"
+                print(log_message)
+                if status_callback:
+                    status_callback("log", log_message)
+
+            # 加密检测只解析一次 7z l -slt，结果写入目录索引，后续校验复用
+            with self.metrics.span(PHASE_PROBE, metrics_key) as span:
+                encryption = self.handler.classify_encryption(archive_path)
+                span.status = encryption
+            log_message = f"加密检测: {ENCRYPTION_TEXT[encryption]}"
             print(log_message)
             if status_callback:
-                status_callback("status", "正在尝试无密码解压...")
                 status_callback("log", log_message)
-            if self.handler.extract(archive_path, destination, password=None, progress_callback=lambda p: status_callback("progress", p) if status_callback else None):
-                return True, None
 
-            # 2. 如果无密码失败，尝试密码本中的所有密码
-            passwords = self.password_manager.get_all_passwords()
-            log_message = f"无密码解压失败，正在尝试密码本中的 {len(passwords)} 个密码: {archive_path}"
+            # 1. 未加密：直接解压，不需要密码本
+            if encryption == ENCRYPTION_PLAIN:
+                if status_callback:
+                    status_callback("status", "正在解压（无密码）...")
+                result = action(archive_path, None)
+                if not result:
+                    # 未加密的压缩包解压失败与密码无关，跳过密码本
+                    self._report_failure(result, archive_path, status_callback)
+                return result, None
+
+            # 2. 无法判断时先尝试无密码解压；已确认加密则跳过
+            if encryption == ENCRYPTION_UNKNOWN:
+                log_message = f"正在尝试无密码解压: {archive_path}"
+                print(log_message)
+                if status_callback:
+                    status_callback("status", "正在尝试无密码解压...")
+                    status_callback("log", log_message)
+                # 先做廉价校验，只有校验通过才真正解压，避免加密包写出半截文件
+                verified = self._timed_verify(archive_path, None, cancel_token, metrics_key, "none")
+                if verified:
+                    result = action(archive_path, None)
+                    if result or self._should_stop(result):
+                        if not result:
+                            self._report_failure(result, archive_path, status_callback)
+                        return result, None
+                elif self._should_stop(verified):
+                    self._report_failure(verified, archive_path, status_callback)
+                    return verified, None
+
+            # 3. 先查成功密码缓存（指纹精确匹配或同一发布系列）
+            fingerprint = FileUtils.get_archive_fingerprint(archive_path)
+            family = FileUtils.get_release_family(archive_path)
+            cache = self._get_hit_cache()
+            pwd, exact = cache.lookup(fingerprint, family)
+            verified = self._timed_verify(archive_path, pwd, cancel_token, metrics_key, "cache") if pwd is not None else None
+            if verified is not None and self._should_stop(verified):
+                self._report_failure(verified, archive_path, status_callback)
+                return verified, None
+            if verified:
+                cache.record_hit(exact)
+                log_message = f"命中密码缓存（{'指纹' if exact else '同系列'}）: {pwd}"
+            else:
+                if pwd is not None and exact:
+                    cache.forget(fingerprint)
+                cache.record_miss()
+                pwd = None
+                log_message = "未命中密码缓存"
+            stats = cache.stats()
+            log_message += f"（缓存 {stats['entries']} 项，命中 {stats['hits']}，系列命中 {stats['family_hits']}，未命中 {stats['misses']}）"
             print(log_message)
             if status_callback:
-                status_callback("status", f"尝试密码本 ({len(passwords)} 个密码)...")
                 status_callback("log", log_message)
-            
-            for i, pwd in enumerate(passwords, 1):
-                log_message = f"正在尝试第 {i}/{len(passwords)} 个密码: {pwd}"
+
+            # 4. 缓存未命中时，依次尝试密码本、文件名推测、密码本变形、字典文件和掩码
+            if pwd is None:
+                candidates = self._get_candidate_passwords(archive_path)
+                estimate = candidates.estimate()
+                log_message = f"正在尝试候选密码（{candidates.describe()}）: {archive_path}"
+                print(log_message)
+                if status_callback:
+                    status_callback("status", f"尝试候选密码 (最多 {estimate} 个)..." if estimate is not None else "尝试候选密码...")
+                    status_callback("log", log_message)
+
+                # 并行校验候选密码（不写文件），命中后只做一次真正的解压
+                pwd, error = self.searcher.search(archive_path, candidates, status_callback, cancel_token, metrics_key)
+                log_message = f"已生成 {candidates.generated} 个候选密码，跳过重复 {candidates.skipped} 个"
+                print(log_message)
+                if status_callback:
+                    status_callback("log", log_message)
+                if error is not None:
+                    # 缺卷、CRC 错误等换密码也无法解决，立即停止尝试
+                    self._report_failure(error, archive_path, status_callback)
+                    return error, None
+
+            if cancel_token is not None and cancel_token.is_set():
+                if status_callback:
+                    status_callback("status", "已取消")
+                return ExtractionResult(REASON_CANCELLED), None
+
+            if pwd is not None:
+                log_message = f"密码校验成功，开始解压: {pwd}"
                 print(log_message)
                 if status_callback:
-                    status_callback("status", f"尝试密码 ({i}/{len(passwords)}): {pwd}")
+                    status_callback("status", "密码正确，正在解压...")
                     status_callback("log", log_message)
-                if self.handler.extract(archive_path, destination, password=pwd, progress_callback=lambda p: status_callback("progress", p) if status_callback else None):
-                    return True, pwd
+                    status_callback("progress", 0)
+                result = action(archive_path, pwd)
+                if result:
+                    # 无法确认加密的压缩包（如目录列表失败）可能根本没有加密，7z 对任意密码都会通过，
+                    # 这样“校验成功”的密码不写入缓存，也不计入成功统计
+                    if encryption != ENCRYPTION_UNKNOWN:
+                        cache.store(fingerprint, pwd, family, os.path.basename(archive_path))
+                        if hasattr(self.password_manager, "record_success"):
+                            self.password_manager.record_success(pwd, archive_path)
+                    return result, pwd
+                # 校验通过但解压失败（如数据损坏、磁盘已满），不再归咎于密码
+                if result.reason != REASON_CANCELLED:
+                    self._report_failure(result, archive_path, status_callback)
+                return result, None
 
-            # 3. 如果都失败，返回失败
+            # 5. 如果都失败，返回失败
             log_message = f"所有密码尝试失败，解压失败: {archive_path}"
             print(log_message)
             if status_callback:
                 status_callback("status", "所有密码尝试失败")
                 status_callback("log", log_message)
-            return False, None
+            return ExtractionResult(REASON_WRONG_PASSWORD), None
             
         except Exception as e:
             error_message = f"Error during extraction: {e}"
             print(error_message)
             if status_callback:
                 status_callback("error", error_message)
-            return False, None
+            return ExtractionResult(REASON_FAILED, str(e)), None
 
-    def extract_single_password(self, archive_path, destination, password):
-        """使用指定密码解压"""
+    def extract_single_password(self, archive_path, destination, password, cancel_token=None, selection=None):
+        """使用指定密码解压，返回 ExtractionResult"""
         # 对于分卷文件，7z会自动处理，无需拼接
         try:
-            return self.handler.extract(archive_path, destination, password=password)
+            return self._extract_staged(archive_path, destination, password, cancel_token=cancel_token, selection=selection)
         except Exception as e:
             print(f"Error during single password extraction: {e}")
-            return False
+            return ExtractionResult(REASON_FAILED, str(e))
@@ -0,0 +1,286 @@
+import os
+import time
+import queue
+import threading
+
+from utils.file_utils import FileUtils
+from utils.volume_set import VolumeSet
+from utils.volume_resolver import VolumeResolver
+from core.watchdog import CancelToken
+from core.extraction_result import REASON_CANCELLED, REASON_FAILED, REASON_TEXT
+
+# 任务状态
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+JOB_FINISHED_STATES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+
+class ExtractionJob:
+    """一个解压任务：对应一个压缩包（分卷压缩包作为一个整体）"""
+
+    def __init__(self, job_id, archive_path, destination, volumes, selection=None):
+        self.job_id = job_id
+        self.archive_path = archive_path
+        self.destination = destination
+        self.volumes = volumes
+        # 只解压部分条目时的筛选（EntrySelection），None 表示全部
+        self.selection = selection
+        self.state = JOB_QUEUED
+        self.progress = 0
+        self.password = None
+        self.error = None
+        # 结束原因（ExtractionResult.reason）、完整结果与取消令牌
+        self.reason = None
+        self.result = None
+        self.cancel_token = CancelToken()
+        self.queued_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.state in JOB_FINISHED_STATES
+
+    def to_dict(self):
+        """供无界面调用方（命令行、日志）使用的任务快照"""
+        return {
+            "job_id": self.job_id,
+            "archive": self.archive_path,
+            "destination": self.destination,
+            "volumes": len(self.volumes),
+            "selection": str(self.selection) if self.selection else None,
+            "state": self.state,
+            "progress": self.progress,
+            "error": self.error,
+            "reason": self.reason,
+            "error_class": self.result.error_class if self.result else None,
+            "exit_code": self.result.exit_code if self.result else None,
+            "bytes_written": self.result.bytes_written if self.result else None,
+            "files": self.result.files if self.result else [],
+            "duration": (self.finished_at or time.time()) - self.started_at if self.started_at else 0.0
+        }
+
+
+class JobQueue:
+    """
+    批量解压任务队列：
+    - 接受任意多个文件/目录，按分卷组去重后排队
+    - 同时运行最多 max_parallel 个解压任务
+    - 通过 event_callback(job, event_type, message) 报告任务状态和解压事件，
+      event_type 为 "state" 时 message 是新的任务状态，其余与 ExtractorEngine 的 status_callback 相同
+    - selection 为所有任务默认的条目筛选（EntrySelection），添加任务时可单独指定
+    """
+
+    def __init__(self, engine, max_parallel=2, event_callback=None, output_root=None, selection=None):
+        self.engine = engine
+        self.max_parallel = max(1, max_parallel or 1)
+        self.event_callback = event_callback
+        self.output_root = output_root
+        self.selection = selection
+        self._jobs = []
+        self._claimed = {}
+        self._pending = queue.Queue()
+        self._workers = []
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    @staticmethod
+    def collect_volume_sets(paths):
+        """
+        展开文件/目录为分卷组列表：
+        目录（递归）由 VolumeResolver 每个目录扫描一次后整体归并，单个文件从它所在的分卷组出发
+        """
+        volume_sets = []
+        for path in paths:
+            if os.path.isdir(path):
+                volume_sets.extend(VolumeResolver.scan(path, recursive=True))
+            elif FileUtils.is_archive(path) and os.path.exists(path):
+                volume_sets.append(VolumeSet.from_path(path))
+        return volume_sets
+
+    @staticmethod
+    def _volume_key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def add_paths(self, paths, selection=None):
+        """
+        添加文件或目录，返回新建的任务列表。
+        分卷中的任意一卷都会被归并到第一卷，已在队列中的分卷组不会重复添加。
+        """
+        new_jobs = []
+        for volume_set in self.collect_volume_sets(paths):
+            job = self.add_volume_set(volume_set, selection)
+            if job is not None:
+                new_jobs.append(job)
+        return new_jobs
+
+    def add_volume_set(self, volume_set, selection=None):
+        """
+        添加一个分卷组，返回新建的任务；分卷组仍在排队或解压中时返回 None。
+        已结束的任务不再占用分卷，再次添加会重新解压。
+        selection 为 None 时使用队列默认的条目筛选
+        """
+        first_volume = volume_set.first_volume
+        volumes = volume_set.volumes
+        default_destination = self._get_destination(first_volume)
+        with self._lock:
+            # 加锁检查，避免并发添加时重复
+            keys = {self._volume_key(v) for v in volumes + [first_volume]}
+            if any(key in self._claimed and not self._claimed[key].finished for key in keys):
+                return None
+            destination = self._unique_destination(default_destination, first_volume)
+            job = ExtractionJob(self._next_id, first_volume, destination, volumes, selection or self.selection)
+            self._next_id += 1
+            for key in keys:
+                self._claimed[key] = job
+            self._jobs.append(job)
+        if destination != default_destination:
+            message = f"解压目录与其他任务重名，改为: {destination}"
+            print(message)
+            self._notify(job, "log", message)
+        self._notify(job, "state", JOB_QUEUED)
+        self._pending.put(job)
+        self._ensure_workers()
+        return job
+
+    def _get_destination(self, first_volume):
+        destination = FileUtils.get_default_destination(first_volume)
+        if self.output_root:
+            destination = os.path.join(self.output_root, os.path.basename(destination))
+        return destination
+
+    def _unique_destination(self, destination, first_volume):
+        """
+        在持有锁时调用：其他压缩包的任务已使用同一解压目录时（如 output_root 下两个来源目录中的 data.rar），
+        依次加上 " (2)"、" (3)" 后缀，避免两个压缩包的内容被合并到同一个文件夹。
+        同一压缩包再次加入时沿用原来的目录
+        """
+        archive_key = self._volume_key(first_volume)
+        used = {self._volume_key(job.destination) for job in self._jobs if self._volume_key(job.archive_path) != archive_key}
+        for job in self._jobs:
+            if self._volume_key(job.archive_path) == archive_key and self._volume_key(job.destination) not in used:
+                return job.destination
+        candidate = destination
+        number = 2
+        while self._volume_key(candidate) in used:
+            candidate = f"{destination} ({number})"
+            number += 1
+        return candidate
+
+    def _ensure_workers(self):
+        with self._lock:
+            self._workers = [t for t in self._workers if t.is_alive()]
+            while len(self._workers) < self.max_parallel:
+                worker = threading.Thread(target=self._worker_loop, daemon=True)
+                self._workers.append(worker)
+                worker.start()
+
+    def _worker_loop(self):
+        while True:
+            job = self._pending.get()
+            if job is None:
+                return
+            self._run_job(job)
+
+    def cancel(self, job):
+        """取消任务：排队中的直接标记为已取消，运行中的由看门狗终止 7z 进程"""
+        job.cancel_token.cancel()
+        self._set_state(job, JOB_CANCELLED, expected=JOB_QUEUED)
+
+    def cancel_all(self):
+        """取消所有未结束的任务（界面的“停止”按钮、命令行的 Ctrl+C）"""
+        for job in self.jobs():
+            if not job.finished:
+                self.cancel(job)
+
+    def _run_job(self, job):
+        def status_callback(event_type, message):
+            if event_type == "progress":
+                try:
+                    job.progress = int(message)
+                except (ValueError, TypeError):
+                    pass
+            self._notify(job, event_type, message)
+
+        # 出队后、开始前被取消时，cancel() 已经把任务标记为已取消
+        if not self._set_state(job, JOB_RUNNING, expected=JOB_QUEUED):
+            return
+        try:
+            result, password = self.engine.extract_with_passwords(
+                job.archive_path, job.destination, status_callback, job.cancel_token, job.selection
+            )
+            job.password = password
+            job.result = result
+            job.reason = result.reason
+            success = result.success
+            if not success:
+                job.error = result.text
+        except Exception as e:
+            success = False
+            job.reason = REASON_FAILED
+            job.error = str(e)
+        job.progress = 100 if success else job.progress
+        if success:
+            state = JOB_DONE
+        elif job.reason == REASON_CANCELLED:
+            state = JOB_CANCELLED
+        else:
+            state = JOB_FAILED
+        self._set_state(job, state)
+
+    def _set_state(self, job, state, expected=None):
+        """设置任务状态；指定 expected 时只在当前状态相符时修改，返回是否修改"""
+        with self._lock:
+            if expected is not None and job.state != expected:
+                return False
+            job.state = state
+            if state == JOB_RUNNING:
+                job.started_at = time.time()
+            elif state in JOB_FINISHED_STATES:
+                job.finished_at = time.time()
+            if state == JOB_CANCELLED and job.reason is None:
+                job.reason = REASON_CANCELLED
+                job.error = REASON_TEXT[REASON_CANCELLED]
+            self._changed.notify_all()
+        self._notify(job, "state", state)
+        return True
+
+    def _notify(self, job, event_type, message):
+        if self.event_callback:
+            try:
+                self.event_callback(job, event_type, message)
+            except Exception as e:
+                print(f"Job event callback error: {e}")
+
+    def jobs(self):
+        """按加入顺序返回所有任务"""
+        with self._lock:
+            return list(self._jobs)
+
+    def is_idle(self):
+        """是否没有排队或运行中的任务"""
+        with self._lock:
+            return all(job.finished for job in self._jobs)
+
+    def wait(self, timeout=None):
+        """阻塞直到所有任务结束（供无界面调用方使用），超时返回 False"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._changed:
+            while not all(job.finished for job in self._jobs):
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._changed.wait(remaining)
+        return True
+
+    def shutdown(self):
+        """通知工作线程在处理完已排队的任务后退出"""
+        with self._lock:
+            workers = list(self._workers)
+            self._workers = []
+        for _ in workers:
+            self._pending.put(None)
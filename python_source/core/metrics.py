@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import threading
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+
+# 解压流程的阶段
+PHASE_VOLUMES = "volumes"          # 分卷解析与检查
+PHASE_PROBE = "probe"              # 加密检测（7z l -slt）
+PHASE_PASSWORD = "password"        # 一次密码校验
+PHASE_EXTRACT = "extract"          # 真正的解压（或流式输出）
+PHASE_POST = "post_process"        # 暂存目录提交等后处理
+
+PHASE_ORDER = (PHASE_VOLUMES, PHASE_PROBE, PHASE_PASSWORD, PHASE_EXTRACT, PHASE_POST)
+
+
+def _cpu_seconds():
+    """本进程与已结束子进程（7z）的 CPU 时间之和；Windows 上不含子进程"""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class Span:
+    """
+    一个阶段的计时记录
+    - started_at: 开始时间（time.time()），duration: 耗时（秒）
+    - bytes: 处理的字节数（未知时为 None）
+    - cpu_seconds: 期间的 CPU 时间（进程级统计，多个任务并行时为近似值）
+    - status: 结果（如 ExtractionResult.reason），attributes: 其他信息
+    """
+
+    __slots__ = ("name", "archive", "started_at", "duration", "bytes", "cpu_seconds", "status", "attributes",
+                 "_start", "_cpu_start")
+
+    def __init__(self, name, archive=None, attributes=None):
+        self.name = name
+        self.archive = archive
+        self.started_at = time.time()
+        self.duration = None
+        self.bytes = None
+        self.cpu_seconds = None
+        self.status = None
+        self.attributes = attributes or {}
+        self._start = time.perf_counter()
+        self._cpu_start = _cpu_seconds()
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._start
+        self.cpu_seconds = max(0.0, _cpu_seconds() - self._cpu_start)
+
+    @property
+    def mb_per_second(self):
+        if not self.bytes or not self.duration:
+            return None
+        return self.bytes / (1024 * 1024) / self.duration
+
+    def to_dict(self):
+        mbps = self.mb_per_second
+        return {
+            "span": self.name,
+            "archive": self.archive,
+            "started_at": round(self.started_at, 3),
+            "duration": round(self.duration, 6) if self.duration is not None else None,
+            "bytes": self.bytes,
+            "mb_per_s": round(mbps, 3) if mbps is not None else None,
+            "cpu_seconds": round(self.cpu_seconds, 3) if self.cpu_seconds is not None else None,
+            "status": self.status,
+            **self.attributes
+        }
+
+
+class _PhaseStats:
+    """某个阶段的累计值"""
+
+    __slots__ = ("count", "seconds", "max_seconds", "bytes", "cpu_seconds", "statuses")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.bytes = 0
+        self.cpu_seconds = 0.0
+        self.statuses = {}
+
+    def add(self, span):
+        self.count += 1
+        self.seconds += span.duration
+        self.max_seconds = max(self.max_seconds, span.duration)
+        self.bytes += span.bytes or 0
+        self.cpu_seconds += span.cpu_seconds or 0.0
+        if span.status is not None:
+            self.statuses[span.status] = self.statuses.get(span.status, 0) + 1
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "seconds": round(self.seconds, 3),
+            "avg_seconds": round(self.seconds / self.count, 6) if self.count else 0.0,
+            "max_seconds": round(self.max_seconds, 3),
+            "bytes": self.bytes,
+            "mb_per_s": round(self.bytes / (1024 * 1024) / self.seconds, 3) if self.bytes and self.seconds else None,
+            "cpu_seconds": round(self.cpu_seconds, 3),
+            "statuses": dict(self.statuses)
+        }
+
+
+class MetricsRecorder:
+    """
+    记录解压各阶段的 Span，并维护按阶段、按压缩包的累计值。
+    明细只保留最近 max_spans 条（监视模式长期运行也不会无限增长），累计值不受影响。
+    线程安全：并行的任务和密码校验线程共用同一个实例。
+    """
+
+    def __init__(self, max_spans=100000, max_archives=10000):
+        self._lock = threading.Lock()
+        self._spans = deque(maxlen=max_spans)
+        self._phases = {}
+        self._archives = OrderedDict()
+        self._max_archives = max_archives
+        self.started_at = time.time()
+
+    @contextmanager
+    def span(self, name, archive=None, **attributes):
+        """
+        with metrics.span(PHASE_EXTRACT, archive) as span:
+            ...
+            span.bytes = result.bytes_written
+        """
+        span = Span(name, archive, attributes)
+        try:
+            yield span
+        except BaseException:
+            if span.status is None:
+                span.status = "error"
+            raise
+        finally:
+            span.finish()
+            self.add(span)
+
+    def add(self, span):
+        with self._lock:
+            self._spans.append(span)
+            self._phases.setdefault(span.name, _PhaseStats()).add(span)
+            if span.archive is not None:
+                phases = self._archives.pop(span.archive, None) or {}
+                phases.setdefault(span.name, _PhaseStats()).add(span)
+                self._archives[span.archive] = phases
+                while len(self._archives) > self._max_archives:
+                    self._archives.popitem(last=False)
+
+    def spans(self):
+        with self._lock:
+            return list(self._spans)
+
+    @staticmethod
+    def _phases_to_dict(phases):
+        ordered = [name for name in PHASE_ORDER if name in phases] + sorted(set(phases) - set(PHASE_ORDER))
+        return {name: phases[name].to_dict() for name in ordered}
+
+    def archive_summary(self, archive):
+        """单个压缩包各阶段的累计值；没有记录时返回 None"""
+        with self._lock:
+            phases = self._archives.get(archive)
+            if phases is None:
+                return None
+            return {
+                "archive": archive,
+                "seconds": round(sum(stats.seconds for stats in phases.values()), 3),
+                "phases": self._phases_to_dict(phases)
+            }
+
+    def archive_summaries(self):
+        with self._lock:
+            archives = list(self._archives)
+        return [summary for summary in (self.archive_summary(archive) for archive in archives) if summary]
+
+    def aggregate(self):
+        """所有压缩包按阶段汇总"""
+        with self._lock:
+            return {
+                "archives": len(self._archives),
+                "uptime": round(time.time() - self.started_at, 3),
+                "phases": self._phases_to_dict(self._phases)
+            }
+
+    def write_jsonl(self, path):
+        """每个 Span 一行 JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for span in self.spans():
+                f.write(json.dumps(span.to_dict(), ensure_ascii=False) + "\n")
+
+    def to_prometheus(self, prefix="archive_extractor"):
+        """Prometheus 文本格式（按阶段的累计值，不含压缩包名，避免标签基数过大）"""
+        metrics = [
+            ("phase_count_total", "counter", "Number of spans per phase", lambda s: s.count),
+            ("phase_seconds_total", "counter", "Wall-clock seconds spent per phase", lambda s: s.seconds),
+            ("phase_seconds_max", "gauge", "Longest single span per phase", lambda s: s.max_seconds),
+            ("phase_bytes_total", "counter", "Bytes processed per phase", lambda s: s.bytes),
+            ("phase_cpu_seconds_total", "counter", "CPU seconds (including 7z child processes) per phase", lambda s: s.cpu_seconds),
+        ]
+        # 累计值由其他线程原地更新，整段文本在锁内生成（阶段数很少，耗时可以忽略），保证各项数值一致
+        lines = []
+        with self._lock:
+            for name, metric_type, help_text, getter in metrics:
+                lines.append(f"# HELP {prefix}_{name} {help_text}")
+                lines.append(f"# TYPE {prefix}_{name} {metric_type}")
+                for phase, stats in self._phases.items():
+                    lines.append(f'{prefix}_{name}{{phase="{phase}"}} {getter(stats)}')
+            lines.append(f"# HELP {prefix}_phase_status_total Spans per phase and result")
+            lines.append(f"# TYPE {prefix}_phase_status_total counter")
+            for phase, stats in self._phases.items():
+                for status, count in stats.statuses.items():
+                    lines.append(f'{prefix}_phase_status_total{{phase="{phase}",status="{status}"}} {count}')
+            lines.append(f"# HELP {prefix}_archives Archives with recorded spans")
+            lines.append(f"# TYPE {prefix}_archives gauge")
+            lines.append(f"{prefix}_archives {len(self._archives)}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path, prefix="archive_extractor"):
+        """写入 Prometheus textfile collector 可读取的文件（先写临时文件再替换，避免读到半截内容）"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus(prefix))
+        os.replace(tmp_path, path)
@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+
+class PasswordHitCache:
+    """
+    压缩包指纹 -> 成功密码 的持久化缓存（LRU 淘汰，容量有限）。
+    同时维护“发布系列 -> 最近成功密码”的索引，同一系列的其他压缩包也能直接命中。
+    缓存文件与密码本放在同一目录下。
+    命中统计随缓存一起保存：每次命中/未命中最多每 STATS_SAVE_INTERVAL 秒写一次文件，
+    退出前调用 flush() 写入最后的变化。
+    """
+
+    CACHE_FILE_NAME = "password_cache.json"
+    STATS_SAVE_INTERVAL = 30
+
+    def __init__(self, cache_file=None, max_entries=1000):
+        """
+        Args:
+            cache_file: 缓存文件路径，为 None 时只在内存中缓存
+            max_entries: 最多保存的指纹数量，超出时淘汰最久未使用的
+        """
+        self.cache_file = cache_file
+        self.max_entries = max(1, max_entries)
+        self.entries = OrderedDict()
+        self.families = OrderedDict()
+        self.hits = 0
+        self.family_hits = 0
+        self.misses = 0
+        # 有尚未写入文件的统计变化；上次写入的时间（time.monotonic()）
+        self._dirty = False
+        self._last_save = None
+        self._lock = threading.Lock()
+        self.load()
+
+    @classmethod
+    def for_passwords_file(cls, passwords_file, max_entries=1000):
+        """创建与密码本同目录的缓存"""
+        if not passwords_file:
+            return cls(None, max_entries)
+        directory = os.path.dirname(os.path.abspath(passwords_file))
+        return cls(os.path.join(directory, cls.CACHE_FILE_NAME), max_entries)
+
+    def load(self):
+        """从缓存文件加载"""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.entries = OrderedDict(data.get("entries", []))
+            self.families = OrderedDict(data.get("families", []))
+            stats = data.get("stats", {})
+            self.hits = stats.get("hits", 0)
+            self.family_hits = stats.get("family_hits", 0)
+            self.misses = stats.get("misses", 0)
+            self._evict()
+        except Exception as e:
+            print(f"Failed to load password cache: {e}")
+            self.entries = OrderedDict()
+            self.families = OrderedDict()
+
+    def save(self):
+        """写入缓存文件（先写临时文件再替换，避免写坏）"""
+        if not self.cache_file:
+            return
+        data = {
+            "entries": list(self.entries.items()),
+            "families": list(self.families.items()),
+            "stats": self.stats(),
+            "last_updated": datetime.now().isoformat()
+        }
+        try:
+            directory = os.path.dirname(self.cache_file)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            temp_file = self.cache_file + ".tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_file, self.cache_file)
+            self._dirty = False
+            self._last_save = time.monotonic()
+        except Exception as e:
+            print(f"Failed to save password cache: {e}")
+
+    def flush(self):
+        """把尚未保存的命中统计写入文件（程序退出前调用）"""
+        with self._lock:
+            if self._dirty:
+                self.save()
+
+    def _stats_changed(self):
+        """在持有锁时调用：统计有变化，距上次写入超过间隔时保存"""
+        self._dirty = True
+        if self._last_save is None or time.monotonic() - self._last_save >= self.STATS_SAVE_INTERVAL:
+            self.save()
+
+    def lookup(self, fingerprint, family=None):
+        """
+        查找缓存的候选密码（先按指纹精确匹配，再按发布系列）
+        Returns:
+            (密码, 是否为指纹精确命中)；未命中时返回 (None, False)
+        """
+        with self._lock:
+            if fingerprint and fingerprint in self.entries:
+                self.entries.move_to_end(fingerprint)
+                return self.entries[fingerprint]["password"], True
+            if family and family in self.families:
+                self.families.move_to_end(family)
+                return self.families[family], False
+            return None, False
+
+    def record_hit(self, exact=True):
+        """记录一次缓存命中（缓存的密码经校验确实可用）"""
+        with self._lock:
+            if exact:
+                self.hits += 1
+            else:
+                self.family_hits += 1
+            self._stats_changed()
+
+    def record_miss(self):
+        """记录一次缓存未命中"""
+        with self._lock:
+            self.misses += 1
+            self._stats_changed()
+
+    def store(self, fingerprint, password, family=None, name=None):
+        """保存成功的密码并持久化"""
+        with self._lock:
+            if fingerprint:
+                self.entries[fingerprint] = {
+                    "password": password,
+                    "name": name,
+                    "last_used": datetime.now().isoformat()
+                }
+                self.entries.move_to_end(fingerprint)
+            if family:
+                self.families[family] = password
+                self.families.move_to_end(family)
+            self._evict()
+            self.save()
+
+    def forget(self, fingerprint):
+        """移除失效的缓存项（例如缓存的密码校验失败）"""
+        with self._lock:
+            if self.entries.pop(fingerprint, None) is not None:
+                self.save()
+
+    def stats(self):
+        """命中统计"""
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "family_hits": self.family_hits,
+            "misses": self.misses
+        }
+
+    def _evict(self):
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        while len(self.families) > self.max_entries:
+            self.families.popitem(last=False)
@@ -0,0 +1,115 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core.metrics import PHASE_PASSWORD
+
+
+class PasswordSearcher:
+    """
+    并行密码搜索：多个工作线程各自驱动一个 7z 进程校验候选密码，
+    任一密码校验成功，或遇到与密码无关的错误（缺卷、CRC 错误等）时立即终止其余进程。
+    只做廉价校验（SevenZipHandler.verify_password），不向目标目录写入文件。
+    候选密码按需从迭代器中取出（可以是 CandidatePipeline 生成的上百万个候选），不需要预先知道数量。
+    """
+
+    def __init__(self, handler, max_workers=None, metrics=None):
+        self.handler = handler
+        # MetricsRecorder，记录每次校验的耗时（可选）
+        self.metrics = metrics
+        if not max_workers or max_workers < 1:
+            max_workers = os.cpu_count() or 1
+        self.max_workers = max_workers
+
+    def search(self, archive_path, passwords, status_callback=None, cancel_token=None, metrics_key=None):
+        """
+        在候选密码中查找能打开压缩包的密码
+        Args:
+            archive_path: 压缩包路径（分卷时为第一卷）
+            passwords: 候选密码的可迭代对象；CandidatePipeline 会附带来源名称，
+                       能估计数量（len() 或 estimate()）时报告进度百分比
+            status_callback: 状态回调 (event_type, message)
+            cancel_token: CancelToken，取消时终止正在运行的校验进程
+            metrics_key: 计时记录中的压缩包名，默认为 archive_path
+        Returns:
+            (找到的密码, 错误)：全部失败时密码为 None；
+            遇到换密码也无法解决的错误时停止搜索，错误为该次校验的 ExtractionResult，否则为 None
+        """
+        total = self._estimate(passwords)
+        if total == 0:
+            return None, None
+
+        if hasattr(passwords, "items"):
+            candidates = enumerate(passwords.items(), 1)
+        else:
+            candidates = enumerate((("book", pwd) for pwd in passwords), 1)
+        lock = threading.Lock()
+        found_event = threading.Event()
+        result = {"password": None, "error": None}
+
+        def next_candidate():
+            with lock:
+                if found_event.is_set():
+                    return None
+                return next(candidates, None)
+
+        def worker():
+            while not found_event.is_set():
+                item = next_candidate()
+                if item is None:
+                    return
+                i, (source, pwd) = item
+                position = f"{i}/{total}" if total else f"{i}"
+                log_message = f"正在尝试第 {position} 个密码: {pwd}"
+                print(log_message)
+                if status_callback:
+                    status_callback("status", f"尝试密码 ({position}): {pwd}")
+                    status_callback("log", log_message)
+                    if total:
+                        status_callback("progress", min(99, i * 100 // total))
+                verified = self._verify(archive_path, pwd, found_event, metrics_key or archive_path, i, source)
+                if verified:
+                    with lock:
+                        if result["password"] is None:
+                            result["password"] = pwd
+                            found_event.set()
+                    return
+                if verified.is_fatal:
+                    with lock:
+                        if result["password"] is None and result["error"] is None:
+                            result["error"] = verified
+                            found_event.set()
+                    return
+
+        # 取消时置位 found_event，复用“找到密码后终止其余进程”的逻辑
+        if cancel_token is not None:
+            cancel_token.link(found_event)
+        try:
+            workers = min(self.max_workers, total) if total else self.max_workers
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(worker) for _ in range(workers)]
+                for future in futures:
+                    future.result()
+        finally:
+            if cancel_token is not None:
+                cancel_token.unlink(found_event)
+
+        return result["password"], result["error"]
+
+    @staticmethod
+    def _estimate(passwords):
+        """候选数量：序列用 len()，流水线用 estimate()，无法估计时返回 None"""
+        try:
+            return len(passwords)
+        except TypeError:
+            pass
+        estimate = getattr(passwords, "estimate", None)
+        return estimate() if estimate is not None else None
+
+    def _verify(self, archive_path, password, cancel_event, metrics_key, candidate, source="book"):
+        if self.metrics is None:
+            return self.handler.verify_password(archive_path, password, cancel_event=cancel_event)
+        with self.metrics.span(PHASE_PASSWORD, metrics_key, source=source, candidate=candidate) as span:
+            verified = self.handler.verify_password(archive_path, password, cancel_event=cancel_event)
+            span.status = verified.reason
+        return verified
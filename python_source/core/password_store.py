@@ -0,0 +1,293 @@
+import os
+import shutil
+import threading
+
+
+class PasswordStore:
+    """
+    密码本存储，适用于几百万行的大字典：
+    - 内存中用一个 dict（密码 -> 序号）同时充当有序列表和哈希索引：
+      插入顺序即密码本顺序，查找、添加、删除都是 O(1)，不需要 list.remove 的线性扫描
+    - 修改不重写整个密码本，只在变更日志（<密码本>.log）末尾追加 "+密码" / "-密码" 行；
+      日志超过一定条数后在后台线程中压缩：把当前内容写回密码本并清空日志
+    - 第一次访问时才逐行流式读取密码本（不使用 readlines，峰值内存不翻倍），并重放变更日志
+    - snapshot() 返回按需生成、修改前一直共享的只读元组，遍历和取行都不需要每次复制整个列表
+
+    压缩时先把日志改名为 <密码本>.log.old，新的修改写入新日志；新密码本写完后才删除旧日志。
+    中途退出时下次加载依次重放 .log.old 与 .log，重放是幂等的，不会丢失修改。
+
+    内存占用与密码本大小成正比，没有上限：所有密码都以字符串保存在字典中，
+    16 个字符左右的密码每个约 130 字节（100 万行约 130 MB），快照元组每项再加 8 字节。
+    没有改用“磁盘偏移 + 内存中只存哈希”的方式，因为密码搜索、排序和密码本窗口都要随机访问密码字符串；
+    流式加载只保证加载时的峰值不超过最终占用。
+    """
+
+    LOG_SUFFIX = ".log"
+    OLD_LOG_SUFFIX = ".log.old"
+
+    def __init__(self, path=None, compact_min_entries=1000, compact_ratio=0.1):
+        """
+        Args:
+            path: 密码本文件路径（每行一个密码，UTF-8），为 None 时只在内存中保存
+            compact_min_entries: 日志至少达到多少条才压缩
+            compact_ratio: 日志条数超过密码数的这个比例时压缩
+        """
+        self.path = path
+        self.compact_min_entries = compact_min_entries
+        self.compact_ratio = compact_ratio
+        self._duplicates = 0
+        self._passwords = {}
+        self._next_seq = 0
+        self._snapshot = None
+        self._log_entries = 0
+        self._loaded = path is None
+        self._compacting = None
+        self._lock = threading.RLock()
+
+    @property
+    def log_path(self):
+        return self.path + self.LOG_SUFFIX if self.path else None
+
+    @property
+    def old_log_path(self):
+        return self.path + self.OLD_LOG_SUFFIX if self.path else None
+
+    # ---- 加载 ----
+
+    @staticmethod
+    def iter_file(path):
+        """逐行读取密码文件（去掉首尾空白、跳过空行），不一次性读入内存"""
+        with open(path, 'r', encoding='utf-8-sig', errors='replace') as f:
+            for line in f:
+                password = line.strip()
+                if password:
+                    yield password
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+
+    def _load(self):
+        self._passwords = {}
+        self._next_seq = 0
+        self._snapshot = None
+        self._log_entries = 0
+        self._duplicates = 0
+        if os.path.exists(self.path):
+            try:
+                for password in self.iter_file(self.path):
+                    if password in self._passwords:
+                        self._duplicates += 1
+                    else:
+                        self._insert(password)
+            except Exception as e:
+                print(f"Failed to load password book: {e}")
+        for log_file in (self.old_log_path, self.log_path):
+            if os.path.exists(log_file):
+                self._replay(log_file)
+        if self._needs_compaction():
+            self._start_compaction()
+
+    def _replay(self, log_file):
+        try:
+            with open(log_file, 'r', encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    line = line.rstrip("\r\n")
+                    op, password = line[:1], line[1:]
+                    if not password:
+                        continue
+                    if op == "+" and password not in self._passwords:
+                        self._insert(password)
+                    elif op == "-":
+                        self._passwords.pop(password, None)
+                    self._log_entries += 1
+        except Exception as e:
+            print(f"Failed to replay password log: {e}")
+
+    def reload(self):
+        """重新从文件加载（文件在外部被修改后调用）"""
+        self.wait_compaction()
+        with self._lock:
+            self._loaded = self.path is None
+            if self.path is None:
+                return
+            self._load()
+            self._loaded = True
+
+    # ---- 读取 ----
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._passwords)
+
+    def __contains__(self, password):
+        self._ensure_loaded()
+        return password in self._passwords
+
+    def __iter__(self):
+        return iter(self.snapshot())
+
+    def snapshot(self):
+        """
+        当前内容的只读元组（按密码本顺序）。
+        修改之前多次调用返回同一个对象；修改后第一次调用时重新生成（tuple(dict) 在 C 中完成，几百万行也只需几十毫秒）
+        """
+        self._ensure_loaded()
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = tuple(self._passwords)
+            return self._snapshot
+
+    @property
+    def duplicates(self):
+        """加载时丢弃的重复行数（密码本文件中有重复时，压缩后即完成去重）"""
+        self._ensure_loaded()
+        return self._duplicates
+
+    def position(self, password):
+        """密码的相对顺序（越小越靠前），不存在时返回 None；用于排序时保持密码本顺序"""
+        self._ensure_loaded()
+        return self._passwords.get(password)
+
+    # ---- 修改 ----
+
+    def _insert(self, password):
+        self._passwords[password] = self._next_seq
+        self._next_seq += 1
+
+    @staticmethod
+    def _valid(password):
+        return bool(password) and "\n" not in password and "\r" not in password and password == password.strip()
+
+    def add(self, password):
+        """添加一个密码，已存在时返回 False"""
+        return self.add_many([password]) == 1
+
+    def remove(self, password):
+        """删除一个密码，不存在时返回 False"""
+        return self.remove_many([password]) == 1
+
+    def add_many(self, passwords):
+        """批量添加（只写一次日志），返回新增的数量"""
+        self._ensure_loaded()
+        with self._lock:
+            added = []
+            for password in passwords:
+                if self._valid(password) and password not in self._passwords:
+                    self._insert(password)
+                    added.append(password)
+            self._record("+", added)
+            return len(added)
+
+    def remove_many(self, passwords):
+        """批量删除（只写一次日志），返回删除的数量"""
+        self._ensure_loaded()
+        with self._lock:
+            removed = []
+            for password in passwords:
+                if self._passwords.pop(password, None) is not None:
+                    removed.append(password)
+            self._record("-", removed)
+            return len(removed)
+
+    def replace_all(self, passwords):
+        """用新内容替换整个密码本（去重后立即写回文件）"""
+        self.wait_compaction()
+        with self._lock:
+            self._loaded = True
+            self._passwords = {}
+            self._next_seq = 0
+            for password in passwords:
+                if self._valid(password) and password not in self._passwords:
+                    self._insert(password)
+            self._snapshot = None
+        self.compact(wait=True)
+
+    def _record(self, op, passwords):
+        """把修改追加到变更日志"""
+        if not passwords:
+            return
+        self._snapshot = None
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write("".join(op + password + "\n" for password in passwords))
+            self._log_entries += len(passwords)
+        except Exception as e:
+            print(f"Failed to write password log: {e}")
+            return
+        if self._needs_compaction():
+            self._start_compaction()
+
+    # ---- 压缩 ----
+
+    def _needs_compaction(self):
+        return self._log_entries >= max(self.compact_min_entries, int(len(self._passwords) * self.compact_ratio))
+
+    def compact(self, wait=True):
+        """把当前内容写回密码本并清空变更日志；wait=False 时在后台线程中进行"""
+        if not self.path:
+            return
+        self._ensure_loaded()
+        with self._lock:
+            thread = self._compacting or self._start_compaction(force=True)
+        if wait and thread is not None:
+            thread.join()
+
+    def wait_compaction(self):
+        """等待正在进行的后台压缩结束"""
+        thread = self._compacting
+        if thread is not None:
+            thread.join()
+
+    def _start_compaction(self, force=False):
+        """在持有锁时调用：轮换日志后启动后台线程写出快照"""
+        if self._compacting is not None or not (force or self._log_entries or self._duplicates):
+            return self._compacting
+        snapshot = self._snapshot if self._snapshot is not None else tuple(self._passwords)
+        self._snapshot = snapshot
+        try:
+            if os.path.exists(self.log_path):
+                if os.path.exists(self.old_log_path):
+                    # 上次压缩没有完成：把当前日志并入旧日志，写完快照后一起删除
+                    with open(self.log_path, 'rb') as src, open(self.old_log_path, 'ab') as dst:
+                        shutil.copyfileobj(src, dst)
+                    os.remove(self.log_path)
+                else:
+                    os.replace(self.log_path, self.old_log_path)
+        except Exception as e:
+            print(f"Failed to rotate password log: {e}")
+            return None
+        self._log_entries = 0
+        thread = threading.Thread(target=self._write_snapshot, args=(snapshot,), daemon=True)
+        self._compacting = thread
+        thread.start()
+        return thread
+
+    def _write_snapshot(self, snapshot):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            temp_file = self.path + ".tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                # 分块写出，避免为几百万行拼出一个巨大的字符串
+                for start in range(0, len(snapshot), 10000):
+                    f.write("".join(password + "\n" for password in snapshot[start:start + 10000]))
+            os.replace(temp_file, self.path)
+            if os.path.exists(self.old_log_path):
+                os.remove(self.old_log_path)
+            self._duplicates = 0
+        except Exception as e:
+            print(f"Failed to compact password book: {e}")
+        finally:
+            with self._lock:
+                self._compacting = None
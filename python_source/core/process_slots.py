@@ -0,0 +1,58 @@
+import os
+import threading
+from contextlib import contextmanager
+
+
+class ProcessSlots:
+    """
+    限制同时运行的 7z 进程数。
+    批量解压、监视模式和并行密码搜索共用同一个实例，避免 CPU 和磁盘被过度占用。
+    与 threading.Semaphore 不同，上限可以在运行中调整。
+    """
+
+    def __init__(self, limit=0):
+        self._condition = threading.Condition()
+        self._in_use = 0
+        self.limit = 1
+        self.set_limit(limit)
+
+    def set_limit(self, limit):
+        """设置上限，0 或 None 表示按 CPU 核数自动选择"""
+        with self._condition:
+            self.limit = max(1, limit or os.cpu_count() or 1)
+            self._condition.notify_all()
+
+    @property
+    def in_use(self):
+        return self._in_use
+
+    def acquire(self, cancel_event=None, poll_interval=0.05):
+        """
+        占用一个进程名额，没有空闲名额时等待
+        cancel_event 置位时放弃等待并返回 False
+        """
+        with self._condition:
+            while self._in_use >= self.limit:
+                if cancel_event is not None and cancel_event.is_set():
+                    return False
+                self._condition.wait(poll_interval if cancel_event is not None else None)
+            self._in_use += 1
+            return True
+
+    def release(self):
+        with self._condition:
+            self._in_use -= 1
+            self._condition.notify()
+
+    @contextmanager
+    def slot(self):
+        """with process_slots.slot(): 运行一个 7z 进程"""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+# 所有 SevenZipHandler 默认共享的实例
+process_slots = ProcessSlots()
@@ -0,0 +1,132 @@
+import re
+import time
+from collections import deque
+
+# 7z 的进度输出（-bsp1）用退格/回车覆盖同一行，而不是换行，例如:
+#   " 45% 12 - folder/file.txt\b\b\b\b..."
+#   "  7% 1234M 3 - big.iso"
+_SEPARATORS_RE = re.compile(rb'[\r\n\x08]+')
+_PROGRESS_RE = re.compile(
+    rb'^\s*(\d{1,3})%'                # 百分比
+    rb'(?:\s+(\d+)([KMGT]))?'         # 已处理大小（可选，带单位）
+    rb'(?:\s+(\d+))?'                 # 已处理文件数（可选）
+    rb'(?:\s+[-+=U.]\s+(.*?))?\s*$'   # 操作符与当前文件名（可选）
+)
+_SIZE_UNITS = {b'K': 1 << 10, b'M': 1 << 20, b'G': 1 << 30, b'T': 1 << 40}
+
+
+class ProgressEvent:
+    """一次解压进度：百分比、已处理字节数（估算）、已处理文件数和当前文件名"""
+
+    __slots__ = ("percent", "bytes_done", "files_done", "current_file")
+
+    def __init__(self, percent, bytes_done=None, files_done=None, current_file=None):
+        self.percent = percent
+        self.bytes_done = bytes_done
+        self.files_done = files_done
+        self.current_file = current_file
+
+    def __int__(self):
+        # 兼容只关心百分比的旧回调: int(event)
+        return self.percent
+
+    def to_dict(self):
+        return {
+            "percent": self.percent,
+            "bytes_done": self.bytes_done,
+            "files_done": self.files_done,
+            "current_file": self.current_file
+        }
+
+
+class ProgressReader:
+    """
+    按块读取 7z 的二进制输出流并解析进度。
+    - 以退格/回车/换行切分，只用一个预编译的正则解析
+    - 进度事件限速发出（百分比变化且距上次至少 min_interval 秒），结束时补发最后一次
+    - 非进度文本（错误、警告）保留最近 tail_lines 行，供失败时分析
+    - last_activity 记录最近一次收到输出的时间（time.monotonic()），供看门狗判断是否卡住
+    """
+
+    def __init__(self, callback=None, total_bytes=None, min_interval=0.1, tail_lines=50):
+        self.callback = callback
+        self.total_bytes = total_bytes
+        self.min_interval = min_interval
+        self.messages = deque(maxlen=tail_lines)
+        self.last_event = None
+        self._pending = None
+        self._last_emit = 0.0
+        self._remainder = b""
+        self.last_activity = time.monotonic()
+
+    def read_stream(self, stream, chunk_size=64 * 1024, should_stop=None):
+        """
+        从无缓冲的二进制流中读取直到 EOF
+        should_stop: 可选的回调，返回 True 时停止读取并返回 False
+        """
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            self.feed(chunk)
+            if should_stop is not None and should_stop():
+                return False
+        self.close()
+        return True
+
+    def feed(self, chunk):
+        """处理一块输出数据"""
+        data = self._remainder + chunk
+        segments = _SEPARATORS_RE.split(data)
+        # 最后一段可能不完整，留到下一块
+        self._remainder = segments.pop()
+        for segment in segments:
+            self._handle_segment(segment)
+        if self._pending is not None:
+            self._maybe_emit(time.monotonic())
+
+    def close(self):
+        """流结束：处理剩余数据并补发最后一次进度"""
+        if self._remainder:
+            self._handle_segment(self._remainder)
+            self._remainder = b""
+        if self._pending is not None:
+            self._emit(self._pending, time.monotonic())
+
+    def _handle_segment(self, segment):
+        if not segment.strip():
+            return
+        self.last_activity = time.monotonic()
+        match = _PROGRESS_RE.match(segment)
+        if not match:
+            self.messages.append(segment.decode("utf-8", errors="replace").strip())
+            return
+
+        percent = min(int(match.group(1)), 100)
+        size, unit, files, name = match.group(2), match.group(3), match.group(4), match.group(5)
+        if size is not None:
+            bytes_done = int(size) * _SIZE_UNITS[unit]
+        elif self.total_bytes:
+            bytes_done = self.total_bytes * percent // 100
+        else:
+            bytes_done = None
+        event = ProgressEvent(
+            percent,
+            bytes_done,
+            int(files) if files is not None else None,
+            name.decode("utf-8", errors="replace") if name else None
+        )
+        # 百分比没有前进的输出只会刷新文件名，不产生新事件，避免打扰界面
+        if self.last_event is None or percent > self.last_event.percent:
+            self._pending = event
+
+    def _maybe_emit(self, now):
+        if self._pending.percent >= 100 or now - self._last_emit >= self.min_interval:
+            self._emit(self._pending, now)
+
+    def _emit(self, event, now):
+        self._pending = None
+        self.last_event = event
+        self._last_emit = now
+        if self.callback:
+            self.callback(event)
@@ -1,26 +1,85 @@
 import subprocess
 import os
 import re
+import time
+import tempfile
+import threading
+
+from core.progress_reader import ProgressReader, ProgressEvent
+from core.process_slots import process_slots
+from core.sevenzip_probe import sevenzip_probe
+from core.watchdog import ProgressWatchdog, process_group_kwargs, kill_process_tree
+from core.extraction_result import (
+    EXIT_FATAL, ExtractionResult, REASON_COMPLETED, REASON_STALLED, REASON_CANCELLED, REASON_WRONG_PASSWORD, REASON_FAILED,
+    ERROR_WRONG_PASSWORD, ERROR_NO_MATCH, ERROR_UNKNOWN
+)
+from core.archive_index import (
+    ArchiveIndex, parse_slt_output,
+    ENCRYPTION_PLAIN, ENCRYPTION_ENTRY, ENCRYPTION_HEADER, ENCRYPTION_UNKNOWN
+)
+from utils.file_utils import FileUtils
+
+# Windows 下隐藏控制台窗口；其他平台没有该标志，使用 0
+CREATE_NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+# 密码校验策略
+VERIFY_PLAIN = "plain"      # 未加密，任何密码都视为正确
+VERIFY_HEADER = "header"    # 文件头加密，能列出目录即密码正确
+VERIFY_ENTRY = "entry"      # 仅测试最便宜的一个加密条目
+VERIFY_FULL = "full"        # 无法列出目录，退回测试整个压缩包
+
 
 class SevenZipHandler:
-    def __init__(self, sevenzip_path):
+    def __init__(self, sevenzip_path, index=None, slots=None, probe=None, policy=None, stall_timeout=120):
         self.sevenzip_path = sevenzip_path
+        # 解压时允许的最长无进度时间（秒），0 表示不检查
+        self.stall_timeout = stall_timeout
+        # 进程内后端的选择策略（BackendPolicy），为 None 时全部使用 7z 命令行
+        self.policy = policy
+        # 压缩包目录列表索引（按指纹），未指定时只在内存中缓存
+        self.index = index if index is not None else ArchiveIndex()
+        # 同时运行的 7z 进程数限制与程序能力探测，默认全局共享
+        self.slots = slots if slots is not None else process_slots
+        self.probe = probe if probe is not None else sevenzip_probe
+        # 每个压缩包的校验策略缓存: 路径 -> ((mtime, size), (策略, 条目路径))
+        self._verify_plans = {}
+        self._plan_lock = threading.Lock()
+        # (程序路径, 结果)，路径改变时重新检查
+        self._installed = None
+        self._capabilities = None
 
     def check_sevenzip_installed(self):
-        """检查7z是否已安装"""
-        if not self.sevenzip_path:
-            return False
-        return os.path.exists(self.sevenzip_path)
+        """检查7z是否已安装（结果按程序路径缓存）"""
+        if self._installed is None or self._installed[0] != self.sevenzip_path:
+            self._installed = (self.sevenzip_path, bool(self.sevenzip_path) and os.path.exists(self.sevenzip_path))
+        return self._installed[1]
+
+    @property
+    def capabilities(self):
+        """7z 程序的版本、开关与编解码器信息（SevenZipCapabilities），未安装时为 None"""
+        if self._capabilities is None or self._capabilities[0] != self.sevenzip_path:
+            self._capabilities = (self.sevenzip_path, self.probe.get(self.sevenzip_path) if self.check_sevenzip_installed() else None)
+        return self._capabilities[1]
 
-    def extract(self, archive_path, destination, password=None, progress_callback=None):
+    def _supports(self, switch):
+        capabilities = self.capabilities
+        return capabilities is None or capabilities.supports(switch)
+
+    def extract(self, archive_path, destination, password=None, progress_callback=None, cancel_token=None, selection=None):
         """
         使用 7z 命令行进行解压
         x: 解压完整路径
         -y: 假设所有查询都回答 '是'
         -o: 指定输出目录
         -p: 指定密码（无密码时不使用此参数）
-        注意：移除了 -bd 参数以允许获取进度信息
+        有进度回调时，回调参数为 ProgressEvent（int(event) 即百分比）
+        看门狗在 stall_timeout 秒没有任何进度、或 cancel_token 被置位时终止 7z 进程组
+        selection: EntrySelection，只解压选中的条目（按目录列表解析为明确的路径后交给 7z）
+        返回 ExtractionResult（可直接当作 bool 使用），失败时按 7z 的退出码和错误输出分类
         """
+        started = time.monotonic()
+        if selection is not None and selection.selects_all:
+            selection = None
         if not self.check_sevenzip_installed():
             raise FileNotFoundError("7-Zip not found. Please check configuration.")
 
@@ -28,6 +87,25 @@ class SevenZipHandler:
         if not os.path.exists(destination):
             os.makedirs(destination)
 
+        # 小的 zip/7z 在进程内解压，后端无法处理时退回 7z；部分解压总是使用 7z
+        backend = self.policy.select(archive_path, password is not None) if self.policy and selection is None else None
+        if backend is not None:
+            events = []
+
+            def backend_progress(event):
+                events[:] = [event]
+                if progress_callback:
+                    progress_callback(event)
+
+            result = backend.extract(archive_path, destination, password, backend_progress)
+            if result is not None:
+                return ExtractionResult(
+                    REASON_COMPLETED if result else REASON_FAILED,
+                    error_class=None if result else ERROR_UNKNOWN,
+                    bytes_written=events[0].bytes_done if events else None,
+                    duration=time.monotonic() - started
+                )
+
         # 构建命令
         command = [
             self.sevenzip_path,
@@ -44,127 +122,405 @@ class SevenZipHandler:
             # 提供空密码以避免交互式提示
             command.insert(4, "-p")
 
+        # -bsp1: 进度输出到 stdout；-bso0: 关闭逐文件的普通输出；-bse1: 错误信息并入 stdout
+        # 旧版 7z（如 p7zip 9.20）不支持这些开关，只在解压结束时报告进度
+        switches = ["-bsp1", "-bso0", "-bse1"] if self._supports("-bsp1") else []
+        if self._supports("-sccUTF-8"):
+            switches.append("-sccUTF-8")
+        command = command[:2] + switches + command[2:]
+
+        # 用目录索引中的解压后总大小估算已处理字节数（不额外启动 7z）
+        listing = self.index.get(FileUtils.get_archive_fingerprint(archive_path))
+        total_bytes = listing.total_size if listing else None
+
+        list_file = None
+        if selection is not None:
+            listing = self.list_archive(archive_path, password)
+            if listing is None or not listing.ok:
+                return self._listing_failure(listing, started)
+            entries = selection.select(listing)
+            if not entries:
+                return ExtractionResult(REASON_FAILED, f"没有匹配的文件: {selection}", error_class=ERROR_NO_MATCH,
+                                        duration=time.monotonic() - started)
+            total_bytes = sum(entry.size for entry in entries)
+            entry_switches, names, list_file = self._entry_arguments([entry.path for entry in entries])
+            command = command[:2] + entry_switches + command[2:] + names
+
+        reader = ProgressReader(progress_callback, total_bytes=total_bytes)
+        if (cancel_token is not None and cancel_token.is_set()) or not self.slots.acquire(cancel_token):
+            if list_file:
+                os.remove(list_file)
+            return ExtractionResult(REASON_CANCELLED, duration=time.monotonic() - started)
         try:
-            # 先尝试使用 subprocess.run 获取完整输出（用于日志）
-            # 如果需要进度回调，再使用 Popen
-            if progress_callback is None:
-                # 简单模式：使用 run
-                result = subprocess.run(
-                    command,
-                    capture_output=True,
-                    text=True,
-                    creationflags=subprocess.CREATE_NO_WINDOW
-                )
-                # 输出日志到控制台
-                if result.stdout:
-                    print("7z output:", result.stdout)
-                if result.stderr:
-                    print("7z error:", result.stderr)
-                return result.returncode == 0
-            else:
-                # 进度模式：使用 Popen
+            process = subprocess.Popen(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                stdin=subprocess.DEVNULL,
+                bufsize=0,
+                **process_group_kwargs(CREATE_NO_WINDOW)
+            )
+            reader.last_activity = time.monotonic()
+            # 看门狗在独立线程中检查进度，7z 完全不输出时也能终止
+            watchdog = ProgressWatchdog(process, lambda: reader.last_activity, self.stall_timeout, cancel_token).start()
+            try:
+                reader.read_stream(process.stdout)
+                return_code = process.wait()
+            finally:
+                # 读取进度时出错或被中断（包括 Ctrl+C）时不留下仍在写文件的 7z
+                kill_process_tree(process)
+                process.wait()
+                watchdog.stop()
+                process.stdout.close()
+        except Exception as e:
+            print(f"Extraction error: {e}")
+            return ExtractionResult(REASON_FAILED, str(e), error_class=ERROR_UNKNOWN, duration=time.monotonic() - started)
+        finally:
+            self.slots.release()
+            if list_file:
+                os.remove(list_file)
+
+        duration = time.monotonic() - started
+        bytes_written = reader.last_event.bytes_done if reader.last_event else None
+        if watchdog.reason == ProgressWatchdog.STALLED:
+            print(f"Extraction stalled: no progress for {self.stall_timeout} seconds")
+            return ExtractionResult(REASON_STALLED, f"{self.stall_timeout} 秒没有进度", return_code,
+                                    bytes_written=bytes_written, duration=duration)
+        if watchdog.reason == ProgressWatchdog.CANCELLED:
+            print("Extraction cancelled")
+            return ExtractionResult(REASON_CANCELLED, exit_code=return_code, bytes_written=bytes_written, duration=duration)
+        if return_code != 0:
+            messages = list(reader.messages)
+            if messages:
+                print("7z error:", "\n".join(messages))
+            result = ExtractionResult.from_sevenzip(return_code, messages, bytes_written=bytes_written, duration=duration)
+            print(f"7z exit code {return_code}: {result.error_class}")
+            return result
+
+        if progress_callback and reader.last_event is None:
+            progress_callback(ProgressEvent(100, total_bytes))
+        # 7z 的进度按 MiB 取整，不足 1 MiB 的解压报告为 0：成功时以目录列表中的总大小为准，
+        # 两者都没有时记为未知而不是 0
+        if total_bytes is not None:
+            bytes_written = max(bytes_written or 0, total_bytes)
+        elif not bytes_written:
+            bytes_written = None
+        return ExtractionResult(REASON_COMPLETED, exit_code=0, bytes_written=bytes_written, duration=duration)
+
+    def _entry_arguments(self, paths):
+        """
+        把要解压的条目路径转为 7z 参数，返回 (开关, 位置参数, 临时列表文件)
+        支持 -scsUTF-8 时写入 UTF-8 列表文件（@listfile），避免命令行过长；-spd 关闭通配符匹配，按字面路径处理
+        """
+        switches = ["-spd"] if self._supports("-spd") else []
+        if not self._supports("-scsUTF-8"):
+            return switches, list(paths), None
+        fd, list_file = tempfile.mkstemp(prefix="7z_entries_", suffix=".txt")
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='\n') as f:
+            f.write("\n".join(paths) + "\n")
+        return switches + ["-scsUTF-8"], [f"@{list_file}"], list_file
+
+    @staticmethod
+    def _listing_failure(listing, started):
+        """部分解压前无法列出目录时的结果"""
+        duration = time.monotonic() - started
+        if listing is None:
+            return ExtractionResult(REASON_FAILED, "无法列出压缩包内容", error_class=ERROR_UNKNOWN, duration=duration)
+        if listing.header_encrypted:
+            return ExtractionResult(REASON_WRONG_PASSWORD, error_class=ERROR_WRONG_PASSWORD, duration=duration)
+        return ExtractionResult.from_sevenzip(EXIT_FATAL, [listing.error], duration=duration)
+
+    def stream_entry(self, archive_path, entry_path, output, password=None, cancel_token=None, chunk_size=1024 * 1024):
+        """
+        用 7z e -so 把单个条目的内容写入 output（任何有 write 方法的二进制文件对象，如 sys.stdout.buffer），
+        不在磁盘上生成文件。调用前应先校验密码：密码错误时 7z 可能已经输出了部分错误数据。
+        返回 ExtractionResult，bytes_written 为写出的字节数
+        """
+        started = time.monotonic()
+        if not self.check_sevenzip_installed():
+            raise FileNotFoundError("7-Zip not found. Please check configuration.")
+
+        listing = self.list_archive(archive_path, password)
+        if listing is not None and listing.ok:
+            target = entry_path.replace("\\", "/").strip("/").lower()
+            if not any(entry.path.replace("\\", "/").lower() == target and not entry.is_dir for entry in listing.entries):
+                return ExtractionResult(REASON_FAILED, f"没有找到条目: {entry_path}", error_class=ERROR_NO_MATCH,
+                                        duration=time.monotonic() - started)
+
+        command = [self.sevenzip_path, "e", "-so", "-y", f"-p{password}" if password is not None else "-p"]
+        if self._supports("-spd"):
+            command.append("-spd")
+        command += [archive_path, entry_path]
+
+        if (cancel_token is not None and cancel_token.is_set()) or not self.slots.acquire(cancel_token):
+            return ExtractionResult(REASON_CANCELLED, duration=time.monotonic() - started)
+        state = {"bytes": 0, "activity": time.monotonic()}
+        stderr_chunks = []
+        try:
+            try:
                 process = subprocess.Popen(
                     command,
                     stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True,
-                    bufsize=1,
-                    universal_newlines=True,
-                    creationflags=subprocess.CREATE_NO_WINDOW
+                    stderr=subprocess.PIPE,
+                    stdin=subprocess.DEVNULL,
+                    **process_group_kwargs(CREATE_NO_WINDOW)
                 )
-                
-                last_percent = 0
-                import time
-                start_time = time.time()
-                timeout_seconds = 300  # 5分钟超时
-                
-                # 读取输出行
-                for line in iter(process.stdout.readline, ''):
-                    if time.time() - start_time > timeout_seconds:
-                        print(f"Extraction timeout after {timeout_seconds} seconds")
-                        process.terminate()
-                        return False
-                    
-                    if line:
-                        # 输出到控制台用于调试
-                        print(f"7z: {line.strip()}")
-                        # 尝试解析进度
-                        percent = self._parse_progress(line)
-                        if percent is not None and percent > last_percent:
-                            last_percent = percent
-                            progress_callback(percent)
-                
+            except Exception as e:
+                print(f"Failed to start 7z: {e}")
+                return ExtractionResult(REASON_FAILED, str(e), error_class=ERROR_UNKNOWN, duration=time.monotonic() - started)
+
+            # 错误输出在单独的线程中读取，避免两个管道互相阻塞
+            stderr_thread = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+            stderr_thread.start()
+            watchdog = ProgressWatchdog(process, lambda: state["activity"], self.stall_timeout, cancel_token).start()
+            try:
+                while True:
+                    chunk = process.stdout.read(chunk_size)
+                    if not chunk:
+                        break
+                    output.write(chunk)
+                    state["bytes"] += len(chunk)
+                    state["activity"] = time.monotonic()
+                return_code = process.wait()
+            except Exception as e:
+                # 写入端出错（如管道已关闭）时终止 7z
+                print(f"Stream error: {e}")
+                process.kill()
                 process.wait()
-                return_code = process.returncode
-                return return_code == 0
+                return ExtractionResult(REASON_FAILED, str(e), error_class=ERROR_UNKNOWN, bytes_written=state["bytes"],
+                                        duration=time.monotonic() - started)
+            finally:
+                # 异常退出（包括 Ctrl+C）时不留下阻塞在管道上的 7z
+                kill_process_tree(process)
+                watchdog.stop()
+                stderr_thread.join()
+                process.stdout.close()
+        finally:
+            self.slots.release()
+
+        duration = time.monotonic() - started
+        if watchdog.reason == ProgressWatchdog.STALLED:
+            return ExtractionResult(REASON_STALLED, f"{self.stall_timeout} 秒没有进度", return_code,
+                                    bytes_written=state["bytes"], duration=duration)
+        if watchdog.reason == ProgressWatchdog.CANCELLED:
+            return ExtractionResult(REASON_CANCELLED, exit_code=return_code, bytes_written=state["bytes"], duration=duration)
+        stderr = b"".join(stderr_chunks).decode("utf-8", errors="replace")
+        messages = [line.strip() for line in stderr.splitlines() if line.strip()]
+        return ExtractionResult.from_sevenzip(return_code, messages, bytes_written=state["bytes"], duration=duration)
+
+    def verify_password(self, archive_path, password, cancel_event=None):
+        """
+        以最小代价校验密码，不向磁盘写入任何文件：
+        - 文件头加密的 7z/RAR：用该密码列目录 (7z l)
+        - 条目加密：只测试最便宜的一个加密条目 (7z t ... <条目>)
+        - 未加密：直接返回成功
+        - 无法判断加密类型：用 7z t 完整测试（password 为 None 时即无密码测试）
+        策略允许时（小的 zip 等）先在进程内校验，不启动 7z
+        返回 ExtractionResult：密码错误为 REASON_WRONG_PASSWORD，
+        缺卷、CRC 错误等与密码无关的失败可由 result.is_fatal 判断
+        """
+        backend = self.policy.select(archive_path) if self.policy else None
+        if backend is not None:
+            result = backend.verify_password(archive_path, password, self.policy.max_verify_size)
+            if result is not None:
+                return self._password_result(result)
+
+        mode, entry = self.get_verify_plan(archive_path)
+        if mode == VERIFY_PLAIN:
+            return ExtractionResult(REASON_COMPLETED)
+        if password is None and mode in (VERIFY_HEADER, VERIFY_ENTRY):
+            # 已确认加密的压缩包，无密码尝试必然失败，不必启动 7z
+            return self._password_result(False)
+
+        if mode == VERIFY_HEADER:
+            command = [self.sevenzip_path, "l", "-y", f"-p{password}", archive_path]
+        elif mode == VERIFY_ENTRY:
+            command = [self.sevenzip_path, "t", "-y", "-bd", f"-p{password}", archive_path, entry]
+        else:
+            return self.test_password(archive_path, password, cancel_event)
+        return self._run_cancellable(command, cancel_event)
+
+    @staticmethod
+    def _password_result(correct):
+        if correct:
+            return ExtractionResult(REASON_COMPLETED)
+        return ExtractionResult(REASON_WRONG_PASSWORD, error_class=ERROR_WRONG_PASSWORD)
+
+    def get_verify_plan(self, archive_path):
+        """获取（并缓存）压缩包的密码校验策略，返回 (策略, 条目路径)"""
+        try:
+            stat = os.stat(archive_path)
+            key = (stat.st_mtime, stat.st_size)
+        except OSError:
+            key = None
+
+        with self._plan_lock:
+            cached = self._verify_plans.get(archive_path)
+            if cached and cached[0] == key:
+                return cached[1]
+
+        plan = self._build_verify_plan(archive_path)
+        with self._plan_lock:
+            self._verify_plans[archive_path] = (key, plan)
+        return plan
+
+    def _build_verify_plan(self, archive_path):
+        """根据加密类型挑选校验代价最小的策略"""
+        encryption = self.classify_encryption(archive_path)
+        if encryption == ENCRYPTION_PLAIN:
+            return VERIFY_PLAIN, None
+        if encryption == ENCRYPTION_HEADER:
+            return VERIFY_HEADER, None
+        if encryption == ENCRYPTION_ENTRY:
+            entry = self.list_archive(archive_path).cheapest_encrypted_entry()
+            if entry is not None:
+                return VERIFY_ENTRY, entry.path
+        return VERIFY_FULL, None
+
+    def list_archive(self, archive_path, password=None, use_index=True):
+        """
+        获取压缩包的目录列表（ArchiveListing）。
+        优先从按指纹索引的缓存中读取；否则执行一次 7z l -slt 并写入索引。
+        文件头加密的压缩包在提供正确密码后重新列出，解密后的列表只返回给调用者，不写入索引：
+        索引中保持 header_encrypted（加密检测依赖它），文件名也不会以明文落盘。
+        无法执行 7z 时返回 None。
+        """
+        fingerprint = FileUtils.get_archive_fingerprint(archive_path)
+        if use_index:
+            listing = self.index.get(fingerprint)
+            if listing is not None and not (listing.header_encrypted and password is not None):
+                return listing
+
+        if password is not None:
+            # 先得到无密码的目录列表（写入索引），只有文件头加密时才需要用密码重新列出
+            listing = self.list_archive(archive_path, None, use_index)
+            if listing is None or not listing.header_encrypted:
+                return listing
+            return self._run_listing(archive_path, password)
+
+        listing = self._run_listing(archive_path, None)
+        if listing is not None:
+            self.index.put(fingerprint, listing)
+        return listing
+
+    def _run_listing(self, archive_path, password):
+        """执行 7z l -slt 并解析输出，无法执行 7z 时返回 None"""
+        command = [self.sevenzip_path, "l", "-slt", "-y", f"-p{password or ''}", archive_path]
+        if self._supports("-sccUTF-8"):
+            command.insert(-1, "-sccUTF-8")
+        try:
+            with self.slots.slot():
+                result = subprocess.run(
+                    command,
+                    capture_output=True,
+                    stdin=subprocess.DEVNULL,
+                    creationflags=CREATE_NO_WINDOW,
+                    timeout=60
+                )
         except Exception as e:
-            print(f"Extraction error: {e}")
-            return False
+            print(f"Failed to list archive: {archive_path}, error: {e}")
+            return None
+
+        output = (result.stdout + result.stderr).decode("utf-8", errors="replace")
+        return parse_slt_output(output, result.returncode)
 
-    def _parse_progress(self, line):
-        """从7z输出行中解析进度百分比"""
-        import re
-        # 匹配百分比模式，如 "50%" 或 "... 50%"
-        percent_match = re.search(r'(\d+)%', line)
-        if percent_match:
+    def get_archive_info(self, archive_path):
+        """压缩包概要信息（来自目录索引）"""
+        listing = self.list_archive(archive_path)
+        if listing is None:
+            return {}
+        return {
+            "type": listing.archive_type,
+            "physical_size": listing.physical_size,
+            "total_size": listing.total_size,
+            "files": listing.file_count,
+            "header_encrypted": listing.header_encrypted,
+            "has_encrypted_entries": listing.has_encrypted_entries,
+            "error": listing.error
+        }
+
+    def test_password(self, archive_path, password, cancel_event=None):
+        """
+        使用 7z t 校验密码，不向磁盘写入任何文件，返回 ExtractionResult
+        cancel_event: threading.Event，置位后立即终止 7z 进程并返回取消
+        """
+        command = [
+            self.sevenzip_path,
+            "t",
+            "-y",
+            "-bd",
+            f"-p{password}" if password is not None else "-p",
+            archive_path
+        ]
+        return self._run_cancellable(command, cancel_event)
+
+    def _run_cancellable(self, command, cancel_event=None, poll_interval=0.05):
+        """
+        运行 7z 并在 cancel_event 置位时终止进程，返回 ExtractionResult（按退出码和错误输出分类）
+        被取消（包括等待进程名额期间）时返回 REASON_CANCELLED
+        只收集标准错误（错误信息），逐文件的普通输出丢弃
+        """
+        started = time.monotonic()
+        if not self.slots.acquire(cancel_event, poll_interval):
+            return ExtractionResult(REASON_CANCELLED)
+        try:
             try:
-                percent = int(percent_match.group(1))
-                if 0 <= percent <= 100:
-                    return percent
-            except ValueError:
-                pass
-        return None
+                process = subprocess.Popen(
+                    command,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    stdin=subprocess.DEVNULL,
+                    creationflags=CREATE_NO_WINDOW
+                )
+            except Exception as e:
+                print(f"Failed to start 7z: {e}")
+                return ExtractionResult(REASON_FAILED, str(e), error_class=ERROR_UNKNOWN)
+
+            while True:
+                try:
+                    # communicate 超时后可以重试而不丢失输出，也不会因管道写满而卡住
+                    _, stderr = process.communicate(timeout=poll_interval)
+                    break
+                except subprocess.TimeoutExpired:
+                    if cancel_event is not None and cancel_event.is_set():
+                        process.kill()
+                        process.communicate()
+                        return ExtractionResult(REASON_CANCELLED)
+        finally:
+            self.slots.release()
+
+        messages = [line.strip() for line in stderr.decode("utf-8", errors="replace").splitlines() if line.strip()]
+        return ExtractionResult.from_sevenzip(process.returncode, messages, duration=time.monotonic() - started)
 
     def test_archive(self, archive_path):
         """测试压缩包是否损坏或获取信息"""
         command = [self.sevenzip_path, "t", "-y", archive_path]
         try:
-            result = subprocess.run(command, capture_output=True, text=True, creationflags=subprocess.CREATE_NO_WINDOW)
+            with self.slots.slot():
+                result = subprocess.run(command, capture_output=True, text=True, creationflags=CREATE_NO_WINDOW)
             return result.returncode == 0
         except Exception:
             return False
 
-    def is_encrypted(self, archive_path):
-        """检测压缩包是否加密"""
-        # 首先检查文件是否存在
+    def classify_encryption(self, archive_path):
+        """
+        判断压缩包的加密类型（来自 7z l -slt 的解析结果，结果会写入目录索引）：
+        ENCRYPTION_PLAIN / ENCRYPTION_ENTRY / ENCRYPTION_HEADER / ENCRYPTION_UNKNOWN
+        """
         if not os.path.exists(archive_path):
             print(f"Archive file does not exist: {archive_path}")
-            return False
-        
-        # 使用7z l命令列出内容并检测加密状态
-        command = [self.sevenzip_path, "l", "-y", archive_path]
-        try:
-            # 添加超时（60秒），避免大文件长时间阻塞
-            result = subprocess.run(command, capture_output=True, text=True, creationflags=subprocess.CREATE_NO_WINDOW, timeout=60)
-            output = result.stdout.lower() + result.stderr.lower()
-            
-            # 检查7z输出中的加密标记
-            encrypted_indicators = ['encrypted', 'password', '密', '密码', 'encryption', 'enter password', 'requires password']
-            for indicator in encrypted_indicators:
-                if indicator in output:
-                    return True
-            
-            # 如果returncode为2，通常表示需要密码（即加密）
-            if result.returncode == 2:
-                return True
-                
-            # 对于分卷文件，7z会自动处理，我们只需要检测第一个分卷
-            # 如果是分卷文件且返回码不为0，但输出包含加密指示符，视为加密
-            archive_name = os.path.basename(archive_path).lower()
-            volume_extensions = ['.part001.rar', '.part0001.rar', '.r00', '.r01', '.z01', '.z02', '.7z.001', '.7z.002']
-            is_volume = any(archive_name.endswith(ext) for ext in volume_extensions)
-            
-            if is_volume and result.returncode != 0:
-                if any(indicator in output for indicator in encrypted_indicators):
-                    return True
-            
-            # 默认情况下，如果没有明确的加密指示，认为不是加密的
-            return False
-        except subprocess.TimeoutExpired:
-            print(f"Encryption check timeout for: {archive_path}, assuming encrypted")
-            # 超时情况下，保守地假设是加密的（因为大文件更可能是加密的）
-            return True
-        except Exception as e:
-            print(f"Error while checking encryption for: {archive_path}, error: {e}")
-            # 如果无法确定，保守地假设是加密的
-            return True
\ No newline at end of file
+            return ENCRYPTION_UNKNOWN
+        backend = self.policy.select(archive_path) if self.policy else None
+        if backend is not None:
+            encryption = backend.classify_encryption(archive_path)
+            if encryption is not None:
+                return encryption
+        listing = self.list_archive(archive_path)
+        if listing is None:
+            # 超时或无法执行 7z：不做假设，由调用方按未知处理
+            return ENCRYPTION_UNKNOWN
+        return listing.encryption
+
+    def is_encrypted(self, archive_path):
+        """检测压缩包是否加密（条目加密或文件头加密）"""
+        return self.classify_encryption(archive_path) in (ENCRYPTION_ENTRY, ENCRYPTION_HEADER)
@@ -0,0 +1,188 @@
+import os
+import re
+import json
+import subprocess
+import threading
+
+from core.process_slots import process_slots
+
+# Windows 下隐藏控制台窗口；其他平台没有该标志，使用 0
+CREATE_NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+_VERSION_RE = re.compile(r'7-Zip(?:\s+\[\d+\])?(?:\s+\([a-z]\))?\s+(\d+)\.(\d+)')
+_SWITCH_RE = re.compile(r'^\s+(-[A-Za-z]+)', re.MULTILINE)
+# 帮助信息无法解析时，按版本推断：-bs{o|e|p} 输出流开关从 15.x 开始提供
+_STREAM_SWITCH_VERSION = (15, 0)
+_STREAM_SWITCHES = ("-bso", "-bse", "-bsp")
+
+
+class SevenZipCapabilities:
+    """
+    一次探测得到的 7z 程序信息
+    - version: 版本号元组，无法识别时为 None
+    - formats / codecs: `7z i` 列出的格式与编解码器名称（小写）
+    - switches: 帮助信息中列出的开关前缀，如 -bs、-scc
+    """
+
+    def __init__(self, version=None, version_text="", formats=None, codecs=None, switches=None):
+        self.version = tuple(version) if version else None
+        self.version_text = version_text
+        self.formats = set(formats or [])
+        self.codecs = set(codecs or [])
+        self.switches = set(switches or [])
+
+    def supports(self, switch):
+        """是否支持某个命令行开关，例如 supports("-bsp1")"""
+        if self.switches:
+            # 帮助信息中的开关只列出前缀，如 -bs{o|e|p}{0|1|2} 记为 -bs
+            return any(switch.startswith(s) for s in self.switches)
+        # 没有帮助信息时，版本未知按新版本处理
+        if switch.startswith(_STREAM_SWITCHES):
+            return self.version is None or self.version >= _STREAM_SWITCH_VERSION
+        return True
+
+    def supports_format(self, name):
+        """是否支持某种压缩格式（如 rar、zip）；没有格式列表时假定支持"""
+        return not self.formats or name.lower() in self.formats
+
+    def to_dict(self):
+        return {
+            "version": list(self.version) if self.version else None,
+            "version_text": self.version_text,
+            "formats": sorted(self.formats),
+            "codecs": sorted(self.codecs),
+            "switches": sorted(self.switches)
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("version"), data.get("version_text", ""), data.get("formats"), data.get("codecs"), data.get("switches"))
+
+
+def parse_info_output(output):
+    """解析 `7z i` 的输出，返回 (版本号元组, 版本行, 格式集合, 编解码器集合)"""
+    version = None
+    version_text = ""
+    match = _VERSION_RE.search(output)
+    if match:
+        version = (int(match.group(1)), int(match.group(2)))
+        version_text = output[match.start():].splitlines()[0].strip()
+
+    formats = set()
+    codecs = set()
+    section = None
+    for line in output.splitlines():
+        stripped = line.strip()
+        if stripped.endswith(":") and " " not in stripped:
+            section = stripped[:-1].lower()
+            continue
+        if not stripped:
+            section = None if section in ("formats", "codecs") else section
+            continue
+        tokens = stripped.split()
+        if section == "formats" and len(tokens) >= 2:
+            # 第一列是能力标志（如 C...F.....），第二列是格式名
+            formats.add(tokens[1].lower())
+        elif section == "codecs" and len(tokens) >= 2:
+            codecs.add(tokens[-1].lower())
+    return version, version_text, formats, codecs
+
+
+class SevenZipProbe:
+    """
+    探测 7z 程序的版本、支持的开关和编解码器，每个程序只探测一次。
+    结果按 (程序路径, 修改时间, 大小) 缓存在内存中，并可保存到 cache_file，
+    升级 7-Zip 后修改时间变化会自动重新探测。
+    """
+
+    def __init__(self, cache_file=None, slots=None):
+        self.cache_file = cache_file
+        self.slots = slots
+        self._cache = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _cache_key(sevenzip_path):
+        try:
+            stat = os.stat(sevenzip_path)
+        except OSError:
+            return None
+        return f"{os.path.abspath(sevenzip_path)}|{stat.st_mtime_ns}|{stat.st_size}"
+
+    def get(self, sevenzip_path):
+        """返回程序的 SevenZipCapabilities；程序不存在时返回 None"""
+        key = self._cache_key(sevenzip_path) if sevenzip_path else None
+        if key is None:
+            return None
+        # 探测期间持有锁：多个线程同时首次调用时只探测一次
+        with self._lock:
+            self._load()
+            capabilities = self._cache.get(key)
+            if capabilities is not None:
+                return capabilities
+
+            capabilities = self._probe(sevenzip_path)
+            # 同一路径的旧记录（升级前的版本）一并清理
+            prefix = key.split("|", 1)[0] + "|"
+            for old_key in [k for k in self._cache if k.startswith(prefix)]:
+                del self._cache[old_key]
+            self._cache[key] = capabilities
+            self._save()
+        return capabilities
+
+    def _run(self, command):
+        if self.slots is not None:
+            self.slots.acquire()
+        try:
+            result = subprocess.run(
+                command,
+                capture_output=True,
+                stdin=subprocess.DEVNULL,
+                creationflags=CREATE_NO_WINDOW,
+                timeout=30
+            )
+            return (result.stdout + result.stderr).decode("utf-8", errors="replace")
+        except Exception as e:
+            print(f"Failed to probe 7z: {e}")
+            return ""
+        finally:
+            if self.slots is not None:
+                self.slots.release()
+
+    def _probe(self, sevenzip_path):
+        version, version_text, formats, codecs = parse_info_output(self._run([sevenzip_path, "i"]))
+        # 不带参数运行时输出帮助信息，其中列出了所有开关
+        switches = set(_SWITCH_RE.findall(self._run([sevenzip_path])))
+        if version is None:
+            print(f"Unrecognized 7z version: {sevenzip_path}")
+        return SevenZipCapabilities(version, version_text, formats, codecs, switches)
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for key, value in data.items():
+                self._cache[key] = SevenZipCapabilities.from_dict(value)
+        except Exception as e:
+            print(f"Failed to load 7z probe cache: {e}")
+
+    def _save(self):
+        if not self.cache_file:
+            return
+        try:
+            temp_file = self.cache_file + ".tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({key: value.to_dict() for key, value in self._cache.items()}, f, ensure_ascii=False, indent=1)
+            os.replace(temp_file, self.cache_file)
+        except Exception as e:
+            print(f"Failed to save 7z probe cache: {e}")
+
+
+# 所有 SevenZipHandler 默认共享的实例（cache_file 由程序入口根据配置设置）
+sevenzip_probe = SevenZipProbe(slots=process_slots)
@@ -1,7 +1,42 @@
 import os
+import re
 import json
+import time
+import threading
 from datetime import datetime
 
+from core.password_store import PasswordStore
+
+# 成功次数的衰减半衰期（秒）：30 天前的一次成功只算半次
+SUCCESS_HALF_LIFE = 30 * 24 * 3600
+
+# 文件名前缀提示：取文件名中第一个有意义的词（如 "[sijishe]xxx.rar" -> "sijishe"）
+_HINT_TOKEN_RE = re.compile(r'[^\s._\-\[\]()【】]+')
+
+
+class OrderedPasswords:
+    """
+    排序后的密码本视图：先是提前的少数密码，再惰性遍历密码本快照中其余的密码。
+    不复制整个密码本；可以重复遍历（流水线中的变形规则会再遍历一次密码本），len() 为密码总数
+    """
+
+    def __init__(self, promoted, passwords):
+        self.promoted = promoted
+        self.passwords = passwords
+        self._promoted_set = set(promoted)
+
+    def __iter__(self):
+        yield from self.promoted
+        promoted_set = self._promoted_set
+        for password in self.passwords:
+            if password not in promoted_set:
+                yield password
+
+    def __len__(self):
+        # 提前的密码都取自密码本，总数不变
+        return len(self.passwords)
+
+
 class SimplePasswordManager:
     def __init__(self, passwords_file=None):
         """初始化密码管理器
@@ -9,67 +44,191 @@ class SimplePasswordManager:
             passwords_file: 密码文件路径，如果为None则使用默认路径
         """
         self.passwords_file = passwords_file
-        self.passwords = []
+        # 密码本内容由 PasswordStore 保存：O(1) 查找和修改，修改只追加到变更日志，第一次使用时才读取文件
+        self.store = PasswordStore(passwords_file)
+        # 成功统计: {密码: {"count", "score", "last"}}，前缀提示: {前缀: {密码: 次数}}
+        self.stats = {}
+        self.hints = {}
+        self._stats_lock = threading.Lock()
         if self.passwords_file and os.path.exists(self.passwords_file):
-            self.load_passwords()
-    
+            self.load_stats()
+
+    @property
+    def passwords(self):
+        """当前密码的只读元组（按密码本顺序）"""
+        return self.store.snapshot()
+
     def load_passwords(self):
-        """从.txt文件加载密码，每行一个密码"""
-        if not self.passwords_file or not os.path.exists(self.passwords_file):
-            self.passwords = []
-            return
-        
-        try:
-            with open(self.passwords_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                # 去除空白字符和空行
-                self.passwords = [line.strip() for line in lines if line.strip()]
-        except Exception:
-            self.passwords = []
+        """从.txt文件重新加载密码，每行一个密码"""
+        self.store.reload()
+        self.load_stats()
     
     def save_passwords(self):
-        """保存密码到.txt文件，每行一个密码"""
-        if not self.passwords_file:
-            return
-        
-        try:
-            # 确保目录存在
-            directory = os.path.dirname(self.passwords_file)
-            if directory and not os.path.exists(directory):
-                os.makedirs(directory)
-            
-            with open(self.passwords_file, 'w', encoding='utf-8') as f:
-                for password in self.passwords:
-                    f.write(password + '\n')
-        except Exception:
-            pass
+        """把密码本完整写回.txt文件（平时的修改只追加到变更日志，由存储在后台合并）"""
+        self.store.compact(wait=True)
     
     def add_password(self, password):
         """添加密码"""
         if not password:
             return False
-        if password not in self.passwords:
-            self.passwords.append(password)
-            self.save_passwords()
-            return True
-        return False
+        return self.store.add(password)
+
+    def add_passwords(self, passwords):
+        """批量添加密码（只写一次），返回新增的数量"""
+        return self.store.add_many(passwords)
     
     def remove_password(self, password):
         """移除密码"""
-        if password in self.passwords:
-            self.passwords.remove(password)
-            self.save_passwords()
-            return True
-        return False
+        return self.store.remove(password)
+
+    def remove_passwords(self, passwords):
+        """批量移除密码（只写一次），返回移除的数量"""
+        return self.store.remove_many(passwords)
+
+    def import_passwords(self, file_path, progress_callback=None, cancel_event=None, chunk_lines=50000):
+        """
+        从文本文件批量导入密码（每行一个）：逐行读取，最后一次性写入变更日志
+        Args:
+            progress_callback: 读取过程中定期调用 progress_callback(已读字节数, 文件总字节数)
+            cancel_event: 置位时放弃导入（不写入任何密码）
+        Returns:
+            新增的密码数量；取消时返回 None
+        """
+        total = os.path.getsize(file_path)
+        done = 0
+        passwords = []
+        with open(file_path, 'rb') as f:
+            for i, line in enumerate(f, 1):
+                done += len(line)
+                password = line.decode('utf-8', errors='replace').strip()
+                if i == 1:
+                    password = password.lstrip('\ufeff')
+                if password:
+                    passwords.append(password)
+                if i % chunk_lines == 0:
+                    if cancel_event is not None and cancel_event.is_set():
+                        return None
+                    if progress_callback:
+                        progress_callback(done, total)
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        if progress_callback:
+            progress_callback(total, total)
+        return self.store.add_many(passwords)
+
+    def has_password(self, password):
+        return password in self.store
+
+    def count_passwords(self):
+        return len(self.store)
     
     def get_all_passwords(self):
-        """获取所有密码"""
-        return self.passwords.copy()
+        """获取所有密码（只读元组，修改前多次调用共享同一个对象，不复制）"""
+        return self.store.snapshot()
+
+    def deduplicate(self):
+        """去掉密码本文件中的重复行（加载时已在内存中去重），有重复时返回 True"""
+        if not self.store.duplicates:
+            return False
+        self.store.compact(wait=True)
+        return True
     
     def set_passwords_file(self, file_path):
         """设置密码文件路径"""
         self.passwords_file = file_path
+        self.store = PasswordStore(file_path)
         if file_path and os.path.exists(file_path):
-            self.load_passwords()
+            self.load_stats()
         else:
-            self.passwords = []
\ No newline at end of file
+            self.stats = {}
+            self.hints = {}
+
+    def _get_stats_file(self):
+        """统计文件与密码本同名，后缀为 .stats.json，命中时只重写这个小文件"""
+        if not self.passwords_file:
+            return None
+        return os.path.splitext(self.passwords_file)[0] + ".stats.json"
+
+    def load_stats(self):
+        """加载成功统计"""
+        self.stats = {}
+        self.hints = {}
+        stats_file = self._get_stats_file()
+        if not stats_file or not os.path.exists(stats_file):
+            return
+        try:
+            with open(stats_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.stats = data.get("passwords", {})
+            self.hints = data.get("hints", {})
+        except Exception:
+            self.stats = {}
+            self.hints = {}
+
+    def save_stats(self):
+        """保存成功统计（先写临时文件再替换）"""
+        stats_file = self._get_stats_file()
+        if not stats_file:
+            return
+        data = {
+            "passwords": self.stats,
+            "hints": self.hints,
+            "last_updated": datetime.now().isoformat()
+        }
+        try:
+            temp_file = stats_file + ".tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_file, stats_file)
+        except Exception:
+            pass
+
+    @staticmethod
+    def get_hint_key(archive_path):
+        """从压缩包文件名中提取前缀提示词"""
+        if not archive_path:
+            return None
+        match = _HINT_TOKEN_RE.search(os.path.basename(archive_path).lower())
+        return match.group(0) if match else None
+
+    def record_success(self, password, archive_path=None):
+        """记录一次成功解压：更新次数、衰减得分、最近成功时间和文件名前缀提示"""
+        if not password:
+            return
+        now = time.time()
+        with self._stats_lock:
+            entry = self.stats.setdefault(password, {"count": 0, "score": 0.0, "last": now})
+            entry["score"] = self._decayed_score(entry, now) + 1.0
+            entry["count"] += 1
+            entry["last"] = now
+            hint_key = self.get_hint_key(archive_path)
+            if hint_key:
+                counts = self.hints.setdefault(hint_key, {})
+                counts[password] = counts.get(password, 0) + 1
+            self.save_stats()
+
+    @staticmethod
+    def _decayed_score(entry, now):
+        elapsed = max(0.0, now - entry.get("last", now))
+        return entry.get("score", 0.0) * 0.5 ** (elapsed / SUCCESS_HALF_LIFE)
+
+    def get_ordered_passwords(self, archive_path=None):
+        """
+        按历史成功情况排序的密码序列：
+        先按文件名前缀提示的命中次数，再按随时间衰减的成功得分，其余保持密码本顺序
+        只对有统计的少数密码排序，其余在遍历时从快照中按原顺序取出（OrderedPasswords），不复制整个密码本
+        """
+        passwords = self.store.snapshot()
+        if not self.stats:
+            return passwords
+        now = time.time()
+        with self._stats_lock:
+            hint_counts = dict(self.hints.get(self.get_hint_key(archive_path), {}))
+            scores = {pwd: self._decayed_score(entry, now) for pwd, entry in self.stats.items()}
+        store = self.store
+        promoted = [pwd for pwd in set(scores) | set(hint_counts) if pwd in store]
+        if not promoted:
+            return passwords
+        # 得分相同的按密码本顺序
+        promoted.sort(key=lambda pwd: (-hint_counts.get(pwd, 0), -scores.get(pwd, 0.0), store.position(pwd)))
+        return OrderedPasswords(promoted, passwords)
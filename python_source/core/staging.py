@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+
+
+class StagingArea:
+    """
+    解压暂存目录：建在目标目录的同级位置（同一文件系统），
+    解压成功后用重命名提交到目标目录（不复制数据），失败时直接删除。
+
+    用法:
+        with StagingArea(destination) as staging:
+            if handler.extract(archive, staging.path):
+                staging.commit()
+        # 未提交时退出 with 块会自动丢弃暂存目录
+    """
+
+    def __init__(self, destination):
+        self.destination = os.path.abspath(destination)
+        parent = os.path.dirname(self.destination)
+        if not os.path.exists(parent):
+            os.makedirs(parent)
+        # 以点开头的隐藏目录，文件浏览器中不会看到半截的解压结果
+        prefix = "." + os.path.basename(self.destination) + ".partial-"
+        self.path = tempfile.mkdtemp(prefix=prefix, dir=parent)
+        self.committed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if not self.committed:
+            self.discard()
+        return False
+
+    def commit(self):
+        """把暂存目录提交到目标目录：目标不存在（或为空目录）时整体重命名，否则逐项移动合并"""
+        if os.path.isdir(self.destination) and not os.listdir(self.destination):
+            os.rmdir(self.destination)
+        if not os.path.exists(self.destination):
+            os.replace(self.path, self.destination)
+        else:
+            self._merge(self.path, self.destination)
+            shutil.rmtree(self.path, ignore_errors=True)
+        self.committed = True
+
+    def discard(self):
+        """丢弃暂存目录及其中的半截文件"""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    @classmethod
+    def _merge(cls, source_dir, target_dir):
+        """把 source_dir 中的内容移动到 target_dir，同名文件覆盖（与 7z -y 一致）"""
+        with os.scandir(source_dir) as it:
+            entries = list(it)
+        for entry in entries:
+            target = os.path.join(target_dir, entry.name)
+            if entry.is_dir(follow_symlinks=False) and os.path.isdir(target) and not os.path.islink(target):
+                cls._merge(entry.path, target)
+                continue
+            if os.path.isdir(target) and not os.path.islink(target):
+                shutil.rmtree(target)
+            os.replace(entry.path, target)
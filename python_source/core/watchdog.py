@@ -0,0 +1,124 @@
+import os
+import signal
+import subprocess
+import threading
+import time
+
+
+class CancelToken(threading.Event):
+    """
+    取消令牌：界面的“停止”按钮或命令行的 Ctrl+C 调用 cancel()。
+    本身是 threading.Event，可以直接作为 cancel_event 传给 SevenZipHandler；
+    link() 关联的其他 Event（如密码搜索内部的事件）会一起置位。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._linked = []
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        with self._lock:
+            self.set()
+            linked = list(self._linked)
+        for event in linked:
+            event.set()
+
+    @property
+    def cancelled(self):
+        return self.is_set()
+
+    def link(self, event):
+        with self._lock:
+            if self.is_set():
+                event.set()
+            else:
+                self._linked.append(event)
+
+    def unlink(self, event):
+        with self._lock:
+            if event in self._linked:
+                self._linked.remove(event)
+
+
+def process_group_kwargs(creationflags=0):
+    """Popen 参数：让 7z 在独立的进程组中运行，终止时可以连同子进程一起结束"""
+    if os.name == "nt":
+        return {"creationflags": creationflags | getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0)}
+    return {"creationflags": creationflags, "start_new_session": True}
+
+
+def kill_process_tree(process):
+    """终止进程及其进程组"""
+    if process.poll() is not None:
+        return
+    try:
+        if os.name == "nt":
+            subprocess.run(
+                ["taskkill", "/T", "/F", "/PID", str(process.pid)],
+                capture_output=True,
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+            )
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except Exception as e:
+        print(f"Failed to kill process group: {e}")
+    if process.poll() is None:
+        process.kill()
+
+
+class ProgressWatchdog:
+    """
+    进度看门狗：在独立线程中检查 7z 的输出活动，
+    超过 stall_timeout 秒没有任何进度，或取消令牌被置位时，终止整个进程组。
+    与固定的总超时不同，正常进行中的大文件解压不会被中断；
+    也不依赖读取输出的线程，7z 完全不输出时同样能够终止。
+    """
+
+    STALLED = "stalled"
+    CANCELLED = "cancelled"
+
+    def __init__(self, process, activity, stall_timeout=120, cancel_token=None, poll_interval=0.2):
+        """
+        Args:
+            process: subprocess.Popen
+            activity: 返回最近一次进度的 time.monotonic() 时间的函数（如 lambda: reader.last_activity）
+            stall_timeout: 允许的最长无进度时间（秒），0 或 None 表示不检查
+        """
+        self.process = process
+        self.activity = activity
+        self.stall_timeout = stall_timeout
+        self.cancel_token = cancel_token
+        self.poll_interval = poll_interval
+        self.reason = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def triggered(self):
+        return self.reason is not None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop_event.wait(self.poll_interval):
+            if self.process.poll() is not None:
+                return
+            if self.cancel_token is not None and self.cancel_token.is_set():
+                self._trigger(self.CANCELLED)
+                return
+            if self.stall_timeout and time.monotonic() - self.activity() > self.stall_timeout:
+                self._trigger(self.STALLED)
+                return
+
+    def _trigger(self, reason):
+        self.reason = reason
+        kill_process_tree(self.process)
@@ -0,0 +1,312 @@
+import os
+import sys
+import json
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+
+from utils.volume_resolver import VolumeResolver
+from core.job_queue import JOB_CANCELLED
+
+# inotify 事件掩码（见 <sys/inotify.h>）
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyEventSource:
+    """
+    Linux inotify（通过 ctypes 调用 libc），只用来得知哪些目录有变化；
+    具体有哪些分卷组仍由重新扫描该目录得到。
+    skip_dir: 判断是否不监视某个目录的函数(路径) -> bool，由 FolderWatcher 在每次等待前更新
+    """
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watches = {}
+        self.skip_dir = None
+
+    @staticmethod
+    def available():
+        return sys.platform.startswith("linux")
+
+    def add_watch(self, directory):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            # 目录可能在添加前被删除，忽略
+            if error not in (errno.ENOENT, errno.ENOTDIR):
+                print(f"inotify_add_watch failed for {directory}: {os.strerror(error)}")
+            return False
+        self._watches[wd] = directory
+        return True
+
+    def add_tree(self, root):
+        """监视目录及其所有子目录，返回加入监视的目录列表"""
+        skip_dir = self.skip_dir
+        if skip_dir is not None and skip_dir(root):
+            return []
+        directories = []
+        for current, subdirs, _ in os.walk(root):
+            if skip_dir is not None:
+                subdirs[:] = [name for name in subdirs if not skip_dir(os.path.join(current, name))]
+            if self.add_watch(current):
+                directories.append(current)
+        return directories
+
+    def read_changes(self, timeout):
+        """
+        等待最多 timeout 秒，返回 (有变化的目录集合, 是否事件溢出需要全量扫描)
+        """
+        changed = set()
+        overflow = False
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return changed, overflow
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed, overflow
+
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + name_len].rstrip(b"\0")
+            offset += name_len
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            directory = self._watches.get(wd)
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            if directory is None:
+                continue
+            changed.add(directory)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and name:
+                # 新出现的子目录：加入监视，并扫描其中已有的文件
+                changed.update(self.add_tree(os.path.join(directory, os.fsdecode(name))))
+        return changed, overflow
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class FolderWatcher:
+    """
+    监视文件夹，自动解压新到达并且已经下载完成的压缩包：
+    - Linux 上用 inotify 得知变化，其他平台（或 inotify 不可用时）定时轮询
+    - 分卷组的所有分卷大小在 settle_seconds 秒内不再变化、且没有缺卷时才认为下载完成
+    - 完成的分卷组交给 JobQueue（并发数由 JobQueue 限制）
+    - 已处理的分卷组（路径 + 各卷大小）记录在状态文件中，重启后不会重复解压
+    """
+
+    def __init__(self, job_queue, directories, state_file=None, settle_seconds=5.0, poll_interval=2.0,
+                 recursive=True, use_inotify=True, status_callback=None):
+        self.job_queue = job_queue
+        self.directories = [os.path.abspath(d) for d in directories]
+        self.state_file = state_file
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.recursive = recursive
+        self.status_callback = status_callback
+        self.processed = {}
+        self._pending = {}
+        self._inflight = {}
+        self._dirty = set()
+        self._stop_event = threading.Event()
+        self._events = None
+        if use_inotify and InotifyEventSource.available():
+            try:
+                self._events = InotifyEventSource()
+            except (OSError, AttributeError) as e:
+                print(f"inotify unavailable, falling back to polling: {e}")
+        self.load_state()
+
+    @property
+    def mode(self):
+        return "inotify" if self._events is not None else "polling"
+
+    def _log(self, message):
+        print(message)
+        if self.status_callback:
+            self.status_callback("log", message)
+
+    def load_state(self):
+        """读取状态文件，丢弃压缩包已不存在的记录，保持文件很小"""
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                processed = json.load(f).get("processed", {})
+            self.processed = {key: record for key, record in processed.items() if os.path.exists(key)}
+        except Exception as e:
+            print(f"Failed to load watch state: {e}")
+
+    def save_state(self):
+        if not self.state_file:
+            return
+        try:
+            directory = os.path.dirname(self.state_file)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            temp_file = self.state_file + ".tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({"processed": self.processed}, f, ensure_ascii=False, indent=1)
+            os.replace(temp_file, self.state_file)
+        except Exception as e:
+            print(f"Failed to save watch state: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+
+    @staticmethod
+    def is_staging_dir(path):
+        """解压暂存目录（StagingArea 创建的 .<目标>.partial-XXXX）"""
+        name = os.path.basename(path)
+        return name.startswith(".") and ".partial-" in name
+
+    def _dir_filter(self):
+        """
+        返回判断是否跳过某个目录的函数：跳过解压暂存目录，以及仍在进行的任务的目标目录
+        （其中是正在写入的解压结果，可能包含半截的压缩包）。目标目录列表在调用时取一次
+        """
+        destinations = [os.path.normcase(os.path.abspath(job.destination))
+                        for job in self.job_queue.jobs() if not job.finished]
+
+        def skip_dir(path):
+            if self.is_staging_dir(path):
+                return True
+            if not destinations:
+                return False
+            path = os.path.normcase(os.path.abspath(path))
+            return any(path == destination or path.startswith(destination + os.sep) for destination in destinations)
+
+        return skip_dir
+
+    def run(self):
+        """阻塞运行直到 stop() 被调用"""
+        self._log(f"开始监视 ({self.mode}): {', '.join(self.directories)}")
+        if self._events is not None:
+            self._events.skip_dir = self._dir_filter()
+            for directory in self.directories:
+                if self.recursive:
+                    self._events.add_tree(directory)
+                else:
+                    self._events.add_watch(directory)
+        # 启动时全量扫描一次，处理停止期间到达的压缩包
+        self._scan(full=True)
+        try:
+            while not self._stop_event.is_set():
+                full = self._wait_for_changes()
+                self._scan(full=full)
+                self.record_finished()
+        finally:
+            self.record_finished()
+            self.save_state()
+            if self._events is not None:
+                self._events.close()
+        self._log("已停止监视")
+
+    def start(self):
+        """在后台线程中运行"""
+        thread = threading.Thread(target=self.run, daemon=True)
+        thread.start()
+        return thread
+
+    def _wait_for_changes(self):
+        """等待变化，返回是否需要全量扫描（轮询模式或 inotify 事件溢出）"""
+        if self._events is None:
+            self._stop_event.wait(self.poll_interval)
+            return True
+        # 超时后也要返回，按时复查仍在等待稳定的分卷组
+        self._events.skip_dir = self._dir_filter()
+        changed, overflow = self._events.read_changes(self.poll_interval)
+        self._dirty.update(changed)
+        return overflow
+
+    def _scan(self, full):
+        """扫描有变化的目录（以及仍在等待稳定的分卷组所在目录），跳过暂存目录和仍在解压的目标目录"""
+        skip_dir = self._dir_filter()
+        if full:
+            volume_sets = []
+            for directory in self.directories:
+                volume_sets.extend(VolumeResolver.scan(directory, recursive=self.recursive, skip_dir=skip_dir))
+            scanned_dirs = None
+        else:
+            scanned_dirs = self._dirty | {os.path.dirname(key) for key in self._pending}
+            scanned_dirs = {directory for directory in scanned_dirs if not skip_dir(directory)}
+            volume_sets = []
+            for directory in scanned_dirs:
+                volume_sets.extend(VolumeResolver.scan(directory))
+        self._dirty = set()
+
+        now = time.monotonic()
+        seen = set()
+        for volume_set in volume_sets:
+            key = os.path.normcase(os.path.abspath(volume_set.first_volume))
+            seen.add(key)
+            self._observe(key, volume_set, now)
+
+        # 被删除或改名的分卷组不再等待
+        for key in list(self._pending):
+            if key not in seen and (scanned_dirs is None or os.path.dirname(key) in scanned_dirs):
+                del self._pending[key]
+
+    def _observe(self, key, volume_set, now):
+        sizes = list(volume_set.sizes)
+        record = self.processed.get(key)
+        if record is not None and record.get("sizes") == sizes:
+            return
+        if key in self._inflight:
+            return
+
+        pending = self._pending.get(key)
+        if pending is None or pending[0] != sizes:
+            # 新出现或大小仍在变化：重新计时
+            self._pending[key] = (sizes, now)
+            return
+        if now - pending[1] < self.settle_seconds:
+            return
+        if volume_set.has_gaps or volume_set.check():
+            # 分卷不齐或大小异常，可能还在下载，继续等待
+            return
+
+        del self._pending[key]
+        job = self.job_queue.add_volume_set(volume_set)
+        if job is not None:
+            self._inflight[key] = (job, sizes)
+            self._log(f"检测到下载完成的压缩包: {os.path.basename(volume_set.first_volume)}")
+
+    def record_finished(self):
+        """把已结束的任务写入状态文件（停止监视后等待剩余任务结束时也可调用）"""
+        finished = [key for key, (job, _) in self._inflight.items() if job.finished]
+        if not finished:
+            return
+        for key in finished:
+            job, sizes = self._inflight.pop(key)
+            if job.state == JOB_CANCELLED:
+                # 取消的任务不记录，下次监视时重新解压
+                continue
+            self.processed[key] = {"sizes": sizes, "state": job.state, "time": round(time.time())}
+        self.save_state()
@@ -1,6 +1,5 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import threading
 import os
 
 # 注意：tkinterdnd2 需要单独安装: pip install tkinterdnd2
@@ -12,7 +11,24 @@ except ImportError:
     print("Warning: tkinterdnd2 not installed. Drag and drop disabled.")
 
 from .password_book_gui import PasswordBookGUI
+from .ui_event_queue import UIEventQueue
 from utils.file_utils import FileUtils
+from core.entry_selection import EntrySelection
+from core.job_queue import JobQueue, JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_FAILED, JOB_CANCELLED, JOB_FINISHED_STATES
+
+# 任务状态在列表中的显示文字
+JOB_STATE_TEXT = {
+    JOB_QUEUED: "排队中",
+    JOB_RUNNING: "解压中",
+    JOB_DONE: "完成",
+    JOB_FAILED: "失败",
+    JOB_CANCELLED: "已取消"
+}
+
+# 界面从事件队列取事件的节拍（毫秒）
+UI_TICK_MS = 50
+# 日志区最多保留的行数
+MAX_LOG_LINES = 2000
 
 class MainWindow:
     def __init__(self, root, config, extractor_engine, password_manager):
@@ -26,11 +42,23 @@ class MainWindow:
         if passwords_file and os.path.exists(passwords_file):
             self.pwd_manager.set_passwords_file(passwords_file)
         
+        # 批量解压队列，所有解压都经由队列在后台线程中进行
+        self.job_queue = JobQueue(
+            self.engine,
+            max_parallel=self.config.get("max_parallel_jobs"),
+            event_callback=self._on_job_event
+        )
+        self._job_rows = {}
+        self._batch_jobs = []
+        # 工作线程只往队列里放事件，界面按固定节拍批量处理
+        self.ui_events = UIEventQueue(MAX_LOG_LINES)
+
         self.root.title("Python WinRAR 解压工具")
-        self.root.geometry("600x500")
+        self.root.geometry("700x640")
         
         self._setup_ui()
         self._setup_dnd()
+        self.root.after(UI_TICK_MS, self._poll_events)
 
     def _setup_ui(self):
         main_frame = ttk.Frame(self.root, padding="20")
@@ -47,6 +75,14 @@ class MainWindow:
         browse_btn = ttk.Button(file_frame, text="浏览", command=self.browse_file)
         browse_btn.pack(side=tk.RIGHT)
 
+        # 条目筛选：只解压匹配的文件，分号分隔，! 开头为排除，留空解压全部
+        filter_frame = ttk.Frame(main_frame)
+        filter_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(filter_frame, text="只解压（如 *.nfo; docs/; !*.tmp）:").pack(side=tk.LEFT, padx=(0, 5))
+        self.filter_var = tk.StringVar()
+        filter_entry = ttk.Entry(filter_frame, textvariable=self.filter_var)
+        filter_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
         # 拖拽提示区
         self.drop_label = tk.Label(
             main_frame,
@@ -66,6 +102,23 @@ class MainWindow:
         self.progress = ttk.Progressbar(main_frame, mode='determinate')
         self.progress.pack(fill=tk.X, pady=10)
 
+        # 任务列表
+        job_frame = ttk.LabelFrame(main_frame, text="解压任务", padding="5")
+        job_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 5))
+
+        self.job_tree = ttk.Treeview(job_frame, columns=("file", "state", "progress"), show="headings", height=5)
+        self.job_tree.heading("file", text="文件")
+        self.job_tree.heading("state", text="状态")
+        self.job_tree.heading("progress", text="进度")
+        self.job_tree.column("file", width=420)
+        self.job_tree.column("state", width=80, anchor=tk.CENTER)
+        self.job_tree.column("progress", width=60, anchor=tk.CENTER)
+        self.job_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        job_scrollbar = ttk.Scrollbar(job_frame, orient=tk.VERTICAL, command=self.job_tree.yview)
+        job_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.job_tree.config(yscrollcommand=job_scrollbar.set)
+
         # 日志显示区域
         log_frame = ttk.LabelFrame(main_frame, text="解压日志", padding="5")
         log_frame.pack(fill=tk.BOTH, expand=True, pady=(10, 0))
@@ -87,6 +140,13 @@ class MainWindow:
         
         self.extract_btn = ttk.Button(control_frame, text="开始解压", command=self.start_extraction)
         self.extract_btn.pack(side=tk.LEFT, padx=5)
+
+        add_dir_btn = ttk.Button(control_frame, text="解压文件夹", command=self.browse_directory)
+        add_dir_btn.pack(side=tk.LEFT, padx=5)
+
+        # 取消所有排队和正在解压的任务
+        stop_btn = ttk.Button(control_frame, text="停止", command=self.stop_extraction)
+        stop_btn.pack(side=tk.LEFT, padx=5)
         
         # 密码本路径选择
         pwd_path_btn = ttk.Button(control_frame, text="选择密码本", command=self.select_passwords_file)
@@ -104,23 +164,23 @@ class MainWindow:
             self.drop_label.config(text="请安装 tkinterdnd2 以支持拖拽")
 
     def handle_drop(self, event):
-        # 提取路径，处理可能包含 {} 的 Windows 路径
-        path = event.data
-        if path.startswith('{') and path.endswith('}'):
-            path = path[1:-1]
-        
-        if FileUtils.is_archive(path):
+        # 拖入多个文件时 event.data 形如 "{C:/a b.rar} C:/c.zip"，用 Tcl 的列表解析拆分
+        paths = [p for p in self.root.tk.splitlist(event.data) if os.path.isdir(p) or FileUtils.is_archive(p)]
+        if not paths:
+            messagebox.showwarning("格式不支持", "请拖拽有效的压缩文件 (.rar, .zip, .7z, .001, .part1等) 或文件夹")
+            return
+
+        if len(paths) == 1 and not os.path.isdir(paths[0]):
             # 识别并获取第一卷
+            path = paths[0]
             first_volume = FileUtils.get_first_volume(path)
             self.file_path_var.set(first_volume)
-            
+
             if first_volume != path:
                 self.status_var.set(f"已自动识别分卷主文件: {os.path.basename(first_volume)}")
-            
-            # 自动开始
-            self.start_extraction()
-        else:
-            messagebox.showwarning("格式不支持", "请拖拽有效的压缩文件 (.rar, .zip, .7z, .001, .part1等)")
+
+        # 自动开始
+        self.enqueue_paths(paths)
 
     def browse_file(self):
         path = filedialog.askopenfilename(
@@ -129,75 +189,177 @@ class MainWindow:
         if path:
             self.file_path_var.set(path)
 
+    def browse_directory(self):
+        """选择文件夹，解压其中所有压缩包"""
+        path = filedialog.askdirectory(title="选择包含压缩包的文件夹")
+        if path:
+            self.enqueue_paths([path])
+
     def start_extraction(self):
         path = self.file_path_var.get()
         if not path or not os.path.exists(path):
             messagebox.showwarning("错误", "请选择有效的文件")
             return
 
-        dest = FileUtils.get_default_destination(path)
-        
-        self.extract_btn.config(state=tk.DISABLED)
-        self.progress['value'] = 0
-        self.progress.config(mode='determinate')
-        self.status_var.set("正在解压中，请稍候...")
-        self.log_text.config(state=tk.NORMAL)
-        self.log_text.delete(1.0, tk.END)
-        self.log_text.insert(tk.END, f"开始解压文件: {path}\n")
-        self.log_text.insert(tk.END, f"目标目录: {dest}\n")
-        self.log_text.config(state=tk.DISABLED)
-        
-        # 开启线程避免界面卡死
-        thread = threading.Thread(target=self.run_extraction, args=(path, dest))
-        thread.daemon = True
-        thread.start()
-
-    def run_extraction(self, path, dest):
-        def status_callback(event_type, message):
-            """状态回调函数"""
-            if event_type == "status":
-                self.root.after(0, lambda: self.status_var.set(message))
-            elif event_type == "log":
-                self.root.after(0, lambda: self.update_log(message))
-            elif event_type == "info":
-                self.root.after(0, lambda: self.update_log(f"[INFO] {message}"))
-            elif event_type == "error":
-                self.root.after(0, lambda: self.update_log(f"[ERROR] {message}"))
-            elif event_type == "progress":
-                # 更新进度条
-                try:
-                    percent = int(message)
-                    self.root.after(0, lambda p=percent: self.progress.config(value=p))
-                except (ValueError, TypeError):
-                    pass
-        
-        success, used_pwd = self.engine.extract_with_passwords(path, dest, status_callback)
-        
-        self.root.after(0, lambda: self.finish_extraction(success, used_pwd, dest))
+        self.enqueue_paths([path])
 
-    def finish_extraction(self, success, used_pwd, dest):
-        self.progress['value'] = 100 if success else 0
-        self.extract_btn.config(state=tk.NORMAL)
-        
-        if success:
-            msg = f"解压成功！\n保存至: {dest}"
-            if used_pwd:
-                msg += f"\n使用密码: {used_pwd}"
+    def stop_extraction(self):
+        """取消所有未结束的任务，正在运行的 7z 进程由看门狗终止"""
+        if self.job_queue.is_idle():
+            return
+        self.status_var.set("正在取消...")
+        self.job_queue.cancel_all()
+
+    def enqueue_paths(self, paths):
+        """把文件/文件夹加入解压队列（后台线程执行，界面不会卡死）"""
+        if self.job_queue.is_idle():
+            # 上一批已全部结束，开始新的一批
+            self._batch_jobs = []
+            self.progress['value'] = 0
+            self.log_text.config(state=tk.NORMAL)
+            self.log_text.delete(1.0, tk.END)
+            self.log_text.config(state=tk.DISABLED)
+
+        selection = EntrySelection.parse(self.filter_var.get())
+        jobs = self.job_queue.add_paths(paths, selection)
+        if not jobs:
+            self.status_var.set("没有新的压缩包需要解压（可能已在队列中）")
+            return
+
+        self._batch_jobs.extend(jobs)
+        self.status_var.set(f"已加入 {len(jobs)} 个解压任务，正在解压中，请稍候...")
+        for job in jobs:
+            self._add_job_row(job)
+
+    def _add_job_row(self, job):
+        if job.job_id in self._job_rows:
+            return
+        item = self.job_tree.insert("", tk.END, values=(os.path.basename(job.archive_path), JOB_STATE_TEXT[job.state], f"{job.progress}%"))
+        self._job_rows[job.job_id] = item
+
+    def _on_job_event(self, job, event_type, message):
+        """队列事件回调（在工作线程中调用），只入队，不直接操作界面"""
+        if event_type == "state":
+            self.ui_events.put_state(job, message)
+        elif event_type == "progress":
+            self.ui_events.put_progress(job, message)
+        elif event_type == "status":
+            if len(self._batch_jobs) <= 1:
+                self.ui_events.put_status(message)
+        elif event_type == "log":
+            self.ui_events.put_log(f"[{job.job_id}] {message}")
+        elif event_type == "info":
+            self.ui_events.put_log(f"[{job.job_id}] [INFO] {message}")
+        elif event_type == "error":
+            self.ui_events.put_log(f"[{job.job_id}] [ERROR] {message}")
+
+    def _poll_events(self):
+        """按固定节拍批量处理工作线程产生的事件"""
+        try:
+            self._apply_events()
+        finally:
+            self.root.after(UI_TICK_MS, self._poll_events)
+
+    def _apply_events(self):
+        states, progress, status, logs, dropped = self.ui_events.drain()
+
+        log_lines = []
+        batch_finished = False
+        for job, state in states:
+            self._add_job_row(job)
+            self._update_job_row(job)
+            if state == JOB_RUNNING:
+                log_lines.append(f"[{job.job_id}] 开始解压文件: {job.archive_path}")
+                log_lines.append(f"[{job.job_id}] 目标目录: {job.destination}")
+            elif state in JOB_FINISHED_STATES:
+                batch_finished = True
+
+        if dropped:
+            log_lines.append(f"... 日志过多，已省略 {dropped} 行 ...")
+        log_lines.extend(logs)
+        if log_lines:
+            self.append_log_lines(log_lines)
+
+        if status is not None:
+            self.status_var.set(status)
+
+        for job, _ in progress.values():
+            self._update_job_row(job)
+        if progress or batch_finished:
+            self._update_overall_progress()
+
+        if batch_finished and self.job_queue.is_idle():
+            self.finish_batch()
+
+    def _update_job_row(self, job):
+        item = self._job_rows.get(job.job_id)
+        if item:
+            self.job_tree.item(item, values=(os.path.basename(job.archive_path), JOB_STATE_TEXT[job.state], f"{job.progress}%"))
+
+    def _update_overall_progress(self):
+        """总进度为本批任务进度的平均值"""
+        if self._batch_jobs:
+            total = sum(100 if job.state == JOB_DONE else job.progress for job in self._batch_jobs)
+            self.progress.config(value=total / len(self._batch_jobs))
+
+    def finish_batch(self):
+        """一批任务全部结束后汇总结果"""
+        jobs = self._batch_jobs
+        if not jobs:
+            return
+        # 清空本批，避免多个结束事件重复弹窗
+        self._batch_jobs = []
+        succeeded = [job for job in jobs if job.state == JOB_DONE]
+        failed = [job for job in jobs if job.state == JOB_FAILED]
+        cancelled = [job for job in jobs if job.state == JOB_CANCELLED]
+        self.progress['value'] = 100 if succeeded else 0
+
+        if len(jobs) == 1:
+            job = jobs[0]
+            if succeeded:
+                msg = f"解压成功！\n保存至: {job.destination}"
+                if job.password:
+                    msg += f"\n使用密码: {job.password}"
+                else:
+                    msg += "\n(无密码解压)"
+                self.status_var.set("解压完成")
+                messagebox.showinfo("成功", msg)
+            elif cancelled:
+                self.status_var.set("已取消")
             else:
-                msg += "\n(无密码解压)"
-            self.status_var.set("解压完成")
-            messagebox.showinfo("成功", msg)
+                self.status_var.set("解压失败")
+                messagebox.showerror("失败", job.error or "解压失败。可能是密码不正确或文件已损坏。")
+            return
+
+        summary = f"成功 {len(succeeded)} 个，失败 {len(failed)} 个"
+        if cancelled:
+            summary += f"，取消 {len(cancelled)} 个"
+        self.status_var.set(f"批量解压完成：{summary}")
+        if failed:
+            names = "\n".join(f"{os.path.basename(job.archive_path)}（{job.error}）" for job in failed[:10])
+            if len(failed) > 10:
+                names += f"\n... 等 {len(failed)} 个"
+            messagebox.showwarning("完成", f"{summary}。\n失败的压缩包:\n{names}")
+        elif cancelled:
+            messagebox.showinfo("已取消", f"{summary}。")
         else:
-            self.status_var.set("解压失败")
-            messagebox.showerror("失败", "解压失败。可能是密码不正确或文件已损坏。")
+            messagebox.showinfo("成功", f"全部 {len(succeeded)} 个压缩包解压成功！")
 
     def open_password_book(self):
         PasswordBookGUI(self.root, self.pwd_manager)
 
     def update_log(self, message):
         """更新日志显示区域"""
+        self.append_log_lines([message])
+
+    def append_log_lines(self, lines):
+        """一次插入多行日志，只保留最近 MAX_LOG_LINES 行"""
         self.log_text.config(state=tk.NORMAL)
-        self.log_text.insert(tk.END, message + "\n")
+        self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+        # 文本末尾总有一个空行，因此行数 = 最后位置的行号 - 1
+        line_count = int(self.log_text.index("end-1c").split(".")[0]) - 1
+        if line_count > MAX_LOG_LINES:
+            self.log_text.delete("1.0", f"{line_count - MAX_LOG_LINES + 1}.0")
         self.log_text.see(tk.END)  # 自动滚动到最新消息
         self.log_text.config(state=tk.DISABLED)
     
@@ -210,7 +372,7 @@ class MainWindow:
         if path:
             self.pwd_manager.set_passwords_file(path)
             self.config.set("passwords_file", path)
-            password_count = len(self.pwd_manager.get_all_passwords())
+            password_count = self.pwd_manager.count_passwords()
             self.status_var.set(f"已加载 {password_count} 个密码")
             self.update_log(f"密码本已加载: {path}")
             self.update_log(f"包含 {password_count} 个密码")
@@ -1,14 +1,48 @@
+import threading
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, filedialog, messagebox
+from tkinter import font as tkfont
+
+# 增量筛选时每个节拍扫描的密码数，以及节拍间隔（毫秒）
+FILTER_CHUNK = 100000
+FILTER_DELAY_MS = 200
+# 导入进度的刷新间隔（毫秒）
+IMPORT_POLL_MS = 100
+
 
 class PasswordBookGUI:
+    """
+    密码本管理窗口。密码本可能有上百万行，因此：
+    - 列表是虚拟的：Listbox 中只放当前可见的几十行，滚动时按偏移量重新填充
+    - 选中状态按密码保存在集合中，与行的位置无关
+    - 筛选在界面节拍中分块扫描，输入时不会卡住，结果逐步显示
+    - 删除、导入都是批量操作，只写一次；大文件在后台线程中读取并显示进度
+    """
+
     def __init__(self, parent, password_manager):
         self.window = tk.Toplevel(parent)
         self.window.title("密码本管理")
-        self.window.geometry("400x500")
+        self.window.geometry("420x560")
         self.manager = password_manager
-        
+
+        # 当前显示的行（密码本快照或筛选结果）与第一行的偏移
+        self.rows = ()
+        self.top = 0
+        self.visible_count = 20
+        self.selected = set()
+        self._rendering = False
+        # 筛选状态：每次输入变化时递增 generation，旧的扫描自行停止
+        self._filter_generation = 0
+        self._filter_job = None
+        self._filter_done = True
+        # 导入状态
+        self._import_thread = None
+        self._import_cancel = None
+        self._import_progress = (0, 0)
+        self._import_result = None
+
         self._setup_ui()
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
         self.refresh_list()
 
     def _setup_ui(self):
@@ -17,66 +51,291 @@ class PasswordBookGUI:
 
         # 输入区域
         input_frame = ttk.Frame(frame)
-        input_frame.pack(fill=tk.X, pady=(0, 10))
-        
+        input_frame.pack(fill=tk.X, pady=(0, 5))
+
         self.pwd_entry = ttk.Entry(input_frame)
         self.pwd_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 5))
-        
-        add_btn = ttk.Button(input_frame, text="添加密码", command=self.add_password)
-        add_btn.pack(side=tk.RIGHT)
+        self.pwd_entry.bind("<Return>", lambda e: self.add_password())
+
+        self.add_btn = ttk.Button(input_frame, text="添加密码", command=self.add_password)
+        self.add_btn.pack(side=tk.RIGHT)
+
+        # 筛选区域
+        filter_frame = ttk.Frame(frame)
+        filter_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(filter_frame, text="筛选:").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *args: self._schedule_filter())
+        ttk.Entry(filter_frame, textvariable=self.filter_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
 
-        # 列表区域
-        self.listbox = tk.Listbox(frame, selectmode=tk.MULTIPLE)
+        self.count_var = tk.StringVar()
+        ttk.Label(frame, textvariable=self.count_var).pack(fill=tk.X, pady=(0, 5))
+
+        # 列表区域（虚拟列表：滚动条由我们根据偏移量设置）
+        list_frame = ttk.Frame(frame)
+        list_frame.pack(fill=tk.BOTH, expand=True)
+
+        self.listbox = tk.Listbox(list_frame, selectmode=tk.MULTIPLE, activestyle="none", exportselection=False)
         self.listbox.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
-        
-        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self.listbox.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.listbox.config(yscrollcommand=scrollbar.set)
+        self.listbox.bind("<<ListboxSelect>>", self._on_select)
+        self.listbox.bind("<Configure>", self._on_resize)
+        self.listbox.bind("<MouseWheel>", self._on_mousewheel)
+        self.listbox.bind("<Button-4>", lambda e: self.scroll_to(self.top - 3))
+        self.listbox.bind("<Button-5>", lambda e: self.scroll_to(self.top + 3))
+        self.listbox.bind("<Prior>", lambda e: self.scroll_to(self.top - self.visible_count))
+        self.listbox.bind("<Next>", lambda e: self.scroll_to(self.top + self.visible_count))
+
+        self.scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # 导入进度
+        self.progress = ttk.Progressbar(frame, mode="determinate", maximum=100)
 
         # 按钮区域
         btn_frame = ttk.Frame(self.window, padding="10")
         btn_frame.pack(fill=tk.X)
-        
-        del_btn = ttk.Button(btn_frame, text="删除选中", command=self.delete_selected)
-        del_btn.pack(side=tk.LEFT, padx=5)
-        
-        dedup_btn = ttk.Button(btn_frame, text="去重", command=self.deduplicate)
-        dedup_btn.pack(side=tk.LEFT, padx=5)
-        
-        close_btn = ttk.Button(btn_frame, text="关闭", command=self.window.destroy)
+
+        self.del_btn = ttk.Button(btn_frame, text="删除选中", command=self.delete_selected)
+        self.del_btn.pack(side=tk.LEFT, padx=5)
+
+        select_btn = ttk.Button(btn_frame, text="全选结果", command=self.select_all_rows)
+        select_btn.pack(side=tk.LEFT, padx=5)
+
+        self.import_btn = ttk.Button(btn_frame, text="导入...", command=self.import_file)
+        self.import_btn.pack(side=tk.LEFT, padx=5)
+
+        self.dedup_btn = ttk.Button(btn_frame, text="去重", command=self.deduplicate)
+        self.dedup_btn.pack(side=tk.LEFT, padx=5)
+
+        close_btn = ttk.Button(btn_frame, text="关闭", command=self.close)
         close_btn.pack(side=tk.RIGHT, padx=5)
 
+    # ---- 虚拟列表 ----
+
+    def _row_height(self):
+        bbox = self.listbox.bbox(0)
+        if bbox:
+            return bbox[3] + 1
+        return tkfont.nametofont(self.listbox.cget("font")).metrics("linespace") + 2
+
+    def _on_resize(self, event):
+        visible = max(1, event.height // max(1, self._row_height()))
+        if visible != self.visible_count:
+            self.visible_count = visible
+            self.render()
+
+    def _on_mousewheel(self, event):
+        # Windows 上每格 delta 为 120，macOS 上为 1
+        step = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self.scroll_to(self.top - step * 3)
+        return "break"
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(value) * len(self.rows)))
+        elif action == "scroll":
+            step = self.visible_count if unit == "pages" else 1
+            self.scroll_to(self.top + int(value) * step)
+
+    def scroll_to(self, top):
+        top = max(0, min(top, len(self.rows) - self.visible_count))
+        if top != self.top:
+            self.top = top
+            self.render()
+        return "break"
+
+    def render(self):
+        """只把可见的行放入 Listbox，并恢复这些行的选中状态"""
+        self._rendering = True
+        try:
+            self.top = max(0, min(self.top, len(self.rows) - self.visible_count))
+            visible = self.rows[self.top:self.top + self.visible_count]
+            self.listbox.delete(0, tk.END)
+            if visible:
+                self.listbox.insert(tk.END, *visible)
+            for i, pwd in enumerate(visible):
+                if pwd in self.selected:
+                    self.listbox.selection_set(i)
+            total = len(self.rows)
+            if total:
+                self.scrollbar.set(self.top / total, min(1.0, (self.top + len(visible)) / total))
+            else:
+                self.scrollbar.set(0.0, 1.0)
+        finally:
+            self._rendering = False
+        self._update_count()
+
+    def _on_select(self, event):
+        if self._rendering:
+            return
+        for i, pwd in enumerate(self.rows[self.top:self.top + self.visible_count]):
+            if self.listbox.selection_includes(i):
+                self.selected.add(pwd)
+            else:
+                self.selected.discard(pwd)
+        self._update_count()
+
+    def _update_count(self):
+        total = self.manager.count_passwords()
+        query = self.filter_var.get().strip()
+        if query:
+            text = f"匹配 {len(self.rows)} / {total} 个密码" + ("" if self._filter_done else "（筛选中...）")
+        else:
+            text = f"共 {total} 个密码"
+        if self.selected:
+            text += f"，已选中 {len(self.selected)} 个"
+        self.count_var.set(text)
+
     def refresh_list(self):
-        self.listbox.delete(0, tk.END)
-        for pwd in self.manager.get_all_passwords():
-            self.listbox.insert(tk.END, pwd)
+        """重新读取密码本（只取共享的快照，不复制），有筛选条件时重新筛选"""
+        if self.filter_var.get().strip():
+            self._start_filter()
+        else:
+            self.rows = self.manager.get_all_passwords()
+            self.render()
+
+    # ---- 增量筛选 ----
+
+    def _schedule_filter(self):
+        """输入停顿 FILTER_DELAY_MS 后才开始筛选"""
+        if self._filter_job is not None:
+            self.window.after_cancel(self._filter_job)
+        self._filter_job = self.window.after(FILTER_DELAY_MS, self._start_filter)
+
+    def _start_filter(self):
+        self._filter_job = None
+        self._filter_generation += 1
+        query = self.filter_var.get().strip().lower()
+        self.top = 0
+        if not query:
+            self._filter_done = True
+            self.rows = self.manager.get_all_passwords()
+            self.render()
+            return
+        source = self.manager.get_all_passwords()
+        # 完全相同的密码通过索引直接找到，排在最前
+        exact = self.filter_var.get().strip()
+        self.rows = [exact] if self.manager.has_password(exact) else []
+        self._filter_done = False
+        self._filter_step(self._filter_generation, source, query, exact, 0)
+
+    def _filter_step(self, generation, source, query, exact, start):
+        if generation != self._filter_generation or not self.window.winfo_exists():
+            return
+        chunk = source[start:start + FILTER_CHUNK]
+        self.rows.extend(pwd for pwd in chunk if query in pwd.lower() and pwd != exact)
+        start += FILTER_CHUNK
+        if start < len(source):
+            self.window.after(1, self._filter_step, generation, source, query, exact, start)
+        else:
+            self._filter_done = True
+        self.render()
+
+    # ---- 修改 ----
+
+    def _busy(self):
+        """后台导入正在写入密码本：按钮已禁用，快捷键（如输入框中的回车）也不能修改"""
+        return self._import_thread is not None
 
     def add_password(self):
+        if self._busy():
+            return
         pwd = self.pwd_entry.get().strip()
         if pwd:
             if self.manager.add_password(pwd):
-                self.refresh_list()
                 self.pwd_entry.delete(0, tk.END)
+                self.refresh_list()
+                # 滚动到新加入的密码（在密码本末尾）
+                if not self.filter_var.get().strip():
+                    self.scroll_to(len(self.rows))
             else:
-                messagebox.showinfo("提示", "密码已存在")
+                messagebox.showinfo("提示", "密码已存在", parent=self.window)
         else:
-            messagebox.showwarning("警告", "请输入密码")
+            messagebox.showwarning("警告", "请输入密码", parent=self.window)
+
+    def select_all_rows(self):
+        """选中当前显示的全部行（通常先筛选再全选、删除）"""
+        if self.rows:
+            self.selected.update(self.rows)
+            self.render()
 
     def delete_selected(self):
-        selected_indices = self.listbox.curselection()
-        if not selected_indices:
+        if not self.selected or self._busy():
             return
-        
-        if messagebox.askyesno("确认", f"确定删除选中的 {len(selected_indices)} 个密码吗？"):
-            # 倒序删除，避免索引变化
-            passwords_to_remove = [self.listbox.get(i) for i in selected_indices]
-            for pwd in passwords_to_remove:
-                self.manager.remove_password(pwd)
+
+        if messagebox.askyesno("确认", f"确定删除选中的 {len(self.selected)} 个密码吗？", parent=self.window):
+            # 一次性删除，只写一次变更日志
+            self.manager.remove_passwords(list(self.selected))
+            self.selected.clear()
             self.refresh_list()
 
     def deduplicate(self):
+        if self._busy():
+            return
         if self.manager.deduplicate():
             self.refresh_list()
-            messagebox.showinfo("提示", "已完成去重")
+            messagebox.showinfo("提示", "已完成去重", parent=self.window)
         else:
-            messagebox.showinfo("提示", "无需去重")
+            messagebox.showinfo("提示", "无需去重", parent=self.window)
+
+    # ---- 导入 ----
+
+    def import_file(self):
+        path = filedialog.askopenfilename(
+            parent=self.window,
+            title="导入密码",
+            filetypes=[("文本文件", "*.txt"), ("所有文件", "*.*")]
+        )
+        if not path or self._import_thread is not None:
+            return
+        self._import_cancel = threading.Event()
+        self._import_progress = (0, 0)
+        self._import_result = None
+        self._set_editing(False)
+        self.progress.pack(fill=tk.X, pady=(5, 0))
+        self.progress["value"] = 0
+        self._import_thread = threading.Thread(target=self._import_worker, args=(path,), daemon=True)
+        self._import_thread.start()
+        self.window.after(IMPORT_POLL_MS, self._poll_import)
+
+    def _import_worker(self, path):
+        def on_progress(done, total):
+            self._import_progress = (done, total)
+
+        try:
+            self._import_result = self.manager.import_passwords(path, on_progress, self._import_cancel)
+        except Exception as e:
+            self._import_result = e
+
+    def _poll_import(self):
+        if not self.window.winfo_exists():
+            return
+        done, total = self._import_progress
+        if total:
+            self.progress["value"] = done * 100 / total
+            self.count_var.set(f"正在导入... {done * 100 // total}%")
+        if self._import_thread.is_alive():
+            self.window.after(IMPORT_POLL_MS, self._poll_import)
+            return
+
+        self._import_thread = None
+        self.progress.pack_forget()
+        self._set_editing(True)
+        result = self._import_result
+        self.refresh_list()
+        if isinstance(result, Exception):
+            messagebox.showerror("错误", f"导入失败: {result}", parent=self.window)
+        elif result is not None:
+            messagebox.showinfo("提示", f"已导入 {result} 个新密码", parent=self.window)
+
+    def _set_editing(self, enabled):
+        """导入期间禁用修改操作"""
+        state = tk.NORMAL if enabled else tk.DISABLED
+        for button in (self.add_btn, self.del_btn, self.import_btn, self.dedup_btn):
+            button.config(state=state)
+
+    def close(self):
+        if self._import_cancel is not None:
+            self._import_cancel.set()
+        self._filter_generation += 1
+        self.window.destroy()
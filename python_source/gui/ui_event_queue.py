@@ -0,0 +1,54 @@
+import threading
+from collections import deque
+
+
+class UIEventQueue:
+    """
+    工作线程 -> 界面线程的事件队列（线程安全）。
+    界面按固定节拍调用 drain() 一次性取走所有事件：
+    - 任务状态事件按顺序保留，不会丢失
+    - 进度按任务合并，只保留最新值
+    - 状态栏文字只保留最新一条
+    - 日志行最多保留 max_log_lines 行，界面跟不上时丢弃最旧的并计数
+    """
+
+    def __init__(self, max_log_lines=2000):
+        self._lock = threading.Lock()
+        self._states = []
+        self._progress = {}
+        self._status = None
+        self._logs = deque(maxlen=max_log_lines)
+        self._dropped_logs = 0
+
+    def put_state(self, job, state):
+        with self._lock:
+            self._states.append((job, state))
+
+    def put_progress(self, job, progress):
+        with self._lock:
+            self._progress[job.job_id] = (job, progress)
+
+    def put_status(self, message):
+        with self._lock:
+            self._status = message
+
+    def put_log(self, line):
+        with self._lock:
+            if len(self._logs) == self._logs.maxlen:
+                self._dropped_logs += 1
+            self._logs.append(line)
+
+    def drain(self):
+        """
+        取走所有待处理事件
+        Returns:
+            (状态事件列表, {job_id: (job, 最新进度)}, 最新状态文字或 None, 日志行列表, 被丢弃的日志行数)
+        """
+        with self._lock:
+            states, self._states = self._states, []
+            progress, self._progress = self._progress, {}
+            status, self._status = self._status, None
+            logs = list(self._logs)
+            self._logs.clear()
+            dropped, self._dropped_logs = self._dropped_logs, 0
+        return states, progress, status, logs, dropped
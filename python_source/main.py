@@ -11,6 +11,10 @@ if current_dir not in sys.path:
 from utils.config import config
 from core.simple_password_manager import SimplePasswordManager
 from core.extractor import ExtractorEngine
+from core.archive_index import ArchiveIndex
+from core.process_slots import process_slots
+from core.sevenzip_probe import sevenzip_probe
+from core.backends import BackendPolicy
 from gui.main_window import MainWindow
 
 # 尝试导入 TkinterDnD
@@ -24,7 +28,18 @@ def main():
     # 初始化核心组件
     # 使用None作为初始密码文件路径，让用户在GUI中选择
     pwd_manager = SimplePasswordManager()
-    engine = ExtractorEngine(config.get("sevenzip_path"), pwd_manager)
+    # 全局的 7z 进程数上限与程序探测缓存
+    process_slots.set_limit(config.get("max_sevenzip_processes"))
+    sevenzip_probe.cache_file = config.get_data_path("sevenzip_probe_file", "sevenzip_probe.json")
+    index = ArchiveIndex(config.get_data_path("archive_index_dir", "archive_index"), config.get("archive_index_size"))
+    backend_policy = BackendPolicy(config.get("inprocess_max_size_mb") * 1024 * 1024) if config.get("inprocess_max_size_mb") else None
+    candidates = {
+        "wordlists": config.get("candidate_wordlists"),
+        "masks": config.get("candidate_masks"),
+        "rules": config.get("candidate_rules"),
+        "archive_names": config.get("candidate_archive_names")
+    }
+    engine = ExtractorEngine(config.get("sevenzip_path"), pwd_manager, max_workers=config.get("password_workers"), cache_size=config.get("password_cache_size"), index=index, backend_policy=backend_policy, stall_timeout=config.get("stall_timeout_seconds"), candidates=candidates)
 
     # 检查 7-Zip
     if not engine.handler.check_sevenzip_installed():
@@ -42,6 +57,7 @@ def main():
     
     app = MainWindow(root, config, engine, pwd_manager)
     root.mainloop()
+    engine.flush()
 
 if __name__ == "__main__":
     from tkinter import messagebox
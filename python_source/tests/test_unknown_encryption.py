@@ -0,0 +1,81 @@
+"""
+加密类型无法判断（7z l 失败）时的处理：未加密的压缩包应当无密码解压，
+不能让密码本中的第一个密码“校验通过”后被写入缓存和成功统计。
+
+使用 benchmarks/fake7z.py 替身程序（需要 POSIX shell）。
+用法: python -m unittest discover -s tests
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+source_dir = os.path.dirname(current_dir)
+for path in (source_dir, os.path.join(source_dir, "benchmarks")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from core.archive_index import ENCRYPTION_UNKNOWN
+from core.extractor import ExtractorEngine
+from core.password_cache import PasswordHitCache
+from core.simple_password_manager import SimplePasswordManager
+from synthetic import FAKE7Z_SCRIPT, make_archive, make_entries
+
+
+def install_listing_failure_7z(directory):
+    """7z 替身：l 命令总是失败（模拟目录列表出错或超时），其余命令交给 fake7z"""
+    path = os.path.join(directory, "7z")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('#!/bin/sh\n'
+                'if [ "$1" = "l" ]; then echo "ERROR: listing failed"; exit 2; fi\n'
+                f'exec "{sys.executable}" "{FAKE7Z_SCRIPT}" "$@"\n')
+    os.chmod(path, 0o755)
+    return path
+
+
+@unittest.skipIf(os.name == "nt", "fake7z 需要 POSIX shell")
+class UnknownEncryptionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="test_unknown_")
+        self.sevenzip = install_listing_failure_7z(self.root)
+        self.archive = os.path.join(self.root, "plain.7z")
+        make_archive(self.archive, make_entries(2, 2048))
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def make_engine(self, passwords):
+        passwords_file = os.path.join(self.root, "passwords.txt")
+        with open(passwords_file, 'w', encoding='utf-8') as f:
+            f.write("".join(password + "\n" for password in passwords))
+        return ExtractorEngine(self.sevenzip, SimplePasswordManager(passwords_file), max_workers=2)
+
+    def extract(self, engine):
+        destination = os.path.join(self.root, "out")
+        return engine.extract_with_passwords(self.archive, destination), destination
+
+    def test_plain_archive_with_failed_listing_is_classified_unknown(self):
+        engine = self.make_engine([])
+        self.assertEqual(engine.handler.classify_encryption(self.archive), ENCRYPTION_UNKNOWN)
+
+    def test_plain_archive_extracts_without_password_and_empty_book(self):
+        (result, password), destination = self.extract(self.make_engine([]))
+        self.assertTrue(result, result)
+        self.assertIsNone(password)
+        self.assertTrue(os.path.exists(os.path.join(destination, "dir000", "file00000.bin")))
+
+    def test_plain_archive_does_not_use_or_store_book_password(self):
+        engine = self.make_engine(["junk-password", "other"])
+        (result, password), _ = self.extract(engine)
+        self.assertTrue(result, result)
+        self.assertIsNone(password)
+        cache = PasswordHitCache.for_passwords_file(engine.password_manager.passwords_file)
+        self.assertEqual(len(cache.entries), 0)
+        self.assertEqual(engine.password_manager.stats, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
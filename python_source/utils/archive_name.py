@@ -0,0 +1,101 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# 分卷命名方式
+SCHEME_SINGLE = "single"    # 单个压缩包，或 .rar/.r00、.z01/.zip 分卷的主文件
+SCHEME_SPLIT = "split"      # .7z.001 / .zip.001 / .rar.001
+SCHEME_PART = "part"        # .part1.rar
+SCHEME_RNN = "rnn"          # .rar + .r00 .r01 ...
+SCHEME_ZNN = "znn"          # .z01 .z02 ... + .zip
+SCHEME_BARE = "bare"        # .001 .002 ...（无压缩格式后缀）
+
+CONTAINER_TYPES = ("7z", "zip", "rar")
+
+
+class ArchiveName(namedtuple("ArchiveName", "base container scheme number width is_first")):
+    """
+    解析后的压缩文件名
+    - base: 去掉压缩/分卷后缀的名称（即默认解压目录名）
+    - container: 压缩格式 7z / zip / rar，无法从文件名判断时为 None
+    - scheme: 分卷命名方式 SCHEME_*
+    - number: 分卷编号（主文件为 None），width: 编号的位数
+    - is_first: 是否是解压时交给 7z 的那一卷
+    """
+
+    __slots__ = ()
+
+    @property
+    def set_key(self):
+        """同一目录中 set_key 相同（忽略大小写）的文件属于同一个分卷组"""
+        scheme = self.scheme
+        if scheme == SCHEME_SINGLE:
+            # 主文件与同名的 .rNN / .zNN 归为一组
+            scheme = {"rar": SCHEME_RNN, "zip": SCHEME_ZNN}.get(self.container, scheme)
+        return scheme, self.base.lower(), self.container
+
+    @property
+    def order_key(self):
+        """分卷组内的数据顺序：.rNN 组的 .rar 在最前，.zNN 组的 .zip 在最后"""
+        if self.number is None:
+            return float("inf") if self.container == "zip" else -1
+        return self.number
+
+    @property
+    def first_number(self):
+        """该命名方式下第一个编号（.r00 从 0 开始，其余从 1 开始）"""
+        return 0 if self.scheme == SCHEME_RNN else 1
+
+    def volume_name(self, number):
+        """同一分卷组中编号为 number 的文件名（number 为 None 时返回主文件名）"""
+        if number is None or self.scheme == SCHEME_SINGLE:
+            return f"{self.base}.{self.container}"
+        digits = str(number).zfill(self.width)
+        return {
+            SCHEME_SPLIT: f"{self.base}.{self.container}.{digits}",
+            SCHEME_PART: f"{self.base}.part{digits}.rar",
+            SCHEME_RNN: f"{self.base}.r{digits}",
+            SCHEME_ZNN: f"{self.base}.z{digits}",
+            SCHEME_BARE: f"{self.base}.{digits}",
+        }[self.scheme]
+
+
+# 识别规则表，按顺序匹配: (命名方式, 正则, 固定的压缩格式, 第一卷编号)
+# 第一卷编号为 None 表示编号卷都不是第一卷（由主文件打开）
+_RULES = [
+    (SCHEME_SPLIT, r'(?P<base>.+)\.(?P<container>7z|zip|rar)\.(?P<num>\d+)', None, 1),
+    (SCHEME_PART, r'(?P<base>.+)\.part(?P<num>\d+)\.rar', "rar", 1),
+    (SCHEME_RNN, r'(?P<base>.+)\.r(?P<num>\d{2,})', "rar", None),
+    (SCHEME_ZNN, r'(?P<base>.+)\.z(?P<num>\d{2,})', "zip", None),
+    (SCHEME_BARE, r'(?P<base>.+)\.(?P<num>\d{3})', None, 1),
+    (SCHEME_SINGLE, r'(?P<base>.+)\.(?P<container>7z|zip|rar)', None, None),
+]
+_COMPILED_RULES = [
+    (scheme, re.compile(pattern, re.IGNORECASE), container, first)
+    for scheme, pattern, container, first in _RULES
+]
+# 最后一段后缀的快速预筛：绝大多数非压缩文件在这里就被排除，不运行正则
+_LAST_EXT_RE = re.compile(r'(?:7z|zip|rar|[rz]\d{2,}|\d+)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=65536)
+def parse_archive_name(filename):
+    """
+    解析文件名（不含目录），不是支持的压缩文件时返回 None
+    """
+    dot = filename.rfind(".")
+    if dot <= 0 or not _LAST_EXT_RE.fullmatch(filename, dot + 1):
+        return None
+
+    for scheme, pattern, container, first in _COMPILED_RULES:
+        match = pattern.fullmatch(filename)
+        if not match:
+            continue
+        groups = match.groupdict()
+        container = container or (groups.get("container") or "").lower() or None
+        digits = groups.get("num")
+        if digits is None:
+            return ArchiveName(match.group("base"), container, scheme, None, 0, True)
+        number = int(digits)
+        return ArchiveName(match.group("base"), container, scheme, number, len(digits), number == first)
+    return None
@@ -1,7 +1,7 @@
 import os
 import sys
-import winreg
 import json
+import shutil
 
 class Config:
     def __init__(self, config_file="config.json"):
@@ -17,7 +17,35 @@ class Config:
             "sevenzip_path": self._find_sevenzip_path(),
             "last_extract_path": "",
             "passwords_file": "",
-            "auto_extract": True
+            "auto_extract": True,
+            # 并行校验密码的 7z 进程数，0 表示按 CPU 核数自动选择
+            "password_workers": 0,
+            # 成功密码缓存最多保存的压缩包数量（LRU 淘汰）
+            "password_cache_size": 1000,
+            # 批量解压时同时进行的解压任务数
+            "max_parallel_jobs": 2,
+            # 压缩包目录列表索引的目录，为空时放在配置文件所在目录下的 archive_index
+            "archive_index_dir": "",
+            "archive_index_size": 500,
+            # 监视文件夹模式的状态文件，为空时放在配置文件所在目录下的 watch_state.json
+            "watch_state_file": "",
+            # 文件大小保持不变多少秒后才认为下载完成
+            "watch_settle_seconds": 5,
+            # 没有 inotify 时的轮询间隔（秒）
+            "watch_poll_interval": 2,
+            # 同时运行的 7z 进程数上限（批量、监视、密码搜索共用），0 表示按 CPU 核数
+            "max_sevenzip_processes": 0,
+            # 7z 程序探测结果的缓存文件，为空时放在配置文件所在目录下的 sevenzip_probe.json
+            "sevenzip_probe_file": "",
+            # 不超过该大小（MB）的单卷 zip（以及安装了 py7zr 时的 7z）在进程内处理，0 表示总是使用 7z
+            "inprocess_max_size_mb": 32,
+            "stall_timeout_seconds": 120,
+            # 密码本之外的候选密码：字典文件（逐行读取）、掩码（如 ?d?d?d?d）、
+            # 应用到密码本的变形规则（lower/upper/capitalize/swapcase/reverse/double/leet/suffix/years）、是否尝试由文件名推测的密码
+            "candidate_wordlists": [],
+            "candidate_masks": [],
+            "candidate_rules": [],
+            "candidate_archive_names": True
         }
         self.config = self.load_config()
 
@@ -33,6 +61,11 @@ class Config:
         for path in common_paths:
             if os.path.exists(path):
                 return path
+        # 其他平台（如 Linux 服务器）从 PATH 中查找
+        for name in ("7z", "7zz", "7za"):
+            path = shutil.which(name)
+            if path:
+                return path
         return ""
 
     def load_config(self):
@@ -60,6 +93,13 @@ class Config:
         self.config[key] = value
         self.save_config()
 
+    def get_data_path(self, key, default_name):
+        """获取数据文件/目录路径：配置中未指定时放在配置文件所在目录"""
+        path = self.get(key)
+        if path:
+            return path
+        return os.path.join(os.path.dirname(self.config_file), default_name)
+
     def _get_base_dir(self):
         """获取应用的基础目录，支持PyInstaller打包"""
         if getattr(sys, 'frozen', False):
@@ -0,0 +1,71 @@
+import os
+
+from utils.volume_set import VolumeSet
+from utils.archive_name import parse_archive_name
+
+
+class VolumeResolver:
+    """
+    目录级的分卷组解析：每个目录只做一次 os.scandir，
+    按文件名一次性归并出所有分卷组，不再对每个文件单独 glob / exists。
+    返回的 VolumeSet 已带有扫描时得到的大小，可直接 check()；
+    缺卷（包括缺第一卷）的分卷组通过 has_gaps / missing_numbers 标出。
+    """
+
+    @classmethod
+    def scan(cls, directory, recursive=False, skip_dir=None):
+        """
+        扫描目录，返回其中所有分卷组（单个压缩包是只有一卷的分卷组），按第一卷路径排序
+        Args:
+            directory: 目录路径
+            recursive: 是否递归子目录
+            skip_dir: 递归时判断是否跳过某个子目录的函数(路径) -> bool
+        """
+        volume_sets = []
+        pending = [directory]
+        while pending:
+            current = pending.pop()
+            files = []
+            subdirs = []
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_file():
+                                files.append(entry)
+                            elif recursive and entry.is_dir(follow_symlinks=False):
+                                if skip_dir is None or not skip_dir(entry.path):
+                                    subdirs.append(entry.path)
+                        except OSError:
+                            continue
+            except OSError as e:
+                print(f"Failed to scan directory {current}: {e}")
+                continue
+            volume_sets.extend(cls.group_entries(files))
+            pending.extend(sorted(subdirs, reverse=True))
+        volume_sets.sort(key=lambda vs: vs.first_volume)
+        return volume_sets
+
+    @staticmethod
+    def group_entries(entries):
+        """
+        把同一目录下的文件归并为分卷组
+        Args:
+            entries: os.DirEntry 列表（使用其 name / path / stat()）
+        """
+        groups = {}
+        for entry in entries:
+            info = parse_archive_name(entry.name)
+            if info is not None:
+                groups.setdefault(info.set_key, []).append(entry)
+
+        volume_sets = []
+        for members in groups.values():
+            sizes = {}
+            for entry in members:
+                try:
+                    sizes[entry.path] = entry.stat().st_size
+                except OSError:
+                    sizes[entry.path] = 0
+            volume_sets.append(VolumeSet(list(sizes), sizes))
+        return volume_sets
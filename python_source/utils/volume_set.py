@@ -0,0 +1,205 @@
+import io
+import os
+import bisect
+
+from utils.file_utils import FileUtils
+from utils.archive_name import parse_archive_name, SCHEME_RNN, SCHEME_ZNN
+
+def _parse(path):
+    return parse_archive_name(os.path.basename(path))
+
+
+class VolumeSet:
+    """
+    一组分卷文件（单个文件也视为只有一卷的分卷组）。
+    - volumes: 按数据顺序排列的分卷路径
+    - first_volume: 交给 7z 打开的那一卷（.z01 + .zip 分卷是数据上的最后一卷 .zip）
+    - check(): 在解压之前检查缺卷、截断等问题
+    - open_stream(): 把所有分卷当作一个连续的只读流，不生成拼接后的临时文件
+    """
+
+    def __init__(self, volumes, sizes=None):
+        """
+        Args:
+            volumes: 分卷路径
+            sizes: 可选的 {路径: 大小}，目录扫描时已经拿到的大小，避免再次 stat
+        """
+        # 去重（不同的查找规则可能把主文件列出两次）并按数据顺序排列
+        self.volumes = self._order(list(dict.fromkeys(volumes)))
+        self._sizes = [sizes[v] for v in self.volumes] if sizes else None
+
+    @classmethod
+    def from_path(cls, path):
+        """从分卷中的任意一卷（或单个压缩包）构建分卷组"""
+        return cls(FileUtils.get_volume_files(path))
+
+    @staticmethod
+    def _order(volumes):
+        """按数据顺序排序：.rNN 的 .rar 在最前，.zNN 的 .zip 在最后"""
+        def sort_key(path):
+            info = _parse(path)
+            return info.order_key if info else -1
+
+        return sorted(volumes, key=sort_key)
+
+    @property
+    def first_volume(self):
+        for path in self.volumes:
+            info = _parse(path)
+            if info is not None and info.is_first:
+                return path
+        # 第一卷缺失时退回数据顺序上的第一个文件
+        return self.volumes[0]
+
+    @property
+    def is_multi_volume(self):
+        return len(self.volumes) > 1
+
+    @property
+    def sizes(self):
+        if self._sizes is None:
+            self._sizes = [os.path.getsize(v) if os.path.exists(v) else 0 for v in self.volumes]
+        return self._sizes
+
+    @property
+    def total_size(self):
+        return sum(self.sizes)
+
+    def check(self):
+        """
+        检查分卷组是否完整，返回问题列表（空列表表示未发现问题）：
+        - 编号不连续（缺卷）、第一卷缺失
+        - 分卷文件不存在或大小为 0
+        - 中间某一卷比第一卷小（截断），或最后一卷比第一卷大
+        """
+        problems = []
+        if self._sizes is None:
+            for path in self.volumes:
+                if not os.path.exists(path):
+                    problems.append(f"分卷不存在: {os.path.basename(path)}")
+
+        missing, width = self._missing_numbers()
+        if missing:
+            names = ", ".join(str(n).zfill(width) for n in missing[:10])
+            if len(missing) > 10:
+                names += f" 等 {len(missing)} 卷"
+            problems.append(f"缺少分卷: {names}")
+        missing_main = self.missing_main_volume
+        if missing_main:
+            problems.append(f"缺少主文件: {missing_main}")
+
+        if self.is_multi_volume:
+            sizes = self.sizes
+            volume_size = sizes[0]
+            for path, size in zip(self.volumes, sizes):
+                if size == 0 and os.path.exists(path):
+                    problems.append(f"分卷大小为 0: {os.path.basename(path)}")
+            for path, size in zip(self.volumes[1:-1], sizes[1:-1]):
+                if 0 < size != volume_size:
+                    problems.append(f"分卷大小异常（可能不完整）: {os.path.basename(path)}")
+            if sizes[-1] > volume_size > 0:
+                problems.append(f"最后一卷比第一卷大，分卷顺序或文件可能有误: {os.path.basename(self.volumes[-1])}")
+        return problems
+
+    @property
+    def missing_numbers(self):
+        """编号序列中缺失的分卷编号（包括缺失的第一卷）"""
+        return self._missing_numbers()[0]
+
+    @property
+    def missing_main_volume(self):
+        """.rNN / .zNN 分卷缺少主文件 .rar / .zip 时返回其文件名，否则返回 None"""
+        infos = [info for info in map(_parse, self.volumes) if info is not None]
+        numbered = [info for info in infos if info.number is not None]
+        if numbered and numbered[0].scheme in (SCHEME_RNN, SCHEME_ZNN) and len(numbered) == len(infos):
+            return numbered[0].volume_name(None)
+        return None
+
+    @property
+    def has_gaps(self):
+        return bool(self.missing_numbers) or self.missing_main_volume is not None
+
+    def _missing_numbers(self):
+        """返回 (缺失编号列表, 编号位数)"""
+        numbered = [info for info in map(_parse, self.volumes) if info is not None and info.number is not None]
+        if not numbered:
+            return [], 0
+        numbers = {info.number for info in numbered}
+        # 按原文件名的位数显示缺失的编号，如 003
+        width = max(info.width for info in numbered)
+        missing = sorted(set(range(numbered[0].first_number, max(numbers) + 1)) - numbers)
+        return missing, width
+
+    def open_stream(self):
+        """按顺序读取所有分卷的虚拟文件对象（支持 seek），替代物理拼接"""
+        return io.BufferedReader(VolumeStreamReader(self.volumes))
+
+
+class VolumeStreamReader(io.RawIOBase):
+    """把多个文件依次连接成一个只读、可定位的原始流，不复制数据"""
+
+    def __init__(self, paths):
+        super().__init__()
+        self.paths = list(paths)
+        self.sizes = [os.path.getsize(p) for p in self.paths]
+        self.offsets = []
+        offset = 0
+        for size in self.sizes:
+            self.offsets.append(offset)
+            offset += size
+        self.length = offset
+        self.position = 0
+        self._index = None
+        self._file = None
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.length
+        if offset < 0:
+            raise ValueError("negative seek position")
+        self.position = offset
+        return self.position
+
+    def readinto(self, buffer):
+        view = memoryview(buffer).cast("B")
+        filled = 0
+        while filled < len(view) and self.position < self.length:
+            index = self._locate(self.position)
+            f = self._open(index)
+            f.seek(self.position - self.offsets[index])
+            want = min(len(view) - filled, self.offsets[index] + self.sizes[index] - self.position)
+            count = f.readinto(view[filled:filled + want])
+            if not count:
+                break
+            filled += count
+            self.position += count
+        return filled
+
+    def _locate(self, position):
+        # 最后一个起始偏移 <= position 的分卷（自动跳过大小为 0 的分卷）
+        return max(0, bisect.bisect_right(self.offsets, position) - 1)
+
+    def _open(self, index):
+        if self._index != index:
+            if self._file is not None:
+                self._file.close()
+            self._file = open(self.paths[index], 'rb')
+            self._index = index
+        return self._file
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        super().close()